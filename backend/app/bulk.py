@@ -0,0 +1,199 @@
+"""Batched bulk-ingest helpers shared by the entity routers"""
+import json
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, Type
+
+import oracledb
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+from app import queries
+from app.refs import RefResolver
+
+# Records inserted (and committed) per executemany call
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "1000"))
+
+# Validates a batch before it is inserted: one error message (or None) per record
+BatchCheck = Callable[[List[BaseModel]], Awaitable[List[Optional[str]]]]
+
+
+async def read_records(request: Request) -> AsyncIterator[Any]:
+    """Yield raw records from a JSON array body or an NDJSON stream
+
+    NDJSON bodies (Content-Type application/x-ndjson) are consumed incrementally and
+    yielded as undecoded lines, so a malformed line only fails its own record.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of records")
+    for record in body:
+        yield record
+
+
+async def bulk_insert(
+    connection: oracledb.AsyncConnection,
+    request: Request,
+    model: Type[BaseModel],
+    sequence_name: Optional[str],
+    insert_query: str,
+    bind_params: Callable[[BaseModel, Any], Dict],
+    input_sizes: Optional[Dict] = None,
+    check_batch: Optional[BatchCheck] = None,
+    record_key: Optional[Callable[[BaseModel], Hashable]] = None,
+) -> Dict:
+    """Validate, number and insert records in batches of BULK_BATCH_SIZE
+
+    Each batch allocates its IDs with one sequence query, inserts with a single
+    executemany(batcherrors=True) and commits once. Rows rejected by validation,
+    by `check_batch` or by the database are reported by their position in the
+    request body.
+
+    Args:
+        model: Pydantic model each record is validated against
+        sequence_name: Sequence used for the new primary keys (None for natural keys)
+        insert_query: INSERT statement executed for every valid record
+        bind_params: Builds the bind dictionary of one record from (record, new_id)
+        input_sizes: Optional setinputsizes() arguments (e.g. object types for NULL-able collections)
+        check_batch: Optional batch validation run against the database (e.g. reference_check)
+        record_key: Returns the key of a record when sequence_name is None
+
+    Returns:
+        Dictionary with inserted count, new IDs and per-record errors
+    """
+    cursor: oracledb.AsyncCursor = connection.cursor()
+    result = {"inserted": 0, "ids": [], "errors": []}
+    batch: List[Tuple[int, BaseModel]] = []
+
+    try:
+        index = 0
+        async for raw in read_records(request):
+            try:
+                if isinstance(raw, bytes):
+                    raw = json.loads(raw)
+                batch.append((index, model.model_validate(raw)))
+            except ValidationError as e:
+                result["errors"].append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+            except ValueError as e:
+                result["errors"].append({"index": index, "error": f"Invalid JSON: {e}"})
+            index += 1
+
+            if len(batch) >= BULK_BATCH_SIZE:
+                await _insert_batch(
+                    connection, cursor, batch, result, sequence_name, insert_query, bind_params, input_sizes,
+                    check_batch, record_key,
+                )
+                batch = []
+
+        if batch:
+            await _insert_batch(
+                connection, cursor, batch, result, sequence_name, insert_query, bind_params, input_sizes,
+                check_batch, record_key,
+            )
+
+        return result
+
+    finally:
+        cursor.close()
+
+
+async def _insert_batch(
+    connection: oracledb.AsyncConnection,
+    cursor: oracledb.AsyncCursor,
+    batch: List[Tuple[int, BaseModel]],
+    result: Dict,
+    sequence_name: Optional[str],
+    insert_query: str,
+    bind_params: Callable[[BaseModel, Any], Dict],
+    input_sizes: Optional[Dict],
+    check_batch: Optional[BatchCheck],
+    record_key: Optional[Callable[[BaseModel], Hashable]],
+) -> None:
+    if check_batch:
+        checked = await check_batch([record for _, record in batch])
+        for (index, _), error in zip(batch, checked):
+            if error:
+                result["errors"].append({"index": index, "error": error})
+        batch = [item for item, error in zip(batch, checked) if not error]
+        if not batch:
+            return
+
+    if sequence_name is None:
+        ids = [record_key(record) for _, record in batch]
+    else:
+        # Allocate every ID of the batch in one round-trip
+        cursor.arraysize = cursor.prefetchrows = len(batch) + 1
+        await cursor.execute(queries.NEXTVAL_BATCH[sequence_name], {"batch_size": len(batch)})
+        ids = [row[0] for row in await cursor.fetchall()]
+
+    if input_sizes:
+        cursor.setinputsizes(**input_sizes)
+    await cursor.executemany(
+        insert_query,
+        [bind_params(record, new_id) for (_, record), new_id in zip(batch, ids)],
+        batcherrors=True,
+    )
+    failed = {error.offset: error.message for error in cursor.getbatcherrors()}
+    await connection.commit()
+
+    for offset, ((index, _), new_id) in enumerate(zip(batch, ids)):
+        if offset in failed:
+            result["errors"].append({"index": index, "error": failed[offset]})
+        else:
+            result["ids"].append(new_id)
+            result["inserted"] += 1
+
+
+def reference_check(connection: oracledb.AsyncConnection, references: Dict[str, str]) -> BatchCheck:
+    """Build a check_batch that rejects records referencing IDs that do not exist
+
+    The IDs of a whole batch are resolved with one query per referenced table, instead
+    of one SELECT REF ... INTO per element. Each batch is committed on its own, so it
+    gets its own resolver: rows seen by an earlier batch may have been deleted since.
+
+    Args:
+        references: Model field holding an ID, a list of IDs or None -> referenced object table
+
+    Returns:
+        Batch check reporting the unknown IDs of each record
+    """
+    async def check_batch(records: List[BaseModel]) -> List[Optional[str]]:
+        resolver = RefResolver(connection)
+        missing = {
+            field: set(await resolver.missing(table, [i for record in records for i in _field_ids(record, field)]))
+            for field, table in references.items()
+        }
+        errors = []
+        for record in records:
+            unknown = []
+            for field in references:
+                ids = [i for i in _field_ids(record, field) if i in missing[field]]
+                if ids:
+                    unknown.append(f"{field}: {', '.join(map(str, ids))}")
+            errors.append(f"Unknown {'; '.join(unknown)}" if unknown else None)
+        return errors
+
+    return check_batch
+
+
+def _field_ids(record: BaseModel, field: str) -> List[Hashable]:
+    value = getattr(record, field)
+    if value is None:
+        return []
+    return list(value) if isinstance(value, list) else [value]
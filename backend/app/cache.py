@@ -0,0 +1,127 @@
+"""In-process caches used by the routers"""
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire `ttl` seconds after being stored
+
+    Not shared between worker processes: each worker keeps (and invalidates) its own copy.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        # Bumped by every invalidation, so a value read before one is not stored after it
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Store a value; with the `generation` read before computing it, only if nothing was invalidated since"""
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given"""
+        self.generation += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResultCache(ABC):
+    """Cache of computed results tagged with the tables they were read from
+
+    Implementations may be in-process (LocalResultCache) or shared between workers
+    (e.g. backed by Redis); the interface is async so a network backend fits in.
+    """
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Any:
+        """Return the cached value or None"""
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any, tables: Iterable[str], started_at: float) -> None:
+        """Store a value computed from `tables`
+
+        `started_at` is the time.time() at which the computation began: the value must
+        be discarded if any of the tables was invalidated after that moment.
+        """
+
+    @abstractmethod
+    async def invalidate(self, *tables: str) -> None:
+        """Drop every cached value read from any of `tables` (all values if none given)"""
+
+
+class LocalResultCache(ResultCache):
+    """In-process LRU result cache with TTL expiry"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 900.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._invalidated_at: Dict[str, float] = {}
+
+    async def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    async def set(self, key: Hashable, value: Any, tables: Iterable[str], started_at: float) -> None:
+        tables = frozenset(table.upper() for table in tables)
+        last_invalidated = max((self._invalidated_at.get(table, 0.0) for table in tables), default=0.0)
+        if max(last_invalidated, self._invalidated_at.get("*", 0.0)) >= started_at:
+            return
+        self._entries.set(key, (tables, value))
+
+    async def invalidate(self, *tables: str) -> None:
+        now = time.time()
+        if not tables:
+            self._invalidated_at["*"] = now
+            self._entries.invalidate()
+            return
+
+        tables = frozenset(table.upper() for table in tables)
+        for table in tables:
+            self._invalidated_at[table] = now
+        for key in self._entries.keys():
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] & tables:
+                self._entries.invalidate(key)
+
+
+# Results of the monthly reporting operations (see routers/operations.py)
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "900"))
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+
+result_cache: ResultCache = LocalResultCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+
+# Read-through cache of tissue and drug records (see db_utils); ENTITY_CACHE_TTL=0 disables it
+ENTITY_CACHE_TTL = float(os.environ.get("ENTITY_CACHE_TTL", "300"))
+ENTITY_CACHE_SIZE = int(os.environ.get("ENTITY_CACHE_SIZE", "2048"))
+
+tissue_cache = TTLCache(maxsize=ENTITY_CACHE_SIZE, ttl=ENTITY_CACHE_TTL)
+drug_cache = TTLCache(maxsize=ENTITY_CACHE_SIZE, ttl=ENTITY_CACHE_TTL)
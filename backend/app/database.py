@@ -0,0 +1,137 @@
+"""Oracle connection pool and per-request connection dependency"""
+import os
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Union
+
+import dotenv
+import oracledb
+from fastapi import Request
+
+from app import metrics
+from app.executor import BoundedExecutor, ThreadedPool, database_busy
+from app.queries import STATEMENT_CACHE_SIZE
+
+dotenv.load_dotenv()
+
+# Fetch CLOB columns as str in the row itself instead of as LOB locators that each
+# need another round-trip to read (applies to both driver modes)
+oracledb.defaults.fetch_lobs = False
+
+
+DATABASE_USER = os.environ.get("DATABASE_USER")
+DATABASE_PASSWORD = os.environ.get("DATABASE_PASSWORD")
+DATABSE_DSN = os.environ.get("DATABSE_DSN")
+
+# Pool sizing: sessions are opened lazily from min up to max, increment at a time
+DATABASE_POOL_MIN = int(os.environ.get("DATABASE_POOL_MIN", "2"))
+DATABASE_POOL_MAX = int(os.environ.get("DATABASE_POOL_MAX", "10"))
+DATABASE_POOL_INCREMENT = int(os.environ.get("DATABASE_POOL_INCREMENT", "1"))
+# Longest wait for a free session (milliseconds) before the request is answered with a 503
+DATABASE_POOL_WAIT_TIMEOUT = int(os.environ.get("DATABASE_POOL_WAIT_TIMEOUT", "10000"))
+
+# "async": python-oracledb thin mode with native asyncio (default)
+# "threaded": blocking driver run on a bounded thread pool, for thick-client deployments
+DATABASE_DRIVER_MODE = os.environ.get("DATABASE_DRIVER_MODE", "async")
+ORACLE_CLIENT_LIB_DIR = os.environ.get("ORACLE_CLIENT_LIB_DIR")
+DATABASE_EXECUTOR_WORKERS = int(os.environ.get("DATABASE_EXECUTOR_WORKERS", str(DATABASE_POOL_MAX)))
+DATABASE_EXECUTOR_QUEUE = int(os.environ.get("DATABASE_EXECUTOR_QUEUE", "32"))
+
+# Shared by the threaded pool and by db_utils for blocking LOB reads
+executor = BoundedExecutor(max_workers=DATABASE_EXECUTOR_WORKERS, max_queue=DATABASE_EXECUTOR_QUEUE)
+
+Pool = Union[oracledb.AsyncConnectionPool, ThreadedPool]
+
+# Object/collection types resolved once per pool (see db_utils.get_object_type)
+object_types: Dict[str, oracledb.DbObjectType] = {}
+
+
+def create_pool() -> Pool:
+    """Create the application connection pool for the configured driver mode"""
+    pool_params = {
+        "user": DATABASE_USER,
+        "password": DATABASE_PASSWORD,
+        "dsn": DATABSE_DSN,
+        "min": DATABASE_POOL_MIN,
+        "max": DATABASE_POOL_MAX,
+        "increment": DATABASE_POOL_INCREMENT,
+        "getmode": oracledb.POOL_GETMODE_TIMEDWAIT,
+        "wait_timeout": DATABASE_POOL_WAIT_TIMEOUT,
+        "stmtcachesize": STATEMENT_CACHE_SIZE,
+    }
+
+    if DATABASE_DRIVER_MODE == "threaded":
+        if ORACLE_CLIENT_LIB_DIR:
+            oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR)
+        return ThreadedPool(oracledb.create_pool(**pool_params), executor)
+
+    if DATABASE_DRIVER_MODE != "async":
+        raise ValueError(f"DATABASE_DRIVER_MODE must be 'async' or 'threaded', got {DATABASE_DRIVER_MODE!r}")
+    return oracledb.create_pool_async(**pool_params)
+
+
+async def close_pool(pool: Pool) -> None:
+    """Close the pool and stop the executor threads"""
+    await pool.close(force=True)
+    executor.shutdown()
+    object_types.clear()
+
+
+@asynccontextmanager
+async def acquire_connection(request: Request) -> AsyncIterator[oracledb.AsyncConnection]:
+    """Acquire a pooled connection for an `async with` block
+
+    For handlers that only need the database some of the time (e.g. on a cache miss).
+    The connection is wrapped so its statements are timed (see app.metrics).
+    """
+    started = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        try:
+            connection = await stack.enter_async_context(request.app.state.pool.acquire())
+        except oracledb.Error as e:
+            if e.args[0].full_code != "DPY-4005":  # timed out waiting for a session
+                raise
+            raise database_busy() from e
+        metrics.POOL_ACQUIRE_DURATION.observe(time.perf_counter() - started)
+        instrumented = metrics.InstrumentedConnection(connection, metrics.route_label(request))
+        try:
+            yield instrumented
+        finally:
+            instrumented.flush()
+            await instrumented.capture_slow_queries()
+            if metrics.METRICS_ROUND_TRIPS:
+                try:
+                    await metrics.sample_round_trips(connection, metrics.route_label(request))
+                except oracledb.Error:
+                    pass
+
+
+async def get_connection(request: Request) -> AsyncIterator[oracledb.AsyncConnection]:
+    """FastAPI dependency: acquire a pooled connection for the duration of a request
+
+    The connection is released back to the pool once the response has been sent;
+    any uncommitted work is rolled back on release.
+    """
+    async with acquire_connection(request) as connection:
+        yield connection
+
+
+ConnectionFactory = Callable[[], Awaitable[oracledb.AsyncConnection]]
+
+
+async def get_connection_factory(request: Request) -> AsyncIterator[ConnectionFactory]:
+    """FastAPI dependency: acquire a pooled connection only if the handler asks for one
+
+    For handlers that only need a connection held by the response some of the time
+    (e.g. streaming exports); the connection is released like get_connection's.
+    """
+    async with AsyncExitStack() as stack:
+        connection: Optional[oracledb.AsyncConnection] = None
+
+        async def connect() -> oracledb.AsyncConnection:
+            nonlocal connection
+            if connection is None:
+                connection = await stack.enter_async_context(acquire_connection(request))
+            return connection
+
+        yield connect
@@ -1,11 +1,20 @@
 """Database utility functions for Oracle object-relational operations"""
 import oracledb
-from typing import Optional, List, Any, Dict
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Optional, List, Any, Awaitable, Callable, Dict, Iterator, Tuple
 
+from app import metrics, queries
+from app.cache import ENTITY_CACHE_TTL, TTLCache, tissue_cache, drug_cache
+from app.database import executor, object_types
 
-def read_clob(clob: Any) -> Optional[str]:
+
+async def read_clob(clob: Any) -> Optional[str]:
     """Read CLOB content and return as string
 
+    Queried CLOBs already arrive as str (oracledb.defaults.fetch_lobs is off); LOB
+    locators are only left for RETURNING ... INTO variables of type DB_TYPE_CLOB.
+
     Args:
         clob: Oracle CLOB object or string
 
@@ -16,18 +25,92 @@ def read_clob(clob: Any) -> Optional[str]:
         return None
     if isinstance(clob, str):
         return clob
-    # It's a LOB object, read it
-    return clob.read()
+    # It's a LOB object, read it (blocking driver LOBs are read on the executor)
+    metrics.LOB_READS.inc()
+    if isinstance(clob, oracledb.LOB):
+        return await executor.run(clob.read)
+    return await clob.read()
+
 
+@contextmanager
+def autocommit(connection: oracledb.AsyncConnection) -> Iterator[None]:
+    """Commit statements executed inside the block in their own round-trip
+
+    Saves the separate COMMIT call for single-statement writes.
+    """
+    connection.autocommit = True
+    try:
+        yield
+    finally:
+        connection.autocommit = False
 
-def get_next_id(cursor: oracledb.Cursor, sequence_name: str) -> int:
+
+def returning_into(cursor: oracledb.AsyncCursor, alias: str, columns: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Build a DML RETURNING ... INTO clause and its output variables
+
+    Args:
+        cursor: Oracle cursor the statement will run on
+        alias: Table alias used in the statement
+        columns: Mapping of column name to the variable type (e.g. str, oracledb.DB_TYPE_CLOB)
+
+    Returns:
+        Tuple of (SQL clause, bind variables keyed by bind name)
+    """
+    out_vars = {f"ret_{column}": cursor.var(var_type) for column, var_type in columns.items()}
+    clause = "RETURNING {} INTO {}".format(
+        ", ".join(f"{alias}.{column}" for column in columns),
+        ", ".join(f":{name}" for name in out_vars),
+    )
+    return clause, out_vars
+
+
+def returned_row(out_vars: Dict[str, Any]) -> Optional[Dict]:
+    """Collect the single row returned into `returning_into` variables (None if no row matched)"""
+    row = {}
+    for name, var in out_vars.items():
+        values = var.getvalue()
+        if not values:
+            return None
+        row[name.removeprefix("ret_")] = values[0]
+    return row
+
+
+async def get_next_id(cursor: oracledb.AsyncCursor, sequence_name: str) -> int:
     """Get next value from an Oracle sequence"""
-    cursor.execute(f"SELECT {sequence_name}.NEXTVAL FROM DUAL")
-    result = cursor.fetchone()
+    await cursor.execute(queries.NEXTVAL[sequence_name])
+    result = await cursor.fetchone()
     return result[0] if result else None
 
 
-def create_varray(cursor: oracledb.Cursor, type_name: str, values: List[str]) -> Any:
+async def get_object_type(connection: oracledb.AsyncConnection, type_name: str) -> oracledb.DbObjectType:
+    """Look up an Oracle object or collection type by name
+
+    Types are resolved with a round-trip the first time only and then cached for the
+    lifetime of the pool, so binding collections costs nothing extra per call.
+
+    Args:
+        connection: Oracle connection
+        type_name: Name of the type (e.g., 'AllergyListType')
+
+    Returns:
+        Oracle object type
+    """
+    obj_type = object_types.get(type_name)
+    if obj_type is not None:
+        return obj_type
+
+    try:
+        obj_type = await connection.gettype(type_name)
+    except Exception:
+        # Try with current schema prefix
+        current_user = connection.username.upper()
+        obj_type = await connection.gettype(f"{current_user}.{type_name}")
+
+    object_types[type_name] = obj_type
+    return obj_type
+
+
+async def create_varray(cursor: oracledb.AsyncCursor, type_name: str, values: List[str]) -> Any:
     """Create an Oracle VARRAY object
 
     Args:
@@ -41,13 +124,7 @@ def create_varray(cursor: oracledb.Cursor, type_name: str, values: List[str]) ->
     if not values:
         return None
 
-    try:
-        obj_type = cursor.connection.gettype(type_name)
-    except Exception:
-        # Try with current schema prefix
-        current_user = cursor.connection.username.upper()
-        obj_type = cursor.connection.gettype(f"{current_user}.{type_name}")
-
+    obj_type = await get_object_type(cursor.connection, type_name)
     return obj_type.newobject(values)
 
 
@@ -65,99 +142,327 @@ def varray_to_list(varray: Any) -> List[str]:
     return list(varray.aslist())
 
 
-def get_donor_by_id(cursor: oracledb.Cursor, donor_id: int) -> Optional[Dict]:
-    """Fetch donor by ID and convert to dictionary"""
-    query = """
-        SELECT d.donor_id,
-               d.donor_name,
-               d.donor_surname,
-               d.donor_date_of_birth,
-               d.donor_sex
-        FROM Donors d
-        WHERE d.donor_id = :donor_id
+def to_date(value: Optional[datetime]) -> Optional[date]:
+    """Date of an Oracle DATE holding a day only (fetched as a datetime at midnight)
+
+    Rows sent without response_model validation would otherwise serialize as
+    "1990-01-02T00:00:00" where the model declares a date.
     """
-    cursor.execute(query, {"donor_id": donor_id})
-    row = cursor.fetchone()
+    return value.date() if isinstance(value, datetime) else value
 
-    if not row:
-        return None
 
+class Record:
+    """Compact read-only row kept in the entity caches (no per-instance __dict__)"""
+
+    __slots__ = ()
+
+    def __init__(self, *values: Any):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> "Record":
+        return cls(*(record[name] for name in cls.__slots__))
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TissueRecord(Record):
+    __slots__ = ("tissue_id", "tissue_name", "tissue_description", "tissue_density", "tissue_is_vital")
+
+
+class DrugRecord(Record):
+    __slots__ = ("drug_id", "drug_name", "drug_description", "drug_allergies")
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> "DrugRecord":
+        return cls(record["drug_id"], record["drug_name"], record["drug_description"], tuple(record["drug_allergies"]))
+
+    def to_dict(self) -> Dict:
+        record = super().to_dict()
+        record["drug_allergies"] = list(self.drug_allergies)
+        return record
+
+
+def _cached(cache: TTLCache, record_id: int) -> Optional[Dict]:
+    record = cache.get(record_id) if ENTITY_CACHE_TTL else None
+    return record.to_dict() if record is not None else None
+
+
+def _remember(cache: TTLCache, record_type: type, record_id: int, record: Dict, generation: int) -> None:
+    # Not stored if an update or delete invalidated the cache while the row was read
+    if ENTITY_CACHE_TTL:
+        cache.set(record_id, record_type.from_dict(record), generation)
+
+
+def invalidate_entity_caches(*tables: str) -> None:
+    """Drop the cached records of the given tables (of every table if none given)"""
+    tables = {table.upper() for table in tables}
+    if not tables or "TISSUES" in tables:
+        tissue_cache.invalidate()
+    if not tables or "DRUGS" in tables:
+        drug_cache.invalidate()
+
+
+async def _donor_record(row: Tuple) -> Dict:
     return {
         "donor_id": row[0],
         "donor_name": row[1],
         "donor_surname": row[2],
-        "donor_date_of_birth": row[3],
+        "donor_date_of_birth": to_date(row[3]),
         "donor_sex": row[4]
     }
 
 
-def get_tissue_by_id(cursor: oracledb.Cursor, tissue_id: int) -> Optional[Dict]:
-    """Fetch tissue by ID and convert to dictionary"""
-    query = """
-        SELECT t.tissue_id,
-               t.tissue_name,
-               t.tissue_description,
-               t.tissue_density,
-               t.tissue_is_vital
-        FROM Tissues t
-        WHERE t.tissue_id = :tissue_id
-    """
-    cursor.execute(query, {"tissue_id": tissue_id})
-    row = cursor.fetchone()
-
-    if not row:
-        return None
-
+async def _tissue_record(row: Tuple) -> Dict:
     return {
         "tissue_id": row[0],
         "tissue_name": row[1],
-        "tissue_description": read_clob(row[2]),
+        "tissue_description": await read_clob(row[2]),
         "tissue_density": row[3],
         "tissue_is_vital": row[4]
     }
 
 
-def get_drug_by_id(cursor: oracledb.Cursor, drug_id: int) -> Optional[Dict]:
-    """Fetch drug by ID and convert to dictionary"""
-    query = """
-        SELECT d.drug_id,
-               d.drug_name,
-               d.drug_description,
-               d.drug_allergies
-        FROM Drugs d
-        WHERE d.drug_id = :drug_id
-    """
-    cursor.execute(query, {"drug_id": drug_id})
-    row = cursor.fetchone()
-
-    if not row:
-        return None
-
+async def _drug_record(row: Tuple) -> Dict:
     return {
         "drug_id": row[0],
         "drug_name": row[1],
-        "drug_description": read_clob(row[2]),
+        "drug_description": await read_clob(row[2]),
         "drug_allergies": varray_to_list(row[3])
     }
 
 
-def get_ref_by_id(cursor: oracledb.Cursor, table_name: str, id_field: str, id_value: int) -> Any:
-    """Get a REF to an object by its ID
+async def get_donor_by_id(cursor: oracledb.AsyncCursor, donor_id: int) -> Optional[Dict]:
+    """Fetch donor by ID and convert to dictionary"""
+    await cursor.execute(queries.DONOR_BY_ID, {"donor_id": donor_id})
+    row = await cursor.fetchone()
+    return await _donor_record(row) if row else None
+
+
+# Columns of queries.DONOR_GRAPH after the donor's
+_GRAPH_COLUMNS = (
+    "condition_id",
+    "condition_status",
+    "treatment_effect",
+    "tissue_id",
+    "tissue_name",
+    "tissue_density",
+    "tissue_is_vital",
+    "disease_id",
+    "disease_name",
+    "disease_discovery",
+    "disease_treatable",
+    "disease_cure_id",
+    "treatment_id",
+)
+
+
+async def get_donor_graph(cursor: oracledb.AsyncCursor, donor_id: int, depth: int) -> Optional[Dict]:
+    """Fetch a donor with what its conditions reference, as one nested document
+
+    Two statements whatever the number of conditions: the donor with its conditions,
+    tissues, diseases and cure IDs, then the drugs of all those cures. Descriptions
+    (CLOBs) are left out; they can be fetched by ID.
 
     Args:
         cursor: Oracle cursor
-        table_name: Name of the object table
-        id_field: Name of the ID field
-        id_value: Value of the ID
+        donor_id: Donor to fetch
+        depth: 0 for the donor alone, 1 adds its conditions (with the IDs they
+               reference), 2 resolves their tissue and disease, 3 their treatment and
+               the disease's cure with the drugs composing each cure
 
     Returns:
-        REF to the object
+        Donor dictionary with a `conditions` list (depth 1 and up), None if not found
     """
-    query = f"""
-        SELECT REF(o)
-        FROM {table_name} o
-        WHERE o.{id_field} = :id_value
+    if depth == 0:
+        return await get_donor_by_id(cursor, donor_id)
+
+    cursor.arraysize = cursor.prefetchrows = 100
+    await cursor.execute(queries.DONOR_GRAPH, {"donor_id": donor_id})
+    rows = await cursor.fetchall()
+    if not rows:
+        return None
+
+    donor = await _donor_record(rows[0])
+    graph = [dict(zip(_GRAPH_COLUMNS, row[5:])) for row in rows if row[5] is not None]
+
+    drugs: Dict[int, List[Dict]] = {}
+    if depth >= 3:
+        cure_ids = sorted({row[key] for row in graph for key in ("disease_cure_id", "treatment_id") if row[key]})
+        if cure_ids:
+            id_list_type = await get_object_type(cursor.connection, "SYS.ODCINUMBERLIST")
+            await cursor.execute(queries.DONOR_GRAPH_DRUGS, {"cure_ids": id_list_type.newobject(cure_ids)})
+            async for cure_id, drug_id, drug_name, drug_allergies in cursor:
+                drugs.setdefault(cure_id, []).append(
+                    {"drug_id": drug_id, "drug_name": drug_name, "drug_allergies": varray_to_list(drug_allergies)}
+                )
+
+    def cure(cure_id: Optional[int]) -> Optional[Dict]:
+        return {"cure_id": cure_id, "drugs": drugs.get(cure_id, [])} if cure_id else None
+
+    conditions = []
+    for row in graph:
+        condition = {
+            "condition_id": row["condition_id"],
+            "condition_status": row["condition_status"],
+            "treatment_effect": row["treatment_effect"],
+        }
+        if depth == 1:
+            condition.update(tissue_id=row["tissue_id"], disease_id=row["disease_id"], treatment_id=row["treatment_id"])
+        else:
+            condition["tissue"] = {
+                "tissue_id": row["tissue_id"],
+                "tissue_name": row["tissue_name"],
+                "tissue_density": row["tissue_density"],
+                "tissue_is_vital": row["tissue_is_vital"],
+            }
+            disease = None
+            if row["disease_id"] is not None:
+                disease = {
+                    "disease_id": row["disease_id"],
+                    "disease_name": row["disease_name"],
+                    "disease_discovery": row["disease_discovery"],
+                    "disease_treatable": row["disease_treatable"],
+                }
+                if depth == 2:
+                    disease["disease_cure_id"] = row["disease_cure_id"]
+                else:
+                    disease["cure"] = cure(row["disease_cure_id"])
+            condition["disease"] = disease
+            if depth == 2:
+                condition["treatment_id"] = row["treatment_id"]
+            else:
+                condition["treatment"] = cure(row["treatment_id"])
+        conditions.append(condition)
+
+    donor["conditions"] = conditions
+    return donor
+
+
+async def get_tissue_by_id(cursor: oracledb.AsyncCursor, tissue_id: int) -> Optional[Dict]:
+    """Fetch tissue by ID (read through the tissue cache) and convert to dictionary"""
+    tissue = _cached(tissue_cache, tissue_id)
+    if tissue is not None:
+        return tissue
+
+    generation = tissue_cache.generation
+    await cursor.execute(queries.TISSUE_BY_ID, {"tissue_id": tissue_id})
+    row = await cursor.fetchone()
+    if not row:
+        return None
+
+    tissue = await _tissue_record(row)
+    _remember(tissue_cache, TissueRecord, tissue_id, tissue, generation)
+    return tissue
+
+
+async def get_drug_by_id(cursor: oracledb.AsyncCursor, drug_id: int) -> Optional[Dict]:
+    """Fetch drug by ID (read through the drug cache) and convert to dictionary"""
+    drug = _cached(drug_cache, drug_id)
+    if drug is not None:
+        return drug
+
+    generation = drug_cache.generation
+    await cursor.execute(queries.DRUG_BY_ID, {"drug_id": drug_id})
+    row = await cursor.fetchone()
+    if not row:
+        return None
+
+    drug = await _drug_record(row)
+    _remember(drug_cache, DrugRecord, drug_id, drug, generation)
+    return drug
+
+
+async def get_by_ids(
+    cursor: oracledb.AsyncCursor,
+    query: str,
+    ids: List[int],
+    to_record: Callable[[Tuple], Awaitable[Dict]],
+) -> Dict[int, Dict]:
+    """Fetch many rows by ID in one round-trip
+
+    The IDs are bound as a single SYS.ODCINUMBERLIST collection (:ids), so the
+    statement text is the same whatever the number of IDs.
+
+    Args:
+        cursor: Oracle cursor
+        query: Statement selecting the ID first, filtered on TABLE(:ids)
+        ids: IDs to fetch
+        to_record: Converts a row to its dictionary
+
+    Returns:
+        Dictionary of records keyed by ID; IDs that do not exist are absent
     """
-    cursor.execute(query, {"id_value": id_value})
-    result = cursor.fetchone()
-    return result[0] if result else None
+    id_list_type = await get_object_type(cursor.connection, "SYS.ODCINUMBERLIST")
+    cursor.arraysize = cursor.prefetchrows = len(ids) + 1
+    await cursor.execute(query, {"ids": id_list_type.newobject(ids)})
+
+    records = {}
+    async for row in cursor:
+        records[row[0]] = await to_record(row)
+    return records
+
+
+async def get_donors_by_ids(cursor: oracledb.AsyncCursor, donor_ids: List[int]) -> Dict[int, Dict]:
+    """Fetch donors by ID in one query, keyed by ID"""
+    return await get_by_ids(cursor, queries.DONORS_BY_IDS, donor_ids, _donor_record)
+
+
+async def _get_cached_by_ids(
+    cursor: oracledb.AsyncCursor,
+    query: str,
+    ids: List[int],
+    to_record: Callable[[Tuple], Awaitable[Dict]],
+    cache: TTLCache,
+    record_type: type,
+) -> Dict[int, Dict]:
+    # Serve what the cache holds and fetch only the rest, in one query
+    records = {}
+    for record_id in ids:
+        record = _cached(cache, record_id)
+        if record is not None:
+            records[record_id] = record
+
+    misses = [record_id for record_id in ids if record_id not in records]
+    if misses:
+        generation = cache.generation
+        fetched = await get_by_ids(cursor, query, misses, to_record)
+        for record_id, record in fetched.items():
+            _remember(cache, record_type, record_id, record, generation)
+        records.update(fetched)
+    return records
+
+
+async def get_tissues_by_ids(cursor: oracledb.AsyncCursor, tissue_ids: List[int]) -> Dict[int, Dict]:
+    """Fetch tissues by ID (read through the tissue cache), keyed by ID"""
+    return await _get_cached_by_ids(cursor, queries.TISSUES_BY_IDS, tissue_ids, _tissue_record, tissue_cache, TissueRecord)
+
+
+async def get_drugs_by_ids(cursor: oracledb.AsyncCursor, drug_ids: List[int]) -> Dict[int, Dict]:
+    """Fetch drugs by ID (read through the drug cache), keyed by ID"""
+    return await _get_cached_by_ids(cursor, queries.DRUGS_BY_IDS, drug_ids, _drug_record, drug_cache, DrugRecord)
+
+
+async def warm_entity_caches(connection: oracledb.AsyncConnection) -> None:
+    """Load every tissue and drug into the entity caches (no-op when they are disabled)"""
+    if not ENTITY_CACHE_TTL:
+        return
+
+    cursor: oracledb.AsyncCursor = connection.cursor()
+    cursor.arraysize = cursor.prefetchrows = 1000
+    try:
+        for query, to_record, cache, record_type in (
+            (queries.TISSUES_ALL, _tissue_record, tissue_cache, TissueRecord),
+            (queries.DRUGS_ALL, _drug_record, drug_cache, DrugRecord),
+        ):
+            generation = cache.generation
+            await cursor.execute(query)
+            async for row in cursor:
+                _remember(cache, record_type, row[0], await to_record(row), generation)
+    finally:
+        cursor.close()
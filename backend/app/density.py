@@ -0,0 +1,136 @@
+"""Tissues sorted by density in process, for OP2 thresholds without a query
+
+Every tissue is kept with its OP2 row already encoded as JSON, in density order, so
+a threshold is answered with a binary search and a slice of the encoded rows. The
+array is filled on first use (or at startup), updated by the tissue write
+endpoints and reloaded after bulk loads and changes seen through CQN. Changes made by
+other workers or outside the API are picked up by reloading it once it is older than
+ENTITY_CACHE_TTL. TISSUE_DENSITY_INDEX=0 (or ENTITY_CACHE_TTL=0) disables it: OP2
+then goes through the result cache.
+"""
+import asyncio
+import bisect
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import oracledb
+import pydantic_core
+
+from app import queries
+from app.cache import ENTITY_CACHE_TTL
+from app.db_utils import read_clob
+
+TISSUE_DENSITY_INDEX = os.environ.get("TISSUE_DENSITY_INDEX", "1") == "1" and ENTITY_CACHE_TTL > 0
+
+# Fields of an OP2 row, in the order of OP2_QUERY and TISSUES_ALL
+OP2_FIELDS = ("tissue_id", "tissue_name", "tissue_description", "tissue_density", "tissue_is_vital")
+
+
+class DensityIndex:
+    """Tissue rows sorted by (density, ID); tissues without a density are left out"""
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []
+        self._densities: List[float] = []  # parallel to _keys, for bisecting on a threshold
+        self._rows: List[bytes] = []  # encoded OP2 rows, parallel to _keys
+        self._by_id: Dict[int, Tuple[float, int]] = {}
+        self._stale = True
+        self._loading = False
+        self._changed = False  # a write arrived while loading
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return not self._stale and time.monotonic() - self._loaded_at < ENTITY_CACHE_TTL
+
+    def below(self, max_density: float) -> List[bytes]:
+        """Encoded rows of the tissues with density < max_density, in density order"""
+        return self._rows[:bisect.bisect_left(self._densities, max_density)]
+
+    def add(self, tissue: Dict) -> None:
+        """Index a created or updated tissue (an OP2 row), replacing its previous entry"""
+        if self._loading:
+            self._changed = True
+        elif not self._stale:
+            self._insert(tissue)
+
+    def remove(self, tissue_id: int) -> None:
+        if self._loading:
+            self._changed = True
+        elif not self._stale:
+            self._delete(tissue_id)
+
+    def invalidate(self) -> None:
+        """Reload on next use (after bulk loads or changes made elsewhere)"""
+        self._stale = self._changed = True
+
+    async def load(self, connection: oracledb.AsyncConnection) -> None:
+        """Read every tissue, unless another request just did (callers wait for a load in progress)"""
+        async with self._lock:
+            if self.ready:
+                return
+            started = time.monotonic()
+            self._loading, self._changed = True, False
+            cursor: oracledb.AsyncCursor = connection.cursor()
+            try:
+                cursor.arraysize = cursor.prefetchrows = 1000
+                await cursor.execute(queries.TISSUES_ALL)
+                tissues = []
+                async for row in cursor:
+                    tissue = dict(zip(OP2_FIELDS, row))
+                    tissue["tissue_description"] = await read_clob(tissue["tissue_description"])
+                    tissues.append(tissue)
+            finally:
+                self._loading = False
+                cursor.close()
+
+            indexed = sorted(
+                ((tissue["tissue_density"], tissue["tissue_id"]), pydantic_core.to_json(tissue))
+                for tissue in tissues
+                if tissue["tissue_density"] is not None
+            )
+            self._keys = [key for key, _ in indexed]
+            self._densities = [density for density, _ in self._keys]
+            self._rows = [row for _, row in indexed]
+            self._by_id = {key[1]: key for key in self._keys}
+            # Ready only now; writes made while loading may be missing from what was read,
+            # so they have it reloaded next time
+            self._stale, self._loaded_at = self._changed, started
+
+    def _insert(self, tissue: Dict) -> None:
+        self._delete(tissue["tissue_id"])
+        if tissue["tissue_density"] is None:
+            return
+        key = (tissue["tissue_density"], tissue["tissue_id"])
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._densities.insert(position, key[0])
+        self._rows.insert(position, pydantic_core.to_json({field: tissue[field] for field in OP2_FIELDS}))
+        self._by_id[key[1]] = key
+
+    def _delete(self, tissue_id: int) -> None:
+        key: Optional[Tuple[float, int]] = self._by_id.pop(tissue_id, None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self._keys, key)
+        del self._keys[position]
+        del self._densities[position]
+        del self._rows[position]
+
+
+tissue_density_index = DensityIndex()
+
+
+def op2_response(max_density: float, rows: List[bytes]) -> bytes:
+    """OP2 response body assembled from encoded rows"""
+    return b'{"threshold":%s,"count":%d,"tissues":[%s]}' % (
+        pydantic_core.to_json(max_density), len(rows), b",".join(rows)
+    )
+
+
+async def warm_density_index(connection: oracledb.AsyncConnection) -> None:
+    """Fill the density index before the first request (no-op when it is disabled)"""
+    if TISSUE_DENSITY_INDEX:
+        await tissue_density_index.load(connection)
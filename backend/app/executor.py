@@ -0,0 +1,194 @@
+"""Bounded thread pool execution layer for the blocking (thick-client) driver
+
+The routers and db_utils are written against the awaitable python-oracledb API
+(AsyncConnection/AsyncCursor). When the async driver is not an option, the
+Threaded* classes below expose that same interface on top of the synchronous
+driver by dispatching every blocking call onto a sized thread pool.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Optional
+
+import oracledb
+from fastapi import HTTPException
+
+
+def database_busy() -> HTTPException:
+    """503 answered when no database capacity frees up in time"""
+    return HTTPException(status_code=503, detail="Database is busy, retry later", headers={"Retry-After": "1"})
+
+
+class BoundedExecutor:
+    """Thread pool with a hard limit on in-flight plus queued calls
+
+    Once max_workers calls are running and max_queue more are waiting, further
+    calls are rejected with a 503 instead of piling up behind the database.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or waiting for a worker"""
+        return self._pending
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool, rejecting it if the pool is saturated"""
+        if self._pending >= self.max_workers + self.max_queue:
+            raise database_busy()
+        return await self.run_unbounded(fn, *args, **kwargs)
+
+    async def run_unbounded(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool without the saturation check
+
+        Only meant for cleanup work (e.g. releasing a session) that must not be refused.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="oracledb")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ThreadedCursor:
+    """Awaitable facade over a blocking oracledb.Cursor"""
+
+    def __init__(self, cursor: oracledb.Cursor, connection: "ThreadedConnection", executor: BoundedExecutor):
+        self._cursor = cursor
+        self._executor = executor
+        self._buffer: deque = deque()
+        self.connection = connection
+
+    def __getattr__(self, name: str) -> Any:
+        # Local attributes (rowcount, arraysize, description, var, ...) need no round-trip
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_") or name == "connection":
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    async def execute(self, statement: str, parameters: Any = None, **kwargs) -> None:
+        self._buffer.clear()
+        await self._executor.run(self._cursor.execute, statement, parameters, **kwargs)
+
+    async def executemany(self, statement: str, parameters: Any, **kwargs) -> None:
+        self._buffer.clear()
+        await self._executor.run(self._cursor.executemany, statement, parameters, **kwargs)
+
+    async def fetchone(self) -> Optional[tuple]:
+        if self._buffer:
+            return self._buffer.popleft()
+        return await self._executor.run(self._cursor.fetchone)
+
+    async def fetchmany(self, size: Optional[int] = None) -> list:
+        size = size or self._cursor.arraysize
+        rows = [self._buffer.popleft() for _ in range(min(size, len(self._buffer)))]
+        if len(rows) < size:
+            rows.extend(await self._executor.run(self._cursor.fetchmany, size - len(rows)))
+        return rows
+
+    async def fetchall(self) -> list:
+        rows = list(self._buffer)
+        self._buffer.clear()
+        rows.extend(await self._executor.run(self._cursor.fetchall))
+        return rows
+
+    def __aiter__(self) -> "ThreadedCursor":
+        return self
+
+    async def __anext__(self) -> tuple:
+        # Fetch a whole arraysize batch per thread hop instead of one row at a time
+        if not self._buffer:
+            self._buffer.extend(await self._executor.run(self._cursor.fetchmany))
+            if not self._buffer:
+                raise StopAsyncIteration
+        return self._buffer.popleft()
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class ThreadedConnection:
+    """Awaitable facade over a blocking oracledb.Connection"""
+
+    def __init__(self, connection: oracledb.Connection, executor: BoundedExecutor):
+        self._connection = connection
+        self._executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._connection, name, value)
+
+    def cursor(self) -> ThreadedCursor:
+        return ThreadedCursor(self._connection.cursor(), self, self._executor)
+
+    async def commit(self) -> None:
+        await self._executor.run(self._connection.commit)
+
+    async def rollback(self) -> None:
+        await self._executor.run_unbounded(self._connection.rollback)
+
+    async def gettype(self, name: str) -> oracledb.DbObjectType:
+        return await self._executor.run(self._connection.gettype, name)
+
+
+class ThreadedPool:
+    """Awaitable facade over a blocking oracledb.ConnectionPool
+
+    Acquires wait for a free session on the event loop, not on a worker thread: workers
+    blocked in pool.acquire would starve the calls (and the release) of the requests
+    holding the sessions they wait for.
+    """
+
+    def __init__(self, pool: oracledb.ConnectionPool, executor: BoundedExecutor):
+        self._pool = pool
+        self._executor = executor
+        self._sessions = asyncio.Semaphore(pool.max)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[ThreadedConnection]:
+        try:
+            # wait_timeout is in milliseconds, as given to oracledb.create_pool
+            await asyncio.wait_for(self._sessions.acquire(), self._pool.wait_timeout / 1000)
+        except asyncio.TimeoutError:
+            raise database_busy()
+        try:
+            connection = await self._executor.run(self._pool.acquire)
+        except BaseException:
+            self._sessions.release()
+            raise
+        try:
+            yield ThreadedConnection(connection, self._executor)
+        finally:
+            try:
+                await self._executor.run_unbounded(self._pool.release, connection)
+            finally:
+                self._sessions.release()
+
+    async def close(self, force: bool = False) -> None:
+        await self._executor.run_unbounded(self._pool.close, force)
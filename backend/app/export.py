@@ -0,0 +1,103 @@
+"""Streaming NDJSON/CSV export of query results"""
+import csv
+import datetime
+import decimal
+import io
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List
+
+import oracledb
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.db_utils import read_clob, varray_to_list
+
+# Rows fetched per round-trip (and encoded per response chunk) while exporting
+EXPORT_ARRAYSIZE = int(os.environ.get("EXPORT_ARRAYSIZE", "1000"))
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def export_query(
+    connection: oracledb.AsyncConnection,
+    query: str,
+    params: Dict,
+    export_format: str,
+    filename: str,
+) -> StreamingResponse:
+    """Stream every row of `query` as NDJSON or CSV
+
+    Rows are fetched EXPORT_ARRAYSIZE at a time and each batch is encoded and sent
+    before the next one is fetched, so memory use does not grow with the result.
+    Fields are named after the (lower-cased) select list columns.
+
+    Args:
+        connection: Connection of a yield dependency (get_connection or get_connection_factory),
+                    so it is released after the response even if the stream never starts
+        export_format: "ndjson" or "csv"
+        filename: Download file name, without extension
+
+    Returns:
+        StreamingResponse that closes the cursor when done
+    """
+    cursor: oracledb.AsyncCursor = connection.cursor()
+    try:
+        cursor.arraysize = EXPORT_ARRAYSIZE
+        cursor.prefetchrows = EXPORT_ARRAYSIZE
+        await cursor.execute(query, params)
+    except oracledb.DatabaseError as e:
+        cursor.close()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except BaseException:
+        cursor.close()
+        raise
+
+    columns = [column[0].lower() for column in cursor.description]
+    encode = _encode_ndjson if export_format == "ndjson" else _encode_csv
+
+    async def chunks() -> AsyncIterator[str]:
+        try:
+            if export_format == "csv":
+                yield _encode_csv(columns, [columns])
+            while True:
+                rows = await cursor.fetchmany()
+                if not rows:
+                    break
+                yield encode(columns, [[await _export_value(value) for value in row] for row in rows])
+        finally:
+            cursor.close()
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+async def _export_value(value: Any) -> Any:
+    if isinstance(value, (oracledb.LOB, oracledb.AsyncLOB)):
+        return await read_clob(value)
+    if isinstance(value, oracledb.DbObject):
+        return varray_to_list(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+def _encode_ndjson(columns: List[str], rows: List[List[Any]]) -> str:
+    return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+def _encode_csv(columns: List[str], rows: List[List[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # Collections (e.g. drug allergies) are flattened into one ';'-separated cell
+        writer.writerow(";".join(map(str, value)) if isinstance(value, list) else value for value in row)
+    return buffer.getvalue()
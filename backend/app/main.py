@@ -1,28 +1,56 @@
+import logging
+import time
+
 import oracledb
-import os
-import dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 
-from app.routers import donor_router, tissue_router, drug_router, operations_router
-
-dotenv.load_dotenv()
+from app import metrics, queries
+from app.database import create_pool, close_pool, get_connection, executor
+from app.db_utils import warm_entity_caches
+from app.notifications import start_change_notifications
+from app.responses import FastJSONResponse
+from app.search import warm_drug_search
+from app.density import warm_density_index
+from app.routers import (
+    donor_router,
+    tissue_router,
+    drug_router,
+    cure_router,
+    disease_router,
+    condition_router,
+    future_work_router,
+    researcher_router,
+    publication_router,
+    operations_router,
+    admin_router,
+)
 
 
-DATABASE_USER = os.environ.get("DATABASE_USER")
-DATABASE_PASSWORD = os.environ.get("DATABASE_PASSWORD")
-DATABSE_DSN = os.environ.get("DATABSE_DSN")
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.connection = oracledb.connect(user=DATABASE_USER, password=DATABASE_PASSWORD, dsn=DATABSE_DSN)
+    app.state.pool = create_pool()
+    try:
+        async with app.state.pool.acquire() as connection:
+            await warm_entity_caches(connection)
+            await warm_drug_search(connection)
+            await warm_density_index(connection)
+    except oracledb.Error as e:
+        # The caches (and the search and density indexes) then fill on first use instead
+        logger.warning("Entity cache warm-up skipped: %s", e)
+    notifications = await start_change_notifications()
     yield
-    app.state.connection.close()
+    if notifications:
+        await notifications.stop()
+    await close_pool(app.state.pool)
 
 
-app = FastAPI(title="WHO Backend", version="1.0.0", lifespan=lifespan)
+app = FastAPI(title="WHO Backend", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -33,17 +61,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Streamed responses (exports) are timed until their headers are sent
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=metrics.route_label(request),
+            status=status,
+        )
+
 # Include routers
 app.include_router(donor_router)
 app.include_router(tissue_router)
 app.include_router(drug_router)
+app.include_router(cure_router)
+app.include_router(disease_router)
+app.include_router(condition_router)
+app.include_router(future_work_router)
+app.include_router(researcher_router)
+app.include_router(publication_router)
 app.include_router(operations_router)
+app.include_router(admin_router)
 
 
 @app.get('/')
-async def health():
+async def health(connection: oracledb.AsyncConnection = Depends(get_connection)):
     from datetime import timezone
-    cursor: oracledb.Cursor = app.state.connection.cursor()
-    cursor.execute("SELECT sysdate FROM dual")
-    ts, = cursor.fetchone()
+    cursor: oracledb.AsyncCursor = connection.cursor()
+    await cursor.execute(queries.HEALTH)
+    ts, = await cursor.fetchone()
     return {"status": f"alive UTC {ts.astimezone(timezone.utc)}"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus metrics of this worker"""
+    pool = request.app.state.pool
+    metrics.POOL_CONNECTIONS.set(pool.busy, state="busy")
+    metrics.POOL_CONNECTIONS.set(pool.opened, state="opened")
+    metrics.POOL_CONNECTIONS.set(pool.max, state="max")
+    metrics.EXECUTOR_PENDING.set(executor.pending)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,309 @@
+"""Prometheus metrics of the HTTP and data layers, served at /metrics
+
+Metrics are kept per worker process in a minimal registry rendered in the
+Prometheus text format. Database calls are timed by wrapping every connection
+handed out by database.acquire_connection, so routers need no changes: statements
+are labelled with their name in queries.STATEMENTS ("assembled" for list pages
+and partial updates, whose route tells them apart).
+"""
+import bisect
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+
+from app import queries, slow_queries
+
+# Sample SQL*Net round-trips from V$MYSTAT when a connection is released (one extra
+# round-trip per request; needs SELECT access on V$MYSTAT and V$STATNAME)
+METRICS_ROUND_TRIPS = os.environ.get("METRICS_ROUND_TRIPS", "0") == "1"
+
+# Request and query latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """A metric family: one value (or histogram) per combination of label values"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(key)} {_number(value)}" for key, value in sorted(self._values.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}", *self.samples()]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        counts = self._values.get(key)
+        if counts is None:
+            # One count per bucket (non-cumulative) plus the +Inf bucket, then the sum
+            counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, counts in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*map(_number, self.buckets), "+Inf"), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing a statement and fetching its rows, per statement name",
+    ("query", "phase"),
+)
+ROWS_FETCHED = Counter("db_rows_fetched_total", "Rows fetched per statement name", ("query",))
+LOB_READS = Counter("db_lob_reads_total", "LOB locators read (one round-trip each)")
+ROUND_TRIPS = Counter(
+    "db_round_trips_total", "SQL*Net round-trips per route, sampled from V$MYSTAT (METRICS_ROUND_TRIPS=1)", ("route",)
+)
+POOL_ACQUIRE_DURATION = Histogram("db_pool_acquire_duration_seconds", "Time waited for a pooled connection")
+POOL_CONNECTIONS = Gauge("db_pool_connections", "Pool sessions: busy, opened and max", ("state",))
+EXECUTOR_PENDING = Gauge("db_executor_pending", "Blocking driver calls queued or running (threaded mode)")
+OPERATION_DURATION = Histogram(
+    "operation_compute_duration_seconds",
+    "Time to compute an operation on a result cache miss (queries plus Python grouping)",
+    ("operation",),
+)
+RESULT_CACHE_REQUESTS = Counter("result_cache_requests_total", "Operation result cache lookups", ("operation", "result"))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return "".join(metric.render() for metric in REGISTRY)
+
+
+def route_label(request: Request) -> str:
+    """Route template of a request (e.g. /api/donors/{donor_id}), to keep label cardinality bounded"""
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ========================
+# Connection instrumentation
+# ========================
+
+_STATEMENT_NAMES = {text: name for name, text in queries.STATEMENTS.items()}
+
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute and fetch calls per statement name
+
+    Fetch time and rows are accumulated over all fetch calls of an execution and
+    recorded when the next statement is executed or the cursor is closed; slow
+    executions are then queued on the connection for the slow-query log.
+    """
+
+    def __init__(self, cursor: Any, connection: "InstrumentedConnection"):
+        self._cursor = cursor
+        self._connection = connection
+        self._query: Optional[str] = None
+        self._statement: Optional[str] = None
+        self._parameters: Any = None
+        self._execute_time = 0.0
+        self._fetch_time = 0.0
+        self._rows = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    async def execute(self, statement: str, parameters: Any = None, **kwargs) -> None:
+        await self._timed_execute(self._cursor.execute, statement, parameters, **kwargs)
+
+    async def executemany(self, statement: str, parameters: Any, **kwargs) -> None:
+        await self._timed_execute(self._cursor.executemany, statement, parameters, **kwargs)
+
+    async def _timed_execute(self, execute, statement: str, parameters: Any, **kwargs) -> None:
+        self.flush()
+        # Plans of slow statements must be read before the session runs another one
+        await self._connection.capture_slow_queries()
+        self._query = _STATEMENT_NAMES.get(statement, "assembled")
+        self._statement = statement
+        self._parameters = parameters
+        started = time.perf_counter()
+        try:
+            await execute(statement, parameters, **kwargs)
+        finally:
+            self._execute_time = time.perf_counter() - started
+            QUERY_DURATION.observe(self._execute_time, query=self._query, phase="execute")
+
+    async def fetchone(self) -> Optional[tuple]:
+        row = await self._timed_fetch(self._cursor.fetchone())
+        self._rows += row is not None
+        return row
+
+    async def fetchmany(self, *args, **kwargs) -> list:
+        rows = await self._timed_fetch(self._cursor.fetchmany(*args, **kwargs))
+        self._rows += len(rows)
+        return rows
+
+    async def fetchall(self) -> list:
+        rows = await self._timed_fetch(self._cursor.fetchall())
+        self._rows += len(rows)
+        return rows
+
+    def __aiter__(self) -> "InstrumentedCursor":
+        return self
+
+    async def __anext__(self) -> tuple:
+        row = await self._timed_fetch(self._cursor.__anext__())
+        self._rows += 1
+        return row
+
+    async def _timed_fetch(self, fetch) -> Any:
+        started = time.perf_counter()
+        try:
+            return await fetch
+        finally:
+            self._fetch_time += time.perf_counter() - started
+
+    def flush(self) -> None:
+        """Record the fetch time and rows of the current execution"""
+        if self._query is not None:
+            QUERY_DURATION.observe(self._fetch_time, query=self._query, phase="fetch")
+            ROWS_FETCHED.inc(self._rows, query=self._query)
+            if slow_queries.is_slow(self._execute_time + self._fetch_time):
+                self._connection.slow_query(
+                    slow_queries.new_entry(
+                        self._query, self._statement, self._parameters, self._execute_time, self._fetch_time,
+                        self._rows, self._connection.route,
+                    )
+                )
+        self._query = self._statement = self._parameters = None
+        self._execute_time = self._fetch_time = 0.0
+        self._rows = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._cursor.close()
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are InstrumentedCursor"""
+
+    def __init__(self, connection: Any, route: str = "unmatched"):
+        self._connection = connection
+        self._route = route
+        self._cursors: List[InstrumentedCursor] = []
+        self._slow_queries: List[Dict[str, Any]] = []
+
+    @property
+    def route(self) -> str:
+        return self._route
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._connection, name, value)
+
+    def cursor(self) -> InstrumentedCursor:
+        cursor = InstrumentedCursor(self._connection.cursor(), self)
+        self._cursors.append(cursor)
+        return cursor
+
+    def flush(self) -> None:
+        """Record the pending fetch metrics of cursors that were never closed"""
+        for cursor in self._cursors:
+            cursor.flush()
+        self._cursors.clear()
+
+    def slow_query(self, entry: Dict[str, Any]) -> None:
+        self._slow_queries.append(entry)
+
+    async def capture_slow_queries(self) -> None:
+        """Read the plan of the last slow statement and log the queued ones"""
+        if self._slow_queries:
+            await slow_queries.capture(self._connection, self._slow_queries)
+
+
+# Last round-trip count seen per session (SID), to turn V$MYSTAT totals into deltas
+_session_round_trips: Dict[Any, int] = {}
+
+
+async def sample_round_trips(connection: Any, route: str) -> None:
+    """Add the round-trips made by a session since its previous sample to `route`
+
+    The count includes the sampling query itself. A session seen with a lower
+    total than before is a new session reusing the SID.
+    """
+    cursor = connection.cursor()
+    try:
+        await cursor.execute(queries.SESSION_ROUND_TRIPS)
+        sid, total = await cursor.fetchone()
+    finally:
+        cursor.close()
+    previous = _session_round_trips.get(sid, 0)
+    _session_round_trips[sid] = total
+    ROUND_TRIPS.inc(total - previous if total >= previous else total, route=route)
@@ -1,6 +1,12 @@
 from .donor import DonorCreate, DonorResponse, DonorUpdate
 from .tissue import TissueCreate, TissueResponse, TissueUpdate
 from .drug import DrugCreate, DrugResponse, DrugUpdate
+from .cure import CureCreate
+from .disease import DiseaseCreate
+from .condition import ConditionCreate
+from .future_work import FutureWorkCreate
+from .researcher import ResearcherCreate
+from .publication import PublicationCreate
 
 __all__ = [
     "DonorCreate",
@@ -12,4 +18,10 @@ __all__ = [
     "DrugCreate",
     "DrugResponse",
     "DrugUpdate",
+    "CureCreate",
+    "DiseaseCreate",
+    "ConditionCreate",
+    "FutureWorkCreate",
+    "ResearcherCreate",
+    "PublicationCreate",
 ]
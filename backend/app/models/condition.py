@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional
+
+
+class ConditionBase(BaseModel):
+    condition_status: str = Field(..., max_length=10, description="'control' or 'disease'")
+    condition_disease_id: Optional[int] = Field(None, description="ID of the disease (required for 'disease')")
+    donor_id: int = Field(..., description="ID of the donor")
+    tissue_id: int = Field(..., description="ID of the tissue")
+    treatment_id: Optional[int] = Field(None, description="ID of the cure used as treatment")
+    treatment_effect: Optional[str] = Field(None, max_length=50, description="'improved', 'worsened' or 'neutral'")
+
+    @field_validator("condition_status")
+    @classmethod
+    def validate_status(cls, v: str) -> str:
+        allowed_values = ["control", "disease"]
+        if v not in allowed_values:
+            raise ValueError(f"condition_status must be one of {allowed_values}")
+        return v
+
+    @field_validator("treatment_effect")
+    @classmethod
+    def validate_effect(cls, v: Optional[str]) -> Optional[str]:
+        allowed_values = ["improved", "worsened", "neutral"]
+        if v is not None and v not in allowed_values:
+            raise ValueError(f"treatment_effect must be one of {allowed_values}")
+        return v
+
+    @model_validator(mode="after")
+    def validate_disease(self) -> "ConditionBase":
+        # Mirrors the check_status_disease constraint of Conditions
+        if (self.condition_status == "disease") != (self.condition_disease_id is not None):
+            raise ValueError("condition_disease_id is required for 'disease' and not allowed for 'control'")
+        return self
+
+
+class ConditionCreate(ConditionBase):
+    """Schema for creating a new condition"""
+    pass
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class CureBase(BaseModel):
+    cure_description: str = Field(..., description="Description of the cure")
+    cure_drug_ids: List[int] = Field(default_factory=list, description="IDs of the drugs composing the cure")
+
+
+class CureCreate(CureBase):
+    """Schema for creating a new cure"""
+    pass
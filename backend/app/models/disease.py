@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import Optional
+
+
+class DiseaseBase(BaseModel):
+    disease_name: str = Field(..., max_length=200, description="Disease name (unique)")
+    disease_discovery: Optional[datetime] = Field(None, description="Date and time of discovery")
+    disease_description: str = Field(..., description="Detailed description of the disease")
+    disease_treatable: str = Field(..., max_length=1, description="Is the disease treatable (Y/N)")
+    disease_cure_id: Optional[int] = Field(None, description="ID of the cure of the disease")
+
+    @field_validator("disease_treatable")
+    @classmethod
+    def validate_treatable(cls, v: str) -> str:
+        if v not in ["Y", "N"]:
+            raise ValueError("disease_treatable must be 'Y' or 'N'")
+        return v
+
+
+class DiseaseCreate(DiseaseBase):
+    """Schema for creating a new disease"""
+    pass
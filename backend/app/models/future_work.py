@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class FutureWorkBase(BaseModel):
+    future_work_description: str = Field(..., description="Description of the proposed work")
+    suggested_by_condition_ids: List[int] = Field(
+        default_factory=list, description="IDs of the conditions suggesting the work"
+    )
+
+
+class FutureWorkCreate(FutureWorkBase):
+    """Schema for creating a new future work"""
+    pass
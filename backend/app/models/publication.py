@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List
+
+
+class PublicationBase(BaseModel):
+    publication_doi: str = Field(..., max_length=100, description="DOI, the publication identifier")
+    publication_title: str = Field(..., max_length=400, description="Publication title")
+    publication_journal: str = Field(..., max_length=200, description="Journal name")
+    publication_year: int = Field(..., ge=0, le=9999, description="Year of publication")
+    publication_journal_quality: str = Field(..., max_length=10, description="'top', 'middle' or 'low'")
+    author_ids: List[int] = Field(default_factory=list, description="IDs of the authoring researchers")
+    proposed_work_ids: List[int] = Field(default_factory=list, description="IDs of the proposed future works")
+
+    @field_validator("publication_journal_quality")
+    @classmethod
+    def validate_quality(cls, v: str) -> str:
+        allowed_values = ["top", "middle", "low"]
+        if v not in allowed_values:
+            raise ValueError(f"publication_journal_quality must be one of {allowed_values}")
+        return v
+
+
+class PublicationCreate(PublicationBase):
+    """Schema for creating a new publication"""
+    pass
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class ResearcherBase(BaseModel):
+    researcher_name: str = Field(..., max_length=100, description="Researcher's first name")
+    researcher_surname: str = Field(..., max_length=100, description="Researcher's surname")
+    researcher_email: str = Field(..., max_length=320, description="Researcher's email address")
+    researcher_institution: str = Field(..., max_length=200, description="Researcher's institution")
+    recommended_work_ids: List[int] = Field(
+        default_factory=list, description="IDs of the future works recommended by the researcher"
+    )
+
+
+class ResearcherCreate(ResearcherBase):
+    """Schema for creating a new researcher"""
+    pass
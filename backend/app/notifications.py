@@ -0,0 +1,89 @@
+"""Continuous Query Notification (CQN) listener that invalidates the in-process caches
+
+Lets the database push changes made outside this API (scripts, other services) to
+the operation result cache and the tissue/drug caches. Requires the thick client
+(DATABASE_DRIVER_MODE=threaded with Instant Client), the CHANGE NOTIFICATION
+privilege and a database that can reach this process.
+"""
+import asyncio
+import os
+from typing import Optional
+
+import oracledb
+
+from app.cache import result_cache
+from app.db_utils import invalidate_entity_caches
+from app.search import drug_search
+from app.density import tissue_density_index
+from app.database import DATABASE_USER, DATABASE_PASSWORD, DATABSE_DSN, executor
+
+RESULT_CACHE_CQN = os.environ.get("RESULT_CACHE_CQN", "0") == "1"
+
+# Tables whose changes invalidate cached operation results
+CQN_TABLES = (
+    "Donors",
+    "Tissues",
+    "Drugs",
+    "Cures",
+    "Diseases",
+    "Conditions",
+    "FutureWorks",
+    "Researchers",
+    "Publications",
+    "ResearcherSuggestions",
+)
+
+
+class ChangeNotifications:
+    """Object-level CQN subscription on the tables read by cached operations"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._connection: Optional[oracledb.Connection] = None
+        self._subscription = None
+
+    def _start(self) -> None:
+        self._connection = oracledb.connect(
+            user=DATABASE_USER,
+            password=DATABASE_PASSWORD,
+            dsn=DATABSE_DSN,
+            events=True,
+        )
+        self._subscription = self._connection.subscribe(
+            callback=self._on_change,
+            operations=oracledb.OPCODE_ALLOPS,
+            qos=oracledb.SUBSCR_QOS_RELIABLE,
+        )
+        for table in CQN_TABLES:
+            # Object-level registration: the predicate does not limit what is watched
+            self._subscription.registerquery(f"SELECT ROWID FROM {table} WHERE ROWNUM < 1")
+
+    def _on_change(self, message: oracledb.Message) -> None:
+        # Called on a driver thread; hand the invalidation over to the event loop.
+        # Messages without tables (startup, shutdown, deregistration) drop everything.
+        tables = [table.name.split(".")[-1] for table in message.tables or []]
+        asyncio.run_coroutine_threadsafe(result_cache.invalidate(*tables), self._loop)
+        self._loop.call_soon_threadsafe(invalidate_entity_caches, *tables)
+        if not tables or "DRUGS" in (table.upper() for table in tables):
+            self._loop.call_soon_threadsafe(drug_search.invalidate)
+        if not tables or "TISSUES" in (table.upper() for table in tables):
+            self._loop.call_soon_threadsafe(tissue_density_index.invalidate)
+
+    def _stop(self) -> None:
+        self._connection.unsubscribe(self._subscription)
+        self._connection.close()
+
+    async def start(self) -> None:
+        await executor.run_unbounded(self._start)
+
+    async def stop(self) -> None:
+        await executor.run_unbounded(self._stop)
+
+
+async def start_change_notifications() -> Optional[ChangeNotifications]:
+    """Subscribe to table changes when RESULT_CACHE_CQN=1, otherwise do nothing"""
+    if not RESULT_CACHE_CQN:
+        return None
+    notifications = ChangeNotifications(asyncio.get_running_loop())
+    await notifications.start()
+    return notifications
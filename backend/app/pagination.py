@@ -0,0 +1,150 @@
+"""Offset and keyset (seek) pagination helpers for the list endpoints"""
+import base64
+import bisect
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import oracledb
+from fastapi import HTTPException
+
+from app import queries
+from app.cache import TTLCache, result_cache
+
+# How long an exact COUNT(*) result is reused for the same filters (seconds)
+COUNT_CACHE_TTL = float(os.environ.get("COUNT_CACHE_TTL", "30"))
+
+# Percentage of blocks read by the sampled estimate of a filtered count
+COUNT_SAMPLE_PERCENT = 10
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last seen primary key as an opaque page token"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> int:
+    """Decode a page token produced by encode_cursor"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+        return last_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def build_page_clause(
+    where_clauses: List[str],
+    params: Dict,
+    id_column: str,
+    limit: int,
+    offset: int,
+    after: Optional[str],
+) -> Tuple[str, Dict]:
+    """Build the WHERE / ORDER BY / row-limiting tail of a list query
+
+    With an `after` token the page seeks past the last seen ID through the primary
+    key index (keyset mode) and the statement text is the same for every page.
+    Otherwise the legacy OFFSET/FETCH mode is used. Values are always bound, so
+    each mode has one statement text per filter combination.
+
+    Returns:
+        Tuple of (SQL tail, bind parameters)
+    """
+    clauses = list(where_clauses)
+    page_params = dict(params)
+    page_params["page_limit"] = limit
+
+    if after is not None:
+        clauses.append(f"{id_column} > :after_id")
+        page_params["after_id"] = decode_cursor(after)
+        limit_clause = "FETCH FIRST :page_limit ROWS ONLY"
+    else:
+        page_params["page_offset"] = offset
+        limit_clause = "OFFSET :page_offset ROWS FETCH NEXT :page_limit ROWS ONLY"
+
+    where_clause = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"{where_clause} ORDER BY {id_column} {limit_clause}", page_params
+
+
+def next_cursor(rows: List[Dict], id_field: str, limit: int) -> Optional[str]:
+    """Token for the page following `rows`, or None when this was the last page"""
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1][id_field])
+
+
+def page_of_ids(ids: List[int], limit: int, offset: int, after: Optional[str]) -> Tuple[List[int], Optional[str]]:
+    """Cut a page out of IDs matched in process (sorted), as build_page_clause would
+
+    Returns:
+        Tuple of (IDs of the page, token of the next page or None on the last one)
+    """
+    start = bisect.bisect_right(ids, decode_cursor(after)) if after is not None else offset
+    page = ids[start:start + limit]
+    return page, encode_cursor(page[-1]) if start + limit < len(ids) else None
+
+
+def new_count_cache() -> TTLCache:
+    """Cache of exact totals keyed by filter signature, one per router"""
+    return TTLCache(maxsize=256, ttl=COUNT_CACHE_TTL)
+
+
+async def count_total(
+    cursor: oracledb.AsyncCursor,
+    table: str,
+    alias: str,
+    where_clauses: List[str],
+    params: Dict,
+    mode: str,
+    cache: TTLCache,
+    tables: Iterable[str] = (),
+) -> Optional[int]:
+    """Total number of rows matching the list filters
+
+    Args:
+        mode: "exact" runs COUNT(*) (cached per filter signature for COUNT_CACHE_TTL),
+              "estimate" reads optimizer statistics (or a sampled count when filters
+              are applied), "none" skips counting and returns None
+        tables: Other tables the filters read; the exact count is then kept in the
+                result cache instead, tagged with them, so their writes invalidate it
+    """
+    if mode == "none":
+        return None
+
+    where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+
+    if mode == "estimate":
+        if not where_clauses:
+            await cursor.execute(queries.TABLE_NUM_ROWS, {"table_name": table.upper()})
+            row = await cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0]
+
+        await cursor.execute(
+            queries.COUNT_SAMPLED.format(table=table, alias=alias, where=where_clause, percent=COUNT_SAMPLE_PERCENT),
+            params,
+        )
+        return (await cursor.fetchone())[0]
+
+    key = (where_clause, tuple(sorted(params.items())))
+    if tables:
+        key = ("count", table, *key)
+        total = await result_cache.get(key)
+        if total is None:
+            started_at = time.time()
+            await cursor.execute(queries.COUNT_EXACT.format(table=table, alias=alias, where=where_clause), params)
+            total = (await cursor.fetchone())[0]
+            await result_cache.set(key, total, (table, *tables), started_at)
+        return total
+
+    total = cache.get(key)
+    if total is None:
+        await cursor.execute(queries.COUNT_EXACT.format(table=table, alias=alias, where=where_clause), params)
+        total = (await cursor.fetchone())[0]
+        cache.set(key, total)
+    return total
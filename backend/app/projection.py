@@ -0,0 +1,80 @@
+"""`fields=` projection and `ids=` multi-get parameters of the list endpoints"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+
+def select_fields(fields: Optional[str], columns: Dict[str, str], id_field: str) -> List[str]:
+    """Resolve a comma-separated `fields` parameter to the response fields to select
+
+    The ID field is always included (it is needed for the page token).
+
+    Args:
+        fields: Requested field names, or None for every field
+        columns: Mapping of response field name to the selected SQL expression
+        id_field: Name of the primary key field
+
+    Returns:
+        Selected field names, in the order of `columns`
+    """
+    if fields is None:
+        return list(columns)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - columns.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in columns if field == id_field or field in requested]
+
+
+def select_list(selected: List[str], columns: Dict[str, str]) -> str:
+    """SQL select list of the selected fields"""
+    return ",\n                   ".join(columns[field] for field in selected)
+
+
+def row_factory(selected: List[str], converters: Optional[Dict[str, Callable]] = None) -> Callable[..., Dict]:
+    """cursor.rowfactory turning each fetched row into its response dict
+
+    Args:
+        selected: Response field of each selected column, in order
+        converters: Optional conversion of some fields (e.g. collections to lists)
+    """
+    converters = {field: convert for field, convert in (converters or {}).items() if field in selected}
+    if not converters:
+        return lambda *row: dict(zip(selected, row))
+
+    def make_row(*row: Any) -> Dict:
+        record = dict(zip(selected, row))
+        for field, convert in converters.items():
+            record[field] = convert(record[field])
+        return record
+
+    return make_row
+
+
+# Most IDs fetched by one multi-get request
+MAX_IDS = 1000
+
+
+def select_ids(ids: Iterable[int]) -> List[int]:
+    """De-duplicate requested IDs (keeping their order) and enforce MAX_IDS"""
+    selected = list(dict.fromkeys(ids))
+    if len(selected) > MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_IDS} IDs can be fetched at once")
+    return selected
+
+
+def parse_ids(ids: str) -> List[int]:
+    """Resolve a comma-separated `ids` parameter"""
+    try:
+        return select_ids(int(value) for value in ids.split(",") if value.strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+
+
+def lookup_result(records: Dict[int, Dict], ids: List[int], key: str) -> Dict:
+    """Multi-get response: the records found, in request order, and the IDs that were not"""
+    return {
+        key: [records[record_id] for record_id in ids if record_id in records],
+        "missing": [record_id for record_id in ids if record_id not in records],
+    }
@@ -0,0 +1,729 @@
+"""Registry of the SQL statements executed by the backend
+
+Every statement is defined once here and takes its values as bind variables only,
+so each one has a single text that the per-connection statement cache and the
+shared pool can reuse (soft parse) instead of parsing a new text per request.
+Statements whose shape depends on the request (list filters and projections,
+partial updates) are assembled from the fixed fragments below; their number of
+variants is bounded and accounted for in STATEMENT_CACHE_SIZE.
+"""
+import os
+from typing import Dict
+
+HEALTH = "SELECT sysdate FROM dual"
+
+# ========================
+# Sequences
+# ========================
+
+SEQUENCES = (
+    "donor_seq",
+    "tissue_seq",
+    "drug_seq",
+    "cure_seq",
+    "disease_seq",
+    "condition_seq",
+    "future_work_seq",
+    "researcher_seq",
+)
+
+NEXTVAL = {sequence: f"SELECT {sequence}.NEXTVAL FROM DUAL" for sequence in SEQUENCES}
+
+# Allocates :batch_size IDs in one round-trip (bulk ingest)
+NEXTVAL_BATCH = {
+    sequence: f"SELECT {sequence}.NEXTVAL FROM DUAL CONNECT BY LEVEL <= :batch_size" for sequence in SEQUENCES
+}
+
+# ========================
+# REF lookups
+# ========================
+
+# Object table -> (ID attribute, collection type used to bind many IDs at once)
+REF_TABLES = {
+    "Donors": ("donor_id", "SYS.ODCINUMBERLIST"),
+    "Tissues": ("tissue_id", "SYS.ODCINUMBERLIST"),
+    "Drugs": ("drug_id", "SYS.ODCINUMBERLIST"),
+    "Cures": ("cure_id", "SYS.ODCINUMBERLIST"),
+    "Diseases": ("disease_id", "SYS.ODCINUMBERLIST"),
+    "Conditions": ("condition_id", "SYS.ODCINUMBERLIST"),
+    "FutureWorks": ("future_work_id", "SYS.ODCINUMBERLIST"),
+    "Researchers": ("researcher_id", "SYS.ODCINUMBERLIST"),
+    "Publications": ("publication_doi", "SYS.ODCIVARCHAR2LIST"),
+}
+
+# REFs of many rows of one table (see refs.RefResolver); the driver cannot fetch REF
+# values, so their REFTOHEX identity is returned instead
+REFS_BY_IDS = {
+    table: f"""
+    SELECT o.{id_field}, REFTOHEX(REF(o))
+    FROM {table} o
+    WHERE o.{id_field} IN (SELECT /*+ CARDINALITY(i 100) */ i.COLUMN_VALUE FROM TABLE(:ids) i)
+"""
+    for table, (id_field, _) in REF_TABLES.items()
+}
+
+# ========================
+# Donors
+# ========================
+
+# Fields selectable in the list through `fields=` (the ID is always returned)
+DONOR_FIELDS = {
+    "donor_id": "d.donor_id",
+    "donor_name": "d.donor_name",
+    "donor_surname": "d.donor_surname",
+    "donor_date_of_birth": "d.donor_date_of_birth",
+    "donor_sex": "d.donor_sex",
+}
+
+# List filter predicates, by query parameter
+DONOR_FILTERS = {
+    "sex": "d.donor_sex = :sex",
+}
+
+# Partial update assignments, by updated field
+DONOR_UPDATE_SET = {
+    "donor_name": "d.donor_name = :donor_name",
+    "donor_surname": "d.donor_surname = :donor_surname",
+    "donor_date_of_birth": "d.donor_date_of_birth = :donor_date_of_birth",
+    "donor_sex": "d.donor_sex = :donor_sex",
+}
+
+DONOR_BY_ID = """
+    SELECT d.donor_id,
+           d.donor_name,
+           d.donor_surname,
+           d.donor_date_of_birth,
+           d.donor_sex
+    FROM Donors d
+    WHERE d.donor_id = :donor_id
+"""
+
+# Multi-get: :ids is a SYS.ODCINUMBERLIST; the hint replaces the default collection
+# cardinality estimate (thousands of rows) so the primary key index is used
+DONORS_BY_IDS = """
+    SELECT d.donor_id,
+           d.donor_name,
+           d.donor_surname,
+           d.donor_date_of_birth,
+           d.donor_sex
+    FROM Donors d
+    WHERE d.donor_id IN (SELECT /*+ CARDINALITY(i 100) */ i.COLUMN_VALUE FROM TABLE(:ids) i)
+"""
+
+DONOR_INSERT = """
+    INSERT INTO Donors VALUES (
+        DonorType(
+            donor_seq.NEXTVAL,
+            :donor_name,
+            :donor_surname,
+            :donor_date_of_birth,
+            :donor_sex
+        )
+    )
+    RETURNING donor_id INTO :donor_id
+"""
+
+DONOR_BULK_INSERT = """
+    INSERT INTO Donors VALUES (
+        DonorType(
+            :donor_id,
+            :donor_name,
+            :donor_surname,
+            :donor_date_of_birth,
+            :donor_sex
+        )
+    )
+"""
+
+DONOR_DELETE = "DELETE FROM Donors d WHERE d.donor_id = :donor_id"
+
+# Donor graph: the donor and every condition with its tissue, disease and cures, the
+# REF columns joined in one statement (the first hop through idx_conditions_donor).
+# Outer joins keep a donor without conditions; no row means no such donor.
+DONOR_GRAPH = """
+    SELECT d.donor_id,
+           d.donor_name,
+           d.donor_surname,
+           d.donor_date_of_birth,
+           d.donor_sex,
+           c.condition_id,
+           c.condition_status,
+           c.treatment_effect,
+           t.tissue_id,
+           t.tissue_name,
+           t.tissue_density,
+           t.tissue_is_vital,
+           di.disease_id,
+           di.disease_name,
+           di.disease_discovery,
+           di.disease_treatable,
+           dc.cure_id AS disease_cure_id,
+           tc.cure_id AS treatment_id
+    FROM   Donors d
+           LEFT JOIN Conditions c ON c.donor_ref = REF(d)
+           LEFT JOIN Tissues t ON c.tissue_ref = REF(t)
+           LEFT JOIN Diseases di ON c.condition_disease = REF(di)
+           LEFT JOIN Cures dc ON di.disease_cure_ref = REF(dc)
+           LEFT JOIN Cures tc ON c.treatment_ref = REF(tc)
+    WHERE  d.donor_id = :donor_id
+    ORDER BY c.condition_id
+"""
+
+# Drugs of every cure of a donor graph at once; :cure_ids is a SYS.ODCINUMBERLIST
+DONOR_GRAPH_DRUGS = """
+    SELECT cu.cure_id,
+           dr.drug_id,
+           dr.drug_name,
+           dr.drug_allergies
+    FROM   Cures cu,
+           TABLE(cu.cure_composition) x,
+           Drugs dr
+    WHERE  cu.cure_id IN (SELECT /*+ CARDINALITY(i 10) */ i.COLUMN_VALUE FROM TABLE(:cure_ids) i)
+      AND  VALUE(x) = REF(dr)
+    ORDER BY cu.cure_id, dr.drug_id
+"""
+
+# ========================
+# Tissues
+# ========================
+
+TISSUE_FIELDS = {
+    "tissue_id": "t.tissue_id",
+    "tissue_name": "t.tissue_name",
+    "tissue_description": "t.tissue_description",
+    "tissue_density": "t.tissue_density",
+    "tissue_is_vital": "t.tissue_is_vital",
+}
+
+TISSUE_FILTERS = {
+    "is_vital": "t.tissue_is_vital = :is_vital",
+    "max_density": "t.tissue_density < :max_density",
+}
+
+TISSUE_UPDATE_SET = {
+    "tissue_name": "t.tissue_name = :tissue_name",
+    "tissue_description": "t.tissue_description = :tissue_description",
+    "tissue_density": "t.tissue_density = :tissue_density",
+    "tissue_is_vital": "t.tissue_is_vital = :tissue_is_vital",
+}
+
+TISSUE_BY_ID = """
+    SELECT t.tissue_id,
+           t.tissue_name,
+           t.tissue_description,
+           t.tissue_density,
+           t.tissue_is_vital
+    FROM Tissues t
+    WHERE t.tissue_id = :tissue_id
+"""
+
+# Entity cache warm-up (see db_utils.warm_entity_caches)
+TISSUES_ALL = """
+    SELECT t.tissue_id,
+           t.tissue_name,
+           t.tissue_description,
+           t.tissue_density,
+           t.tissue_is_vital
+    FROM Tissues t
+"""
+
+TISSUES_BY_IDS = """
+    SELECT t.tissue_id,
+           t.tissue_name,
+           t.tissue_description,
+           t.tissue_density,
+           t.tissue_is_vital
+    FROM Tissues t
+    WHERE t.tissue_id IN (SELECT /*+ CARDINALITY(i 100) */ i.COLUMN_VALUE FROM TABLE(:ids) i)
+"""
+
+TISSUE_INSERT = """
+    INSERT INTO Tissues VALUES (
+        TissueType(
+            tissue_seq.NEXTVAL,
+            :tissue_name,
+            :tissue_description,
+            :tissue_density,
+            :tissue_is_vital
+        )
+    )
+    RETURNING tissue_id INTO :tissue_id
+"""
+
+TISSUE_BULK_INSERT = """
+    INSERT INTO Tissues VALUES (
+        TissueType(
+            :tissue_id,
+            :tissue_name,
+            :tissue_description,
+            :tissue_density,
+            :tissue_is_vital
+        )
+    )
+"""
+
+TISSUE_DELETE = "DELETE FROM Tissues t WHERE t.tissue_id = :tissue_id"
+
+# ========================
+# Drugs
+# ========================
+
+DRUG_FIELDS = {
+    "drug_id": "d.drug_id",
+    "drug_name": "d.drug_name",
+    "drug_description": "d.drug_description",
+    "drug_allergies": "d.drug_allergies",
+}
+
+# `search` matches words of the name through its Oracle Text index (:search is built by
+# app.search.text_query); without Oracle Text the names are matched in process and the
+# IDs of one page (or of an export) are bound as a SYS.ODCINUMBERLIST (`search_ids`)
+DRUG_FILTERS = {
+    "search": "CONTAINS(d.drug_name, :search) > 0",
+    "search_ids": "d.drug_id IN (SELECT /*+ CARDINALITY(i 100) */ i.COLUMN_VALUE FROM TABLE(:search_ids) i)",
+    # Through the DrugAllergies lookup table; :allergy is lower-cased and trimmed
+    "allergy": "d.drug_id IN (SELECT a.drug_id FROM DrugAllergies a WHERE a.allergy = :allergy)",
+}
+
+DRUG_UPDATE_SET = {
+    "drug_name": "d.drug_name = :drug_name",
+    "drug_description": "d.drug_description = :drug_description",
+    "drug_allergies": "d.drug_allergies = :drug_allergies",
+}
+
+DRUG_BY_ID = """
+    SELECT d.drug_id,
+           d.drug_name,
+           d.drug_description,
+           d.drug_allergies
+    FROM Drugs d
+    WHERE d.drug_id = :drug_id
+"""
+
+DRUGS_ALL = """
+    SELECT d.drug_id,
+           d.drug_name,
+           d.drug_description,
+           d.drug_allergies
+    FROM Drugs d
+"""
+
+DRUGS_BY_IDS = """
+    SELECT d.drug_id,
+           d.drug_name,
+           d.drug_description,
+           d.drug_allergies
+    FROM Drugs d
+    WHERE d.drug_id IN (SELECT /*+ CARDINALITY(i 100) */ i.COLUMN_VALUE FROM TABLE(:ids) i)
+"""
+
+# The allergies are bound as an AllergyListType object so the text never changes
+DRUG_INSERT = """
+    INSERT INTO Drugs VALUES (
+        DrugType(
+            drug_seq.NEXTVAL,
+            :drug_name,
+            :drug_description,
+            :drug_allergies
+        )
+    )
+    RETURNING drug_id INTO :drug_id
+"""
+
+DRUG_BULK_INSERT = """
+    INSERT INTO Drugs VALUES (
+        DrugType(
+            :drug_id,
+            :drug_name,
+            :drug_description,
+            :drug_allergies
+        )
+    )
+"""
+
+DRUG_DELETE = "DELETE FROM Drugs d WHERE d.drug_id = :drug_id"
+
+# Ranked search over names and descriptions (Oracle Text); a name match weighs twice
+# a description match, scores range from 0 to 100 as SCORE() does
+DRUG_TEXT_SEARCH = """
+    SELECT d.drug_id,
+           d.drug_name,
+           ROUND((SCORE(1) * 2 + SCORE(2)) / 3) AS search_score
+    FROM Drugs d
+    WHERE CONTAINS(d.drug_name, :query, 1) > 0
+       OR CONTAINS(d.drug_description, :query, 2) > 0
+    ORDER BY search_score DESC, d.drug_id
+    FETCH FIRST :search_limit ROWS ONLY
+"""
+
+# Name-prefix suggestions through the UPPER(drug_name) index; :prefix is upper-cased,
+# with LIKE wildcards escaped, and ends with '%'
+DRUG_TYPEAHEAD = """
+    SELECT d.drug_id,
+           d.drug_name
+    FROM Drugs d
+    WHERE UPPER(d.drug_name) LIKE :prefix ESCAPE '\\'
+    ORDER BY UPPER(d.drug_name), d.drug_id
+    FETCH FIRST :search_limit ROWS ONLY
+"""
+
+# Number of usable drug Oracle Text indexes (both are needed for the text search mode)
+DRUG_TEXT_INDEXES = """
+    SELECT COUNT(*)
+    FROM user_indexes
+    WHERE index_name IN ('IDX_DRUGS_NAME_TEXT', 'IDX_DRUGS_DESCRIPTION_TEXT')
+      AND ityp_owner = 'CTXSYS'
+      AND domidx_opstatus = 'VALID'
+"""
+
+# What the in-process search index keeps of every drug
+DRUG_SEARCH_ALL = """
+    SELECT d.drug_id,
+           d.drug_name,
+           d.drug_description
+    FROM Drugs d
+"""
+
+# Drugs listing an allergy, to screen the names matched in process
+DRUG_IDS_BY_ALLERGY = "SELECT a.drug_id FROM DrugAllergies a WHERE a.allergy = :allergy"
+
+# ========================
+# Cures
+# ========================
+
+CURE_FIELDS = {
+    "cure_id": "cu.cure_id",
+    "cure_description": "cu.cure_description",
+    "cure_drug_ids": "CAST(MULTISET(SELECT DEREF(VALUE(c)).drug_id FROM TABLE(cu.cure_composition) c) AS SYS.ODCINUMBERLIST)",
+}
+
+# Cures containing a drug with the allergy are found from the DrugAllergies lookup
+# through the index on the composition's REFs, then anti-joined
+CURE_FILTERS = {
+    "excluding_allergy": """cu.cure_id NOT IN (
+        SELECT x.cure_id
+        FROM Cures x, TABLE(x.cure_composition) c
+        WHERE VALUE(c) IN (
+            SELECT REF(d)
+            FROM Drugs d
+            WHERE d.drug_id IN (SELECT a.drug_id FROM DrugAllergies a WHERE a.allergy = :excluding_allergy)
+        )
+    )""",
+}
+
+# ========================
+# Ingest (REF-heavy tables)
+# ========================
+
+# REFs are rebuilt from the bound IDs inside each INSERT: one scalar subquery per REF
+# column and one CAST(MULTISET(...)) per nested table, the IDs of a collection being
+# bound as a single SYS.ODCINUMBERLIST. An unknown ID yields a NULL REF or a missing
+# element, so the ingest endpoints check every referenced ID beforehand (refs.RefResolver).
+
+CURE_BULK_INSERT = """
+    INSERT INTO Cures VALUES (
+        CureType(
+            :cure_id,
+            :cure_description,
+            CAST(MULTISET(
+                SELECT REF(d) FROM Drugs d
+                WHERE d.drug_id IN (SELECT i.COLUMN_VALUE FROM TABLE(:drug_ids) i)
+            ) AS DrugListType)
+        )
+    )
+"""
+
+DISEASE_BULK_INSERT = """
+    INSERT INTO Diseases VALUES (
+        DiseaseType(
+            :disease_id,
+            :disease_name,
+            :disease_discovery,
+            :disease_description,
+            :disease_treatable,
+            (SELECT REF(cu) FROM Cures cu WHERE cu.cure_id = :cure_id)
+        )
+    )
+"""
+
+CONDITION_BULK_INSERT = """
+    INSERT INTO Conditions VALUES (
+        ConditionType(
+            :condition_id,
+            :condition_status,
+            (SELECT REF(di) FROM Diseases di WHERE di.disease_id = :disease_id),
+            (SELECT REF(d) FROM Donors d WHERE d.donor_id = :donor_id),
+            (SELECT REF(t) FROM Tissues t WHERE t.tissue_id = :tissue_id),
+            (SELECT REF(cu) FROM Cures cu WHERE cu.cure_id = :treatment_id),
+            :treatment_effect
+        )
+    )
+"""
+
+FUTURE_WORK_BULK_INSERT = """
+    INSERT INTO FutureWorks VALUES (
+        FutureWorkType(
+            :future_work_id,
+            :future_work_description,
+            CAST(MULTISET(
+                SELECT REF(c) FROM Conditions c
+                WHERE c.condition_id IN (SELECT i.COLUMN_VALUE FROM TABLE(:condition_ids) i)
+            ) AS ConditionListType)
+        )
+    )
+"""
+
+RESEARCHER_BULK_INSERT = """
+    INSERT INTO Researchers VALUES (
+        ResearcherType(
+            :researcher_id,
+            :researcher_name,
+            :researcher_surname,
+            :researcher_email,
+            :researcher_institution,
+            CAST(MULTISET(
+                SELECT REF(fw) FROM FutureWorks fw
+                WHERE fw.future_work_id IN (SELECT i.COLUMN_VALUE FROM TABLE(:future_work_ids) i)
+            ) AS FutureWorkListType)
+        )
+    )
+"""
+
+PUBLICATION_BULK_INSERT = """
+    INSERT INTO Publications VALUES (
+        PublicationType(
+            :publication_doi,
+            :publication_title,
+            :publication_journal,
+            :publication_year,
+            :publication_journal_quality,
+            CAST(MULTISET(
+                SELECT REF(r) FROM Researchers r
+                WHERE r.researcher_id IN (SELECT i.COLUMN_VALUE FROM TABLE(:author_ids) i)
+            ) AS ResearcherListType),
+            CAST(MULTISET(
+                SELECT REF(fw) FROM FutureWorks fw
+                WHERE fw.future_work_id IN (SELECT i.COLUMN_VALUE FROM TABLE(:future_work_ids) i)
+            ) AS FutureWorkListType)
+        )
+    )
+"""
+
+# ========================
+# Operations
+# ========================
+
+# Shared by the cached JSON responses and the streamed exports
+OP2_QUERY = """
+    SELECT t.tissue_id,
+           t.tissue_name,
+           t.tissue_description,
+           t.tissue_density,
+           t.tissue_is_vital
+    FROM Tissues t
+    WHERE t.tissue_density < :max_density
+    ORDER BY t.tissue_density ASC
+"""
+
+# Query based on the SQL from README
+OP3_QUERY = """
+    SELECT cu.cure_id,
+           DEREF(VALUE(d)).drug_id         AS drug_id,
+           DEREF(VALUE(d)).drug_name       AS drug_name,
+           DEREF(VALUE(d)).drug_description AS drug_description,
+           DEREF(VALUE(d)).drug_allergies  AS drug_allergies
+    FROM   Cures cu,
+           TABLE(cu.cure_composition) d
+    WHERE  cu.cure_id = :cure_id
+"""
+
+# Joins the scoped REF columns of Conditions directly (indexed by idx_conditions_disease_tissue)
+# instead of DEREFing every condition of every future work; the future work check is a
+# semi-join on the nested table (idx_future_work_suggested_by), so no DISTINCT is needed.
+# See scripts/op4_compare.sql for the plans of both versions.
+OP4_QUERY = """
+    SELECT d.donor_id,
+           d.donor_name,
+           d.donor_surname,
+           d.donor_date_of_birth,
+           d.donor_sex,
+           t.tissue_id,
+           t.tissue_name,
+           t.tissue_is_vital,
+           di.disease_name,
+           c.condition_id
+    FROM   Diseases di,
+           Conditions c,
+           Tissues t,
+           Donors d
+    WHERE  di.disease_id = :disease_id
+      AND  c.condition_disease = REF(di)
+      AND  c.tissue_ref = REF(t)
+      AND  c.donor_ref = REF(d)
+      AND  t.tissue_is_vital = 'Y'
+      AND  EXISTS (
+               SELECT 1
+               FROM   FutureWorks fw,
+                      TABLE(fw.future_work_suggested_by) s
+               WHERE  s.COLUMN_VALUE = REF(c)
+           )
+    ORDER BY d.donor_id, t.tissue_id
+"""
+
+# Reads the ResearcherSuggestions summary (see scripts/schema.sql) instead of joining
+# Publications x authors x Researchers x recommended works on every call
+OP5_QUERY = """
+    SELECT s.researcher_id,
+           s.researcher_name,
+           s.researcher_surname,
+           s.researcher_email,
+           s.researcher_institution,
+           s.item_kind,
+           s.publication_doi,
+           s.publication_title,
+           s.publication_journal,
+           s.journal_quality,
+           s.future_work_id,
+           fw.future_work_description
+    FROM   ResearcherSuggestions s
+           LEFT JOIN FutureWorks fw ON fw.future_work_id = s.future_work_id
+    WHERE  s.journal_quality = :quality
+    ORDER BY s.researcher_id
+"""
+
+# Rebuilds the ResearcherSuggestions rows of one journal quality (all when NULL)
+OP5_REFRESH = "BEGIN refresh_researcher_suggestions(:quality); END;"
+
+# ========================
+# List totals
+# ========================
+
+# Object tables are listed in USER_ALL_TABLES, not USER_TABLES
+TABLE_NUM_ROWS = "SELECT num_rows FROM user_all_tables WHERE table_name = :table_name"
+
+# ========================
+# Statement statistics
+# ========================
+
+# Executions and parse calls of this schema's statements; with the statement cache
+# doing its job, parse calls stay close to one per statement per session
+STATEMENT_STATS = """
+    SELECT s.sql_text,
+           SUM(s.executions),
+           SUM(s.parse_calls),
+           SUM(s.loads)
+    FROM v$sql s
+    WHERE s.parsing_schema_name = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA')
+    GROUP BY s.sql_text
+"""
+
+# SQL*Net round-trips of the current session so far (metrics.sample_round_trips);
+# requires SELECT access on V$MYSTAT and V$STATNAME
+SESSION_ROUND_TRIPS = """
+    SELECT SYS_CONTEXT('USERENV', 'SID'), m.value
+    FROM v$mystat m
+    JOIN v$statname n ON n.statistic# = m.statistic#
+    WHERE n.name = 'SQL*Net roundtrips to/from client'
+"""
+
+# ========================
+# Slow-query plans
+# ========================
+
+# The session's previous statement (run before it executes anything else; see slow_queries)
+PREVIOUS_STATEMENT = """
+    SELECT s.prev_sql_id, s.prev_child_number, q.sql_fulltext
+    FROM v$session s
+    JOIN v$sql q ON q.sql_id = s.prev_sql_id AND q.child_number = s.prev_child_number
+    WHERE s.sid = SYS_CONTEXT('USERENV', 'SID')
+"""
+
+CURSOR_PLAN = "SELECT plan_table_output FROM TABLE(DBMS_XPLAN.DISPLAY_CURSOR(:sql_id, :child_number, 'TYPICAL'))"
+
+# ========================
+# Assembled statements
+# ========================
+
+# Filled in with a table, its alias and fragments of this module only (*_FIELDS,
+# *_FILTERS, *_UPDATE_SET); values are always bound. A list page is LIST_SELECT
+# followed by the tail of pagination.build_page_clause.
+LIST_SELECT = "SELECT {columns} FROM {table} {alias}"
+LIST_EXPORT = "SELECT {columns} FROM {table} {alias} {where} ORDER BY {id_column}"
+COUNT_EXACT = "SELECT COUNT(*) FROM {table} {alias} {where}"
+# Filtered estimate: a count over `percent` of the blocks, scaled back up
+COUNT_SAMPLED = "SELECT ROUND(COUNT(*) * 100 / {percent}) FROM {table} SAMPLE BLOCK ({percent}) {alias} {where}"
+# Partial update returning the row (db_utils.returning_into builds {returning})
+UPDATE = "UPDATE {table} {alias} SET {assignments} WHERE {alias}.{id_field} = :{id_field} {returning}"
+
+# ========================
+# Registry
+# ========================
+
+# Every fixed statement by name (used to size the statement cache and to label statistics)
+STATEMENTS: Dict[str, str] = {
+    "health": HEALTH,
+    **{f"nextval:{sequence}": sql for sequence, sql in NEXTVAL.items()},
+    **{f"nextval_batch:{sequence}": sql for sequence, sql in NEXTVAL_BATCH.items()},
+    **{f"refs_by_ids:{table}": sql for table, sql in REFS_BY_IDS.items()},
+    "donor_by_id": DONOR_BY_ID,
+    "donors_by_ids": DONORS_BY_IDS,
+    "donor_insert": DONOR_INSERT,
+    "donor_bulk_insert": DONOR_BULK_INSERT,
+    "donor_delete": DONOR_DELETE,
+    "donor_graph": DONOR_GRAPH,
+    "donor_graph_drugs": DONOR_GRAPH_DRUGS,
+    "tissue_by_id": TISSUE_BY_ID,
+    "tissues_by_ids": TISSUES_BY_IDS,
+    "tissues_all": TISSUES_ALL,
+    "tissue_insert": TISSUE_INSERT,
+    "tissue_bulk_insert": TISSUE_BULK_INSERT,
+    "tissue_delete": TISSUE_DELETE,
+    "drug_by_id": DRUG_BY_ID,
+    "drugs_by_ids": DRUGS_BY_IDS,
+    "drugs_all": DRUGS_ALL,
+    "drug_insert": DRUG_INSERT,
+    "drug_bulk_insert": DRUG_BULK_INSERT,
+    "drug_delete": DRUG_DELETE,
+    "drug_text_search": DRUG_TEXT_SEARCH,
+    "drug_typeahead": DRUG_TYPEAHEAD,
+    "drug_text_indexes": DRUG_TEXT_INDEXES,
+    "drug_search_all": DRUG_SEARCH_ALL,
+    "drug_ids_by_allergy": DRUG_IDS_BY_ALLERGY,
+    "cure_bulk_insert": CURE_BULK_INSERT,
+    "disease_bulk_insert": DISEASE_BULK_INSERT,
+    "condition_bulk_insert": CONDITION_BULK_INSERT,
+    "future_work_bulk_insert": FUTURE_WORK_BULK_INSERT,
+    "researcher_bulk_insert": RESEARCHER_BULK_INSERT,
+    "publication_bulk_insert": PUBLICATION_BULK_INSERT,
+    "op2": OP2_QUERY,
+    "op3": OP3_QUERY,
+    "op4": OP4_QUERY,
+    "op5": OP5_QUERY,
+    "op5_refresh": OP5_REFRESH,
+    "table_num_rows": TABLE_NUM_ROWS,
+    "statement_stats": STATEMENT_STATS,
+    "session_round_trips": SESSION_ROUND_TRIPS,
+    "previous_statement": PREVIOUS_STATEMENT,
+    "cursor_plan": CURSOR_PLAN,
+}
+
+# Filters of each list endpoint and whether it exports (format=ndjson/csv)
+_LISTS = (
+    (DONOR_FILTERS, True),
+    (TISSUE_FILTERS, True),
+    (DRUG_FILTERS, True),
+    (CURE_FILTERS, False),
+)
+
+_UPDATES = (DONOR_UPDATE_SET, TISSUE_UPDATE_SET, DRUG_UPDATE_SET)
+
+# Assembled shapes: per filter combination, the LIST_SELECT page in keyset and offset
+# mode, COUNT_EXACT, COUNT_SAMPLED and LIST_EXPORT; per non-empty set of updated
+# fields, one UPDATE
+_ASSEMBLED_SHAPES = sum(2 ** len(filters) * (5 if exported else 4) for filters, exported in _LISTS) + sum(
+    2 ** len(assignments) - 1 for assignments in _UPDATES
+)
+
+# Statements kept prepared per pooled connection: every registered statement and
+# every assembled shape (for the default projection) fit without evictions
+STATEMENT_CACHE_SIZE = int(os.environ.get("DATABASE_STMT_CACHE_SIZE", str(len(STATEMENTS) + _ASSEMBLED_SHAPES)))
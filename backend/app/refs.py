@@ -0,0 +1,63 @@
+"""Bulk resolution of object table IDs to REFs"""
+from typing import Dict, Hashable, Iterable, List
+
+import oracledb
+
+from app import queries
+from app.db_utils import get_object_type
+
+# IDs bound per resolving query (the SYS.ODCI*LIST collections hold at most 32767)
+RESOLVE_BATCH_SIZE = 1000
+
+
+class RefResolver:
+    """Resolve IDs of object tables to REFs, many IDs per query
+
+    python-oracledb can neither fetch nor bind REF values, so each REF is returned
+    as its REFTOHEX identity; write statements rebuild the REFs from the IDs in SQL
+    (e.g. CAST(MULTISET(SELECT REF(d) ...)) for nested tables of REFs). The resolver
+    is therefore mostly used to check, in bulk, that every referenced row exists.
+
+    Resolved REFs are cached for the lifetime of the resolver, which is meant to be
+    one connection checkout or transaction: across transactions rows may be deleted.
+    """
+
+    def __init__(self, connection: oracledb.AsyncConnection):
+        self._connection = connection
+        self._refs: Dict[str, Dict[Hashable, str]] = {}
+
+    async def resolve(self, table: str, ids: Iterable[Hashable]) -> Dict[Hashable, str]:
+        """Map each ID of `table` to its REF (as REFTOHEX); IDs without a row are absent
+
+        Args:
+            table: Object table name, as in queries.REF_TABLES
+            ids: IDs to resolve; only those not resolved before are queried
+
+        Returns:
+            Dictionary of REFTOHEX values keyed by ID
+        """
+        refs = self._refs.setdefault(table, {})
+        ids = list(dict.fromkeys(ids))
+        pending = [record_id for record_id in ids if record_id not in refs]
+
+        if pending:
+            _, list_type_name = queries.REF_TABLES[table]
+            list_type = await get_object_type(self._connection, list_type_name)
+            cursor: oracledb.AsyncCursor = self._connection.cursor()
+            cursor.arraysize = cursor.prefetchrows = RESOLVE_BATCH_SIZE + 1
+            try:
+                for start in range(0, len(pending), RESOLVE_BATCH_SIZE):
+                    batch = pending[start:start + RESOLVE_BATCH_SIZE]
+                    await cursor.execute(queries.REFS_BY_IDS[table], {"ids": list_type.newobject(batch)})
+                    async for record_id, ref in cursor:
+                        refs[record_id] = ref
+            finally:
+                cursor.close()
+
+        return {record_id: refs[record_id] for record_id in ids if record_id in refs}
+
+    async def missing(self, table: str, ids: Iterable[Hashable]) -> List[Hashable]:
+        """IDs of `table` that do not exist, in the order given"""
+        ids = list(dict.fromkeys(ids))
+        refs = await self.resolve(table, ids)
+        return [record_id for record_id in ids if record_id not in refs]
@@ -0,0 +1,20 @@
+"""JSON response class encoding handler results without an intermediate pass"""
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded by pydantic-core's serializer instead of json.dumps
+
+    Dates, datetimes and tuples are encoded natively, and already encoded bytes
+    (e.g. cached operation results) are sent as they are. Handlers return it
+    directly for content built from database rows, which skips the response_model
+    validation and jsonable_encoder passes: that output is trusted, not re-checked.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return pydantic_core.to_json(content)
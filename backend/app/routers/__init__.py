@@ -1,6 +1,25 @@
 from .donor import router as donor_router
 from .tissue import router as tissue_router
 from .drug import router as drug_router
+from .cure import router as cure_router
+from .disease import router as disease_router
+from .condition import router as condition_router
+from .future_work import router as future_work_router
+from .researcher import router as researcher_router
+from .publication import router as publication_router
 from .operations import router as operations_router
+from .admin import router as admin_router
 
-__all__ = ["donor_router", "tissue_router", "drug_router", "operations_router"]
+__all__ = [
+    "donor_router",
+    "tissue_router",
+    "drug_router",
+    "cure_router",
+    "disease_router",
+    "condition_router",
+    "future_work_router",
+    "researcher_router",
+    "publication_router",
+    "operations_router",
+    "admin_router",
+]
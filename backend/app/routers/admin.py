@@ -0,0 +1,61 @@
+"""Administrative and diagnostic endpoints"""
+from fastapi import APIRouter, HTTPException, Query, Depends
+import oracledb
+
+from app import queries
+from app.database import get_connection
+from app.slow_queries import SLOW_QUERY_MS, slow_queries
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/statement-cache")
+async def get_statement_cache_stats(connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Executions and parse calls of the backend's statements, to check the soft-parse rate
+
+    With the per-connection statement cache, a statement is parsed once per pooled
+    session and then only executed, so `parse_calls` should stay far below
+    `executions`. Statements assembled per request (list pages, partial updates) are
+    grouped under "assembled". Requires SELECT access on V$SQL.
+    """
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        await cursor.execute(queries.STATEMENT_STATS)
+
+        # V$SQL.SQL_TEXT holds the first 1000 characters of the statement
+        names = {text[:1000]: name for name, text in queries.STATEMENTS.items()}
+        statements = {}
+        async for sql_text, executions, parse_calls, loads in cursor:
+            name = names.get(sql_text, "assembled")
+            stats = statements.setdefault(name, {"executions": 0, "parse_calls": 0, "hard_parses": 0})
+            stats["executions"] += executions or 0
+            stats["parse_calls"] += parse_calls or 0
+            stats["hard_parses"] += loads or 0
+
+        executions = sum(stats["executions"] for stats in statements.values())
+        parse_calls = sum(stats["parse_calls"] for stats in statements.values())
+
+        return {
+            "stmtcachesize": queries.STATEMENT_CACHE_SIZE,
+            "executions": executions,
+            "parse_calls": parse_calls,
+            # Share of executions that needed no parse call at all
+            "cache_hit_ratio": round(1 - parse_calls / executions, 4) if executions else None,
+            "statements": statements,
+        }
+
+    except oracledb.DatabaseError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(limit: int = Query(20, ge=1, le=1000, description="Number of entries, newest first")):
+    """Most recent statements slower than SLOW_QUERY_MS, with redacted binds and their plan
+
+    Kept per worker in a ring buffer of SLOW_QUERY_LOG_SIZE entries.
+    """
+    entries = list(slow_queries)[-limit:]
+    return {"threshold_ms": SLOW_QUERY_MS, "slow_queries": entries[::-1]}
@@ -0,0 +1,58 @@
+"""Condition ingest endpoints"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+import oracledb
+
+from app.models.condition import ConditionCreate
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert, reference_check
+from app import queries
+
+router = APIRouter(prefix="/api/conditions", tags=["conditions"])
+
+
+@router.post("/bulk", response_model=dict)
+async def create_conditions_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many conditions at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    The diseases, donors, tissues and cures of each batch are checked with one query
+    per table; records referencing unknown rows are reported by index without failing
+    the rest.
+    """
+    try:
+        def bind_params(condition: ConditionCreate, condition_id: int) -> dict:
+            return {
+                "condition_id": condition_id,
+                "condition_status": condition.condition_status,
+                "disease_id": condition.condition_disease_id,
+                "donor_id": condition.donor_id,
+                "tissue_id": condition.tissue_id,
+                "treatment_id": condition.treatment_id,
+                "treatment_effect": condition.treatment_effect,
+            }
+
+        return await bulk_insert(
+            connection,
+            request,
+            ConditionCreate,
+            "condition_seq",
+            queries.CONDITION_BULK_INSERT,
+            bind_params,
+            input_sizes={"disease_id": oracledb.DB_TYPE_NUMBER, "treatment_id": oracledb.DB_TYPE_NUMBER},
+            check_batch=reference_check(
+                connection,
+                {
+                    "condition_disease_id": "Diseases",
+                    "donor_id": "Donors",
+                    "tissue_id": "Tissues",
+                    "treatment_id": "Cures",
+                },
+            ),
+        )
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        await result_cache.invalidate("Conditions")
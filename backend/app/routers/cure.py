@@ -0,0 +1,106 @@
+"""Cure list and ingest endpoints"""
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from typing import Optional
+import oracledb
+
+from app.models.cure import CureCreate
+from app.db_utils import get_object_type, varray_to_list
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert, reference_check
+from app import queries
+from app.projection import select_fields, select_list, row_factory
+from app.responses import FastJSONResponse
+from app.pagination import build_page_clause, next_cursor, count_total, new_count_cache
+
+router = APIRouter(prefix="/api/cures", tags=["cures"])
+
+# Exact list totals, invalidated by cure loads. Totals filtered by allergy also depend
+# on the drugs: they are kept in the result cache, invalidated by drug writes too.
+count_cache = new_count_cache()
+
+
+@router.get("", response_model=dict)
+async def get_cures(
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None, description="Page token from a previous response's `next` (overrides offset)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to compute `total`"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. to leave out descriptions)"),
+    excluding_allergy: Optional[str] = Query(
+        None, min_length=1, description="Leave out cures containing a drug that lists this allergy (case-insensitive)"
+    ),
+):
+    """Get all cures with the IDs of their drugs, optionally screened for an allergy"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        where_clauses = []
+        params = {}
+
+        if excluding_allergy:
+            where_clauses.append(queries.CURE_FILTERS["excluding_allergy"])
+            params["excluding_allergy"] = excluding_allergy.strip().lower()
+
+        selected = select_fields(fields, queries.CURE_FIELDS, "cure_id")
+        columns = select_list(selected, queries.CURE_FIELDS)
+        select = queries.LIST_SELECT.format(columns=columns, table="Cures", alias="cu")
+
+        # Keyset page when an `after` token is given, OFFSET/FETCH otherwise
+        page_clause, page_params = build_page_clause(where_clauses, params, "cu.cure_id", limit, offset, after)
+
+        tables = ("Drugs", "DrugAllergies") if excluding_allergy else ()
+        total = await count_total(cursor, "Cures", "cu", where_clauses, params, count, count_cache, tables)
+
+        cursor.arraysize = cursor.prefetchrows = limit + 1
+        await cursor.execute(f"{select} {page_clause}", page_params)
+        cursor.rowfactory = row_factory(selected, {"cure_drug_ids": varray_to_list})
+        cures = await cursor.fetchall()
+
+        return FastJSONResponse(
+            {"total": total, "cures": cures, "next": next_cursor(cures, "cure_id", limit)}
+        )
+
+    except oracledb.DatabaseError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.post("/bulk", response_model=dict)
+async def create_cures_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many cures at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    The drugs of each batch are checked with one query; the composition is built from
+    the drug IDs by the INSERT itself. Records referencing unknown drugs are reported
+    by index without failing the rest.
+    """
+    try:
+        id_list_type = await get_object_type(connection, "SYS.ODCINUMBERLIST")
+
+        def bind_params(cure: CureCreate, cure_id: int) -> dict:
+            return {
+                "cure_id": cure_id,
+                "cure_description": cure.cure_description,
+                "drug_ids": id_list_type.newobject(cure.cure_drug_ids),
+            }
+
+        return await bulk_insert(
+            connection,
+            request,
+            CureCreate,
+            "cure_seq",
+            queries.CURE_BULK_INSERT,
+            bind_params,
+            input_sizes={"drug_ids": id_list_type},
+            check_batch=reference_check(connection, {"cure_drug_ids": "Drugs"}),
+        )
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        count_cache.invalidate()
+        await result_cache.invalidate("Cures")
@@ -0,0 +1,48 @@
+"""Disease ingest endpoints"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+import oracledb
+
+from app.models.disease import DiseaseCreate
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert, reference_check
+from app import queries
+
+router = APIRouter(prefix="/api/diseases", tags=["diseases"])
+
+
+@router.post("/bulk", response_model=dict)
+async def create_diseases_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many diseases at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    The cures of each batch are checked with one query; records referencing an unknown
+    cure (or reusing a disease name) are reported by index without failing the rest.
+    """
+    try:
+        def bind_params(disease: DiseaseCreate, disease_id: int) -> dict:
+            return {
+                "disease_id": disease_id,
+                "disease_name": disease.disease_name,
+                "disease_discovery": disease.disease_discovery,
+                "disease_description": disease.disease_description,
+                "disease_treatable": disease.disease_treatable,
+                "cure_id": disease.disease_cure_id,
+            }
+
+        return await bulk_insert(
+            connection,
+            request,
+            DiseaseCreate,
+            "disease_seq",
+            queries.DISEASE_BULK_INSERT,
+            bind_params,
+            input_sizes={"disease_discovery": oracledb.DB_TYPE_DATE, "cure_id": oracledb.DB_TYPE_NUMBER},
+            check_batch=reference_check(connection, {"disease_cure_id": "Cures"}),
+        )
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        await result_cache.invalidate("Diseases")
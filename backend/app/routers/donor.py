@@ -1,54 +1,96 @@
 """Donor CRUD endpoints"""
-from fastapi import APIRouter, HTTPException, Request, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Body
+from typing import List, Optional
 import oracledb
 
 from app.models.donor import DonorCreate, DonorResponse, DonorUpdate
-from app.db_utils import get_donor_by_id
+from app.db_utils import get_donor_by_id, get_donors_by_ids, get_donor_graph, autocommit, returning_into, returned_row, to_date
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert
+from app.export import export_query
+from app import queries
+from app.projection import select_fields, select_list, select_ids, parse_ids, lookup_result, row_factory
+from app.responses import FastJSONResponse
+from app.pagination import build_page_clause, next_cursor, count_total, new_count_cache
 
 router = APIRouter(prefix="/api/donors", tags=["donors"])
 
+# Exact list totals, invalidated by every write below (as are cached operation results)
+count_cache = new_count_cache()
+
 
 @router.post("", response_model=DonorResponse, status_code=201)
-async def create_donor(donor: DonorCreate, request: Request):
+async def create_donor(donor: DonorCreate, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Create a new donor (Operation 1 equivalent for donors)"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Get next donor_id from sequence
-        cursor.execute("SELECT donor_seq.NEXTVAL FROM DUAL")
-        donor_id = cursor.fetchone()[0]
-
-        # Insert using object type constructor
-        insert_query = """
-            INSERT INTO Donors VALUES (
-                DonorType(
-                    :donor_id,
-                    :donor_name,
-                    :donor_surname,
-                    :donor_date_of_birth,
-                    :donor_sex
-                )
+        # Insert using object type constructor; the new donor_id is drawn from the
+        # sequence and returned by the same statement, committed in the same round-trip
+        donor_id = cursor.var(int)
+        with autocommit(connection):
+            await cursor.execute(
+                queries.DONOR_INSERT,
+                {
+                    "donor_id": donor_id,
+                    "donor_name": donor.donor_name,
+                    "donor_surname": donor.donor_surname,
+                    "donor_date_of_birth": donor.donor_date_of_birth,
+                    "donor_sex": donor.donor_sex,
+                },
             )
-        """
-        cursor.execute(
-            insert_query,
-            {
-                "donor_id": donor_id,
-                "donor_name": donor.donor_name,
-                "donor_surname": donor.donor_surname,
-                "donor_date_of_birth": donor.donor_date_of_birth,
-                "donor_sex": donor.donor_sex,
-            },
+        count_cache.invalidate()
+        await result_cache.invalidate("Donors")
+
+        return DonorResponse(donor_id=donor_id.getvalue()[0], **donor.model_dump())
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.post("/bulk", response_model=dict)
+async def create_donors_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many donors at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    Records are inserted in batches with one commit per batch; invalid or rejected
+    records are reported by index without failing the rest.
+    """
+    try:
+        return await bulk_insert(
+            connection,
+            request,
+            DonorCreate,
+            "donor_seq",
+            queries.DONOR_BULK_INSERT,
+            lambda donor, donor_id: {"donor_id": donor_id, **donor.model_dump()},
         )
-        request.app.state.connection.commit()
 
-        # Fetch and return the created donor
-        created_donor = get_donor_by_id(cursor, donor_id)
-        return DonorResponse(**created_donor)
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        count_cache.invalidate()
+        await result_cache.invalidate("Donors")
+
+
+@router.post("/lookup", response_model=dict)
+async def lookup_donors(
+    ids: List[int] = Body(..., embed=True),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Fetch many donors by ID in one query (the body form of `GET /api/donors?ids=`)"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        requested = select_ids(ids)
+        return FastJSONResponse(lookup_result(await get_donors_by_ids(cursor, requested), requested, "donors"))
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
@@ -56,55 +98,62 @@ async def create_donor(donor: DonorCreate, request: Request):
 
 @router.get("", response_model=dict)
 async def get_donors(
-    request: Request,
+    connection: oracledb.AsyncConnection = Depends(get_connection),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None, description="Page token from a previous response's `next` (overrides offset)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to compute `total`"),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$", description="ndjson/csv stream every matching row"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. to leave out descriptions)"),
+    ids: Optional[str] = Query(None, description="Comma-separated IDs to fetch in one query (returns the hits and `missing`)"),
     sex: Optional[str] = None,
 ):
     """Get all donors with optional filtering"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
+        if ids is not None:
+            # Multi-get: paging, counting and filters do not apply
+            requested = parse_ids(ids)
+            return FastJSONResponse(lookup_result(await get_donors_by_ids(cursor, requested), requested, "donors"))
+
         # Build query with optional filters
-        where_clause = ""
+        where_clauses = []
         params = {}
 
         if sex:
-            where_clause = "WHERE d.donor_sex = :sex"
+            where_clauses.append(queries.DONOR_FILTERS["sex"])
             params["sex"] = sex
 
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM Donors d {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()[0]
-
-        # Get donors (use literal values for OFFSET/FETCH as Oracle doesn't support bind params there)
-        query = f"""
-            SELECT d.donor_id,
-                   d.donor_name,
-                   d.donor_surname,
-                   d.donor_date_of_birth,
-                   d.donor_sex
-            FROM Donors d
-            {where_clause}
-            ORDER BY d.donor_id
-            OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY
-        """
-        cursor.execute(query, params)
-
-        donors = []
-        for row in cursor:
-            donors.append(
-                {
-                    "donor_id": row[0],
-                    "donor_name": row[1],
-                    "donor_surname": row[2],
-                    "donor_date_of_birth": row[3],
-                    "donor_sex": row[4],
-                }
+        selected = select_fields(fields, queries.DONOR_FIELDS, "donor_id")
+        columns = select_list(selected, queries.DONOR_FIELDS)
+        select = queries.LIST_SELECT.format(columns=columns, table="Donors", alias="d")
+
+        if export_format != "json":
+            # Export mode: no paging or total, every matching row is streamed
+            where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+            query = queries.LIST_EXPORT.format(
+                columns=columns, table="Donors", alias="d", where=where_clause, id_column="d.donor_id"
             )
+            return await export_query(connection, query, params, export_format, "donors")
 
-        return {"total": total, "donors": donors}
+        # Keyset page when an `after` token is given, OFFSET/FETCH otherwise
+        page_clause, page_params = build_page_clause(where_clauses, params, "d.donor_id", limit, offset, after)
+
+        # Get total count
+        total = await count_total(cursor, "Donors", "d", where_clauses, params, count, count_cache)
+
+        # Get donors
+        query = f"{select} {page_clause}"
+        # The whole page comes back with the execute; rows are built as dicts while fetched
+        cursor.arraysize = cursor.prefetchrows = limit + 1
+        await cursor.execute(query, page_params)
+        cursor.rowfactory = row_factory(selected, {"donor_date_of_birth": to_date})
+        donors = await cursor.fetchall()
+
+        return FastJSONResponse(
+            {"total": total, "donors": donors, "next": next_cursor(donors, "donor_id", limit)}
+        )
 
     except oracledb.DatabaseError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -113,17 +162,18 @@ async def get_donors(
 
 
 @router.get("/{donor_id}", response_model=DonorResponse)
-async def get_donor(donor_id: int, request: Request):
+async def get_donor(donor_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Get a specific donor by ID"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        donor = get_donor_by_id(cursor, donor_id)
+        donor = await get_donor_by_id(cursor, donor_id)
 
         if not donor:
             raise HTTPException(status_code=404, detail=f"Donor with ID {donor_id} not found")
 
-        return DonorResponse(**donor)
+        # Trusted database output: sent without re-validating it against DonorResponse
+        return FastJSONResponse(donor)
 
     except oracledb.DatabaseError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -131,80 +181,113 @@ async def get_donor(donor_id: int, request: Request):
         cursor.close()
 
 
-@router.put("/{donor_id}", response_model=DonorResponse)
-async def update_donor(donor_id: int, donor: DonorUpdate, request: Request):
-    """Update an existing donor"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+@router.get("/{donor_id}/graph", response_model=dict)
+async def get_donor_graph_document(
+    donor_id: int,
+    depth: int = Query(3, ge=0, le=3, description="0: donor, 1: + conditions, 2: + tissues and diseases, 3: + cures and drugs"),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Get a donor with its conditions, tissues, diseases, cures and drugs in one document"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Check if donor exists
-        existing = get_donor_by_id(cursor, donor_id)
-        if not existing:
+        donor = await get_donor_graph(cursor, donor_id, depth)
+
+        if not donor:
             raise HTTPException(status_code=404, detail=f"Donor with ID {donor_id} not found")
 
+        return FastJSONResponse(donor)
+
+    except oracledb.DatabaseError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.put("/{donor_id}", response_model=DonorResponse)
+async def update_donor(donor_id: int, donor: DonorUpdate, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Update an existing donor"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
         # Build update query for only provided fields
         update_fields = []
         params = {"donor_id": donor_id}
 
         if donor.donor_name is not None:
-            update_fields.append("d.donor_name = :donor_name")
+            update_fields.append(queries.DONOR_UPDATE_SET["donor_name"])
             params["donor_name"] = donor.donor_name
 
         if donor.donor_surname is not None:
-            update_fields.append("d.donor_surname = :donor_surname")
+            update_fields.append(queries.DONOR_UPDATE_SET["donor_surname"])
             params["donor_surname"] = donor.donor_surname
 
         if donor.donor_date_of_birth is not None:
-            update_fields.append("d.donor_date_of_birth = :donor_date_of_birth")
+            update_fields.append(queries.DONOR_UPDATE_SET["donor_date_of_birth"])
             params["donor_date_of_birth"] = donor.donor_date_of_birth
 
         if donor.donor_sex is not None:
-            update_fields.append("d.donor_sex = :donor_sex")
+            update_fields.append(queries.DONOR_UPDATE_SET["donor_sex"])
             params["donor_sex"] = donor.donor_sex
 
         if not update_fields:
             # No fields to update, return existing donor
+            existing = await get_donor_by_id(cursor, donor_id)
+            if not existing:
+                raise HTTPException(status_code=404, detail=f"Donor with ID {donor_id} not found")
             return DonorResponse(**existing)
 
-        update_query = f"""
-            UPDATE Donors d
-            SET {', '.join(update_fields)}
-            WHERE d.donor_id = :donor_id
-        """
-        cursor.execute(update_query, params)
-        request.app.state.connection.commit()
+        # The updated row comes back with the UPDATE itself; no row means no such donor
+        returning_clause, returned = returning_into(
+            cursor,
+            "d",
+            {
+                "donor_id": int,
+                "donor_name": str,
+                "donor_surname": str,
+                "donor_date_of_birth": oracledb.DB_TYPE_DATE,
+                "donor_sex": str,
+            },
+        )
+        update_query = queries.UPDATE.format(
+            table="Donors", alias="d", assignments=", ".join(update_fields), id_field="donor_id", returning=returning_clause
+        )
+        with autocommit(connection):
+            await cursor.execute(update_query, {**params, **returned})
+
+        updated_donor = returned_row(returned)
+        if not updated_donor:
+            raise HTTPException(status_code=404, detail=f"Donor with ID {donor_id} not found")
+        count_cache.invalidate()
+        await result_cache.invalidate("Donors")
 
-        # Fetch and return updated donor
-        updated_donor = get_donor_by_id(cursor, donor_id)
         return DonorResponse(**updated_donor)
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
+        await connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
 
 
 @router.delete("/{donor_id}", status_code=204)
-async def delete_donor(donor_id: int, request: Request):
+async def delete_donor(donor_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Delete a donor"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Check if donor exists
-        existing = get_donor_by_id(cursor, donor_id)
-        if not existing:
+        # Delete donor; the affected row count tells whether it existed
+        with autocommit(connection):
+            await cursor.execute(queries.DONOR_DELETE, {"donor_id": donor_id})
+        if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"Donor with ID {donor_id} not found")
-
-        # Delete donor
-        delete_query = "DELETE FROM Donors d WHERE d.donor_id = :donor_id"
-        cursor.execute(delete_query, {"donor_id": donor_id})
-        request.app.state.connection.commit()
+        count_cache.invalidate()
+        await result_cache.invalidate("Donors")
 
         return None
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
+        await connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
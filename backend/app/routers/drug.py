@@ -1,60 +1,177 @@
 """Drug CRUD endpoints"""
-from fastapi import APIRouter, HTTPException, Request, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Body
+from typing import List, Optional
 import oracledb
 
 from app.models.drug import DrugCreate, DrugResponse, DrugUpdate
-from app.db_utils import get_drug_by_id, create_varray, varray_to_list, read_clob
+from app.db_utils import (
+    get_drug_by_id,
+    get_drugs_by_ids,
+    get_object_type,
+    create_varray,
+    varray_to_list,
+    read_clob,
+    autocommit,
+    returning_into,
+    returned_row,
+)
+from app.database import get_connection
+from app.cache import result_cache, drug_cache
+from app.bulk import bulk_insert
+from app.export import export_query
+from app import queries
+from app.projection import select_fields, select_list, select_ids, parse_ids, lookup_result, row_factory
+from app.responses import FastJSONResponse
+from app.pagination import build_page_clause, next_cursor, page_of_ids, count_total, new_count_cache
+from app.search import MAX_BOUND_MATCHES, drug_search, search_terms, text_query, like_prefix
 
 router = APIRouter(prefix="/api/drugs", tags=["drugs"])
 
+# Exact list totals, invalidated by every write below (as are cached operation results
+# and, on update and delete, the cached record even if it no longer exists)
+count_cache = new_count_cache()
+
 
 @router.post("", response_model=DrugResponse, status_code=201)
-async def create_drug(drug: DrugCreate, request: Request):
+async def create_drug(drug: DrugCreate, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Create a new drug"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Get next drug_id from sequence
-        cursor.execute("SELECT drug_seq.NEXTVAL FROM DUAL")
-        drug_id = cursor.fetchone()[0]
-
-        # Build the AllergyListType constructor in SQL
-        if drug.drug_allergies:
-            # Escape single quotes in allergy strings and build SQL list
-            escaped_allergies = [a.replace("'", "''") for a in drug.drug_allergies]
-            allergy_list = ", ".join([f"'{a}'" for a in escaped_allergies])
-            allergies_sql = f"AllergyListType({allergy_list})"
-        else:
-            allergies_sql = "NULL"
-
-        # Insert using object type constructor with inline VARRAY construction
-        insert_query = f"""
-            INSERT INTO Drugs VALUES (
-                DrugType(
-                    :drug_id,
-                    :drug_name,
-                    :drug_description,
-                    {allergies_sql}
-                )
+        # Insert using object type constructor; the allergies are bound as an
+        # AllergyListType object so the statement text never changes. The new drug_id
+        # is drawn from the sequence and returned by the same statement.
+        drug_id = cursor.var(int)
+        # Declare the collection type so an empty list can be bound as NULL
+        cursor.setinputsizes(drug_allergies=await get_object_type(connection, "AllergyListType"))
+        with autocommit(connection):
+            await cursor.execute(
+                queries.DRUG_INSERT,
+                {
+                    "drug_id": drug_id,
+                    "drug_name": drug.drug_name,
+                    "drug_description": drug.drug_description,
+                    "drug_allergies": await create_varray(cursor, "AllergyListType", drug.drug_allergies),
+                },
             )
-        """
-        cursor.execute(
-            insert_query,
-            {
+        count_cache.invalidate()
+        await result_cache.invalidate("Drugs")
+        drug_search.add(drug_id.getvalue()[0], drug.drug_name, drug.drug_description)
+
+        return DrugResponse(drug_id=drug_id.getvalue()[0], **drug.model_dump())
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.post("/bulk", response_model=dict)
+async def create_drugs_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many drugs at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    Records are inserted in batches with one commit per batch; invalid or rejected
+    records are reported by index without failing the rest.
+    """
+    try:
+        # Resolve the collection type once for the whole request
+        allergy_type = await get_object_type(connection, "AllergyListType")
+
+        def bind_params(drug: DrugCreate, drug_id: int) -> dict:
+            return {
                 "drug_id": drug_id,
                 "drug_name": drug.drug_name,
                 "drug_description": drug.drug_description,
-            },
+                "drug_allergies": allergy_type.newobject(drug.drug_allergies) if drug.drug_allergies else None,
+            }
+
+        return await bulk_insert(
+            connection,
+            request,
+            DrugCreate,
+            "drug_seq",
+            queries.DRUG_BULK_INSERT,
+            bind_params,
+            input_sizes={"drug_allergies": allergy_type},
         )
-        request.app.state.connection.commit()
 
-        # Fetch and return the created drug
-        created_drug = get_drug_by_id(cursor, drug_id)
-        return DrugResponse(**created_drug)
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        count_cache.invalidate()
+        await result_cache.invalidate("Drugs")
+        drug_search.invalidate()
+
+
+@router.post("/lookup", response_model=dict)
+async def lookup_drugs(
+    ids: List[int] = Body(..., embed=True),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Fetch many drugs by ID in one query (the body form of `GET /api/drugs?ids=`)"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        requested = select_ids(ids)
+        return FastJSONResponse(lookup_result(await get_drugs_by_ids(cursor, requested), requested, "drugs"))
+
+    except oracledb.DatabaseError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.get("/search", response_model=dict)
+async def search_drugs(
+    q: str = Query(..., min_length=1, description="Words to find in drug names and descriptions"),
+    limit: int = Query(20, ge=1, le=100),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Drugs matching every word of `q` in their name or description, best matches first"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        terms = search_terms(q)
+        mode = await drug_search.prepare(cursor)
+        if mode == "text":
+            cursor.arraysize = cursor.prefetchrows = limit + 1
+            await cursor.execute(queries.DRUG_TEXT_SEARCH, {"query": text_query(terms), "search_limit": limit})
+            matches = await cursor.fetchall()
+        else:
+            matches = drug_search.index.search(terms, limit)
+
+        drugs = [{"drug_id": drug_id, "drug_name": name, "score": score} for drug_id, name, score in matches]
+        return FastJSONResponse({"query": q, "mode": mode, "drugs": drugs})
+
+    except oracledb.DatabaseError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.get("/typeahead", response_model=dict)
+async def drug_typeahead(
+    prefix: str = Query(..., min_length=1, description="Beginning of the drug name typed so far"),
+    limit: int = Query(10, ge=1, le=50),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Drugs whose name starts with `prefix` (case-insensitive), in name order"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        if await drug_search.prepare(cursor) == "text":
+            cursor.arraysize = cursor.prefetchrows = limit + 1
+            await cursor.execute(queries.DRUG_TYPEAHEAD, {"prefix": like_prefix(prefix), "search_limit": limit})
+            matches = await cursor.fetchall()
+        else:
+            matches = drug_search.index.prefix(prefix, limit)
+
+        return FastJSONResponse({"drugs": [{"drug_id": drug_id, "drug_name": name} for drug_id, name in matches]})
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
@@ -62,53 +179,95 @@ async def create_drug(drug: DrugCreate, request: Request):
 
 @router.get("", response_model=dict)
 async def get_drugs(
-    request: Request,
+    connection: oracledb.AsyncConnection = Depends(get_connection),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    search: Optional[str] = None,
+    after: Optional[str] = Query(None, description="Page token from a previous response's `next` (overrides offset)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to compute `total`"),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$", description="ndjson/csv stream every matching row"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. to leave out descriptions)"),
+    ids: Optional[str] = Query(None, description="Comma-separated IDs to fetch in one query (returns the hits and `missing`)"),
+    search: Optional[str] = Query(None, description="Words the drug name must contain (the last one as a prefix)"),
+    allergy: Optional[str] = Query(None, min_length=1, description="Only drugs listing this allergy (case-insensitive)"),
 ):
     """Get all drugs with optional filtering"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
+        if ids is not None:
+            # Multi-get: paging, counting and filters do not apply
+            requested = parse_ids(ids)
+            return FastJSONResponse(lookup_result(await get_drugs_by_ids(cursor, requested), requested, "drugs"))
+
         # Build query with optional filters
-        where_clause = ""
+        where_clauses = []
         params = {}
 
+        # IDs matched in process (no Oracle Text), screened for the allergy here too
+        matches = None
         if search:
-            where_clause = "WHERE UPPER(d.drug_name) LIKE UPPER(:search)"
-            params["search"] = f"%{search}%"
-
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM Drugs d {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()[0]
-
-        # Get drugs (use literal values for OFFSET/FETCH as Oracle doesn't support bind params there)
-        query = f"""
-            SELECT d.drug_id,
-                   d.drug_name,
-                   d.drug_description,
-                   d.drug_allergies
-            FROM Drugs d
-            {where_clause}
-            ORDER BY d.drug_id
-            OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY
-        """
-        cursor.execute(query, params)
-
-        drugs = []
-        for row in cursor:
-            drugs.append(
-                {
-                    "drug_id": row[0],
-                    "drug_name": row[1],
-                    "drug_description": read_clob(row[2]),
-                    "drug_allergies": varray_to_list(row[3]),
-                }
+            terms = search_terms(search)
+            if await drug_search.prepare(cursor) == "text":
+                where_clauses.append(queries.DRUG_FILTERS["search"])
+                params["search"] = text_query(terms)
+            else:
+                matches = drug_search.index.name_matches(terms)
+
+        if allergy and matches is None:
+            where_clauses.append(queries.DRUG_FILTERS["allergy"])
+            params["allergy"] = allergy.strip().lower()
+        elif allergy and matches:
+            cursor.arraysize = cursor.prefetchrows = 1000
+            await cursor.execute(queries.DRUG_IDS_BY_ALLERGY, {"allergy": allergy.strip().lower()})
+            with_allergy = {row[0] for row in await cursor.fetchall()}
+            matches = [drug_id for drug_id in matches if drug_id in with_allergy]
+
+        selected = select_fields(fields, queries.DRUG_FIELDS, "drug_id")
+        columns = select_list(selected, queries.DRUG_FIELDS)
+        select = queries.LIST_SELECT.format(columns=columns, table="Drugs", alias="d")
+
+        if matches is not None:
+            if export_format == "json":
+                # Paged here, so only the IDs of one page are bound
+                bound_ids, next_page = page_of_ids(matches, limit, offset, after)
+            elif len(matches) > MAX_BOUND_MATCHES:
+                raise HTTPException(
+                    status_code=400, detail=f"Search matches more than {MAX_BOUND_MATCHES} drugs, narrow it down to export"
+                )
+            else:
+                bound_ids = matches
+            id_list_type = await get_object_type(connection, "SYS.ODCINUMBERLIST")
+            where_clauses.append(queries.DRUG_FILTERS["search_ids"])
+            params["search_ids"] = id_list_type.newobject(bound_ids)
+
+        if export_format != "json":
+            # Export mode: no paging or total, every matching row is streamed
+            where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+            query = queries.LIST_EXPORT.format(
+                columns=columns, table="Drugs", alias="d", where=where_clause, id_column="d.drug_id"
             )
+            return await export_query(connection, query, params, export_format, "drugs")
 
-        return {"total": total, "drugs": drugs}
+        if matches is not None:
+            # The page's IDs are bound already: first (and only) page of the statement
+            page_clause, page_params = build_page_clause(where_clauses, params, "d.drug_id", limit, 0, None)
+            total = None if count == "none" else len(matches)
+        else:
+            # Keyset page when an `after` token is given, OFFSET/FETCH otherwise
+            page_clause, page_params = build_page_clause(where_clauses, params, "d.drug_id", limit, offset, after)
+            total = await count_total(cursor, "Drugs", "d", where_clauses, params, count, count_cache)
+
+        # Get drugs
+        query = f"{select} {page_clause}"
+        # The whole page comes back with the execute; rows are built as dicts while fetched
+        cursor.arraysize = cursor.prefetchrows = limit + 1
+        await cursor.execute(query, page_params)
+        cursor.rowfactory = row_factory(selected, {"drug_allergies": varray_to_list})
+        drugs = await cursor.fetchall()
+        if matches is None:
+            next_page = next_cursor(drugs, "drug_id", limit)
+
+        return FastJSONResponse({"total": total, "drugs": drugs, "next": next_page})
 
     except oracledb.DatabaseError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -117,17 +276,18 @@ async def get_drugs(
 
 
 @router.get("/{drug_id}", response_model=DrugResponse)
-async def get_drug(drug_id: int, request: Request):
+async def get_drug(drug_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Get a specific drug by ID"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        drug = get_drug_by_id(cursor, drug_id)
+        drug = await get_drug_by_id(cursor, drug_id)
 
         if not drug:
             raise HTTPException(status_code=404, detail=f"Drug with ID {drug_id} not found")
 
-        return DrugResponse(**drug)
+        # Trusted database output: sent without re-validating it against DrugResponse
+        return FastJSONResponse(drug)
 
     except oracledb.DatabaseError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -136,80 +296,98 @@ async def get_drug(drug_id: int, request: Request):
 
 
 @router.put("/{drug_id}", response_model=DrugResponse)
-async def update_drug(drug_id: int, drug: DrugUpdate, request: Request):
+async def update_drug(drug_id: int, drug: DrugUpdate, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Update an existing drug"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Check if drug exists
-        existing = get_drug_by_id(cursor, drug_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail=f"Drug with ID {drug_id} not found")
-
         # Build update query for only provided fields
         update_fields = []
         params = {"drug_id": drug_id}
 
         if drug.drug_name is not None:
-            update_fields.append("d.drug_name = :drug_name")
+            update_fields.append(queries.DRUG_UPDATE_SET["drug_name"])
             params["drug_name"] = drug.drug_name
 
         if drug.drug_description is not None:
-            update_fields.append("d.drug_description = :drug_description")
+            update_fields.append(queries.DRUG_UPDATE_SET["drug_description"])
             params["drug_description"] = drug.drug_description
 
         if drug.drug_allergies is not None:
-            # Build the AllergyListType constructor in SQL
-            if drug.drug_allergies:
-                escaped_allergies = [a.replace("'", "''") for a in drug.drug_allergies]
-                allergy_list = ", ".join([f"'{a}'" for a in escaped_allergies])
-                update_fields.append(f"d.drug_allergies = AllergyListType({allergy_list})")
-            else:
-                update_fields.append("d.drug_allergies = NULL")
+            # Bound as an AllergyListType object (NULL for an empty list)
+            update_fields.append(queries.DRUG_UPDATE_SET["drug_allergies"])
+            params["drug_allergies"] = await create_varray(cursor, "AllergyListType", drug.drug_allergies)
 
         if not update_fields:
             # No fields to update, return existing drug
+            existing = await get_drug_by_id(cursor, drug_id)
+            if not existing:
+                raise HTTPException(status_code=404, detail=f"Drug with ID {drug_id} not found")
             return DrugResponse(**existing)
 
-        update_query = f"""
-            UPDATE Drugs d
-            SET {', '.join(update_fields)}
-            WHERE d.drug_id = :drug_id
-        """
-        cursor.execute(update_query, params)
-        request.app.state.connection.commit()
+        # The updated row comes back with the UPDATE itself; no row means no such drug.
+        # Columns that were just written are echoed from the request instead.
+        allergy_type = await get_object_type(connection, "AllergyListType")
+        returned_columns = {"drug_id": int, "drug_name": str}
+        if drug.drug_description is None:
+            returned_columns["drug_description"] = oracledb.DB_TYPE_CLOB
+        if drug.drug_allergies is None:
+            returned_columns["drug_allergies"] = allergy_type
+        returning_clause, returned = returning_into(cursor, "d", returned_columns)
+        if drug.drug_allergies is not None:
+            cursor.setinputsizes(drug_allergies=allergy_type)
+
+        update_query = queries.UPDATE.format(
+            table="Drugs", alias="d", assignments=", ".join(update_fields), id_field="drug_id", returning=returning_clause
+        )
+        with autocommit(connection):
+            await cursor.execute(update_query, {**params, **returned})
+        drug_cache.invalidate(drug_id)
+
+        updated_drug = returned_row(returned)
+        if not updated_drug:
+            raise HTTPException(status_code=404, detail=f"Drug with ID {drug_id} not found")
+        count_cache.invalidate()
+        await result_cache.invalidate("Drugs")
 
-        # Fetch and return updated drug
-        updated_drug = get_drug_by_id(cursor, drug_id)
+        if drug.drug_description is None:
+            updated_drug["drug_description"] = await read_clob(updated_drug["drug_description"])
+        else:
+            updated_drug["drug_description"] = drug.drug_description
+        if drug.drug_allergies is None:
+            updated_drug["drug_allergies"] = varray_to_list(updated_drug["drug_allergies"])
+        else:
+            updated_drug["drug_allergies"] = drug.drug_allergies
+        drug_search.add(drug_id, updated_drug["drug_name"], updated_drug["drug_description"])
         return DrugResponse(**updated_drug)
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
+        await connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
 
 
 @router.delete("/{drug_id}", status_code=204)
-async def delete_drug(drug_id: int, request: Request):
+async def delete_drug(drug_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Delete a drug"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Check if drug exists
-        existing = get_drug_by_id(cursor, drug_id)
-        if not existing:
+        # Delete drug; the affected row count tells whether it existed
+        with autocommit(connection):
+            await cursor.execute(queries.DRUG_DELETE, {"drug_id": drug_id})
+        drug_cache.invalidate(drug_id)
+        if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"Drug with ID {drug_id} not found")
-
-        # Delete drug
-        delete_query = "DELETE FROM Drugs d WHERE d.drug_id = :drug_id"
-        cursor.execute(delete_query, {"drug_id": drug_id})
-        request.app.state.connection.commit()
+        count_cache.invalidate()
+        await result_cache.invalidate("Drugs")
+        drug_search.remove(drug_id)
 
         return None
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
+        await connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
@@ -0,0 +1,49 @@
+"""Future work ingest endpoints"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+import oracledb
+
+from app.models.future_work import FutureWorkCreate
+from app.db_utils import get_object_type
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert, reference_check
+from app import queries
+
+router = APIRouter(prefix="/api/future-works", tags=["future works"])
+
+
+@router.post("/bulk", response_model=dict)
+async def create_future_works_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many future works at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    The suggesting conditions of each batch are checked with one query and the
+    collection is built from their IDs by the INSERT itself. Records referencing
+    unknown conditions are reported by index without failing the rest.
+    """
+    try:
+        id_list_type = await get_object_type(connection, "SYS.ODCINUMBERLIST")
+
+        def bind_params(future_work: FutureWorkCreate, future_work_id: int) -> dict:
+            return {
+                "future_work_id": future_work_id,
+                "future_work_description": future_work.future_work_description,
+                "condition_ids": id_list_type.newobject(future_work.suggested_by_condition_ids),
+            }
+
+        return await bulk_insert(
+            connection,
+            request,
+            FutureWorkCreate,
+            "future_work_seq",
+            queries.FUTURE_WORK_BULK_INSERT,
+            bind_params,
+            input_sizes={"condition_ids": id_list_type},
+            check_batch=reference_check(connection, {"suggested_by_condition_ids": "Conditions"}),
+        )
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        await result_cache.invalidate("FutureWorks")
@@ -1,43 +1,88 @@
 """Special operation endpoints as per WHO requirements"""
-from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
 import oracledb
+import pydantic_core
+import time
 
-from app.db_utils import varray_to_list, read_clob
+from app.db_utils import varray_to_list, read_clob, autocommit
+from app.database import ConnectionFactory, get_connection, get_connection_factory, acquire_connection
+from app.cache import result_cache
+from app.export import export_query
+from app.responses import FastJSONResponse
+from app.density import TISSUE_DENSITY_INDEX, tissue_density_index, op2_response
+from app import metrics, queries
 
 router = APIRouter(prefix="/api/operations", tags=["operations"])
 
+# Tables each cached operation reads; writes to any of them invalidate its results
+OP2_TABLES = ("Tissues",)
+OP4_TABLES = ("FutureWorks", "Conditions", "Donors", "Tissues", "Diseases")
+OP5_TABLES = ("ResearcherSuggestions", "FutureWorks")
+
+
+async def run_cached(
+    request: Request,
+    operation: str,
+    params: Dict[str, Any],
+    tables: Iterable[str],
+    compute: Callable[..., Awaitable[Dict]],
+) -> FastJSONResponse:
+    """Serve an operation from the result cache, computing it on a miss
+
+    A pooled connection is only acquired on a miss, so hits never touch the database.
+    Results are cached already encoded, so hits are sent without serializing again.
+    """
+    key = (operation, tuple(sorted(params.items())))
+    result = await result_cache.get(key)
+    metrics.RESULT_CACHE_REQUESTS.inc(operation=operation, result="miss" if result is None else "hit")
+    if result is None:
+        started_at = time.time()
+        async with acquire_connection(request) as connection:
+            started = time.perf_counter()
+            result = pydantic_core.to_json(await compute(connection, **params))
+            metrics.OPERATION_DURATION.observe(time.perf_counter() - started, operation=operation)
+        await result_cache.set(key, result, tables, started_at)
+    return FastJSONResponse(result)
+
 
 @router.get("/tissues-by-density")
 async def get_tissues_by_density(
     request: Request,
     max_density: float = Query(..., description="Maximum density threshold"),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$", description="ndjson/csv stream the rows"),
+    connect: ConnectionFactory = Depends(get_connection_factory),
 ):
     """
     Operation 2: Print all organs and tissues below a certain density threshold
     Frequency: Once a month
     """
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    if export_format != "json":
+        return await export_query(
+            await connect(), queries.OP2_QUERY, {"max_density": max_density}, export_format, "tissues-by-density"
+        )
+    if TISSUE_DENSITY_INDEX:
+        # Binary search in the in-process density index; a connection is only needed to fill it
+        if not tissue_density_index.ready:
+            async with acquire_connection(request) as connection:
+                await tissue_density_index.load(connection)
+        return FastJSONResponse(op2_response(max_density, tissue_density_index.below(max_density)))
+    return await run_cached(request, "op2", {"max_density": max_density}, OP2_TABLES, query_tissues_by_density)
+
+
+async def query_tissues_by_density(connection: oracledb.AsyncConnection, max_density: float) -> Dict:
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        query = """
-            SELECT t.tissue_id,
-                   t.tissue_name,
-                   t.tissue_description,
-                   t.tissue_density,
-                   t.tissue_is_vital
-            FROM Tissues t
-            WHERE t.tissue_density < :max_density
-            ORDER BY t.tissue_density ASC
-        """
-        cursor.execute(query, {"max_density": max_density})
+        await cursor.execute(queries.OP2_QUERY, {"max_density": max_density})
 
         tissues = []
-        for row in cursor:
+        async for row in cursor:
             tissues.append(
                 {
                     "tissue_id": row[0],
                     "tissue_name": row[1],
-                    "tissue_description": read_clob(row[2]),
+                    "tissue_description": await read_clob(row[2]),
                     "tissue_density": row[3],
                     "tissue_is_vital": row[4],
                 }
@@ -56,37 +101,26 @@ async def get_tissues_by_density(
 
 
 @router.get("/cure-details/{cure_id}")
-async def get_cure_details(cure_id: int, request: Request):
+async def get_cure_details(cure_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """
     Operation 3: Request information on a specific cure, its list of drugs and possible linked allergies
     Frequency: Once a day
     """
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Query based on the SQL from README
-        query = """
-            SELECT cu.cure_id,
-                   DEREF(VALUE(d)).drug_id         AS drug_id,
-                   DEREF(VALUE(d)).drug_name       AS drug_name,
-                   DEREF(VALUE(d)).drug_description AS drug_description,
-                   DEREF(VALUE(d)).drug_allergies  AS drug_allergies
-            FROM   Cures cu,
-                   TABLE(cu.cure_composition) d
-            WHERE  cu.cure_id = :cure_id
-        """
-        cursor.execute(query, {"cure_id": cure_id})
+        await cursor.execute(queries.OP3_QUERY, {"cure_id": cure_id})
 
         drugs = []
         all_allergies = set()
 
-        for row in cursor:
+        async for row in cursor:
             allergies = varray_to_list(row[4])
             drugs.append(
                 {
                     "drug_id": row[1],
                     "drug_name": row[2],
-                    "drug_description": read_clob(row[3]),
+                    "drug_description": await read_clob(row[3]),
                     "drug_allergies": allergies,
                 }
             )
@@ -111,47 +145,38 @@ async def get_cure_details(cure_id: int, request: Request):
 async def get_donors_vital_disease(
     request: Request,
     disease_id: int = Query(..., description="The specific disease to filter by"),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$", description="ndjson/csv stream flat rows"),
+    connect: ConnectionFactory = Depends(get_connection_factory),
 ):
     """
     Operation 4: Print all donors with a specific disease affecting only organs/tissue required for life
     for which the system provided useful suggestions as future works
     Frequency: Once a month
     """
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    if export_format != "json":
+        return await export_query(
+            await connect(), queries.OP4_QUERY, {"disease_id": disease_id}, export_format, "donors-vital-disease"
+        )
+    return await run_cached(request, "op4", {"disease_id": disease_id}, OP4_TABLES, query_donors_vital_disease)
+
+
+async def query_donors_vital_disease(connection: oracledb.AsyncConnection, disease_id: int) -> Dict:
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Query based on the SQL from README
-        query = """
-            SELECT DISTINCT
-                DEREF(A.condition.donor_ref).donor_id AS donor_id,
-                DEREF(A.condition.donor_ref).donor_name AS donor_name,
-                DEREF(A.condition.donor_ref).donor_surname AS donor_surname,
-                DEREF(A.condition.donor_ref).donor_date_of_birth AS donor_date_of_birth,
-                DEREF(A.condition.donor_ref).donor_sex AS donor_sex,
-                DEREF(A.condition.tissue_ref).tissue_id AS tissue_id,
-                DEREF(A.condition.tissue_ref).tissue_name AS tissue_name,
-                DEREF(A.condition.tissue_ref).tissue_is_vital AS tissue_is_vital,
-                DEREF(A.condition.condition_disease).disease_name AS disease_name
-            FROM (
-              SELECT DEREF(VALUE(f)) AS condition
-              FROM FutureWorks fw,
-                   TABLE(fw.future_work_suggested_by) f
-            ) A
-            WHERE
-            DEREF(A.condition.tissue_ref).tissue_is_vital = 'Y'
-            AND DEREF(A.condition.condition_disease).disease_id = :disease_id
-        """
-        cursor.execute(query, {"disease_id": disease_id})
+        await cursor.execute(queries.OP4_QUERY, {"disease_id": disease_id})
 
         donors_map = {}
+        seen_tissues = set()
         disease_name = None
 
-        for row in cursor:
+        async for row in cursor:
             donor_id = row[0]
             disease_name = row[8]
 
-            if donor_id not in donors_map:
-                donors_map[donor_id] = {
+            donor = donors_map.get(donor_id)
+            if donor is None:
+                donor = donors_map[donor_id] = {
                     "donor_id": donor_id,
                     "donor_name": row[1],
                     "donor_surname": row[2],
@@ -160,10 +185,11 @@ async def get_donors_vital_disease(
                     "affected_vital_tissues": [],
                 }
 
-            # Add tissue if not already added
+            # Several conditions of a donor may affect the same tissue
             tissue_id = row[5]
-            if not any(t["tissue_id"] == tissue_id for t in donors_map[donor_id]["affected_vital_tissues"]):
-                donors_map[donor_id]["affected_vital_tissues"].append(
+            if (donor_id, tissue_id) not in seen_tissues:
+                seen_tissues.add((donor_id, tissue_id))
+                donor["affected_vital_tissues"].append(
                     {
                         "tissue_id": tissue_id,
                         "tissue_name": row[6],
@@ -187,45 +213,35 @@ async def get_donors_vital_disease(
 async def get_top_researchers_suggestions(
     request: Request,
     quality: str = Query("top", regex="^(top|middle|low)$", description="Journal quality filter"),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$", description="ndjson/csv stream flat rows"),
+    connect: ConnectionFactory = Depends(get_connection_factory),
 ):
     """
     Operation 5: Print all useful suggestions provided to only researchers with top quality journals published
     Frequency: Once a month
     """
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    if export_format != "json":
+        return await export_query(
+            await connect(), queries.OP5_QUERY, {"quality": quality}, export_format, "top-researchers-suggestions"
+        )
+    return await run_cached(request, "op5", {"quality": quality}, OP5_TABLES, query_top_researchers_suggestions)
+
+
+async def query_top_researchers_suggestions(connection: oracledb.AsyncConnection, quality: str) -> Dict:
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Query based on the SQL from README
-        query = """
-            SELECT r.researcher_id,
-                   r.researcher_name,
-                   r.researcher_surname,
-                   r.researcher_email,
-                   r.researcher_institution,
-                   p.publication_doi,
-                   p.publication_title,
-                   p.publication_journal,
-                   p.publication_journal_quality,
-                   fw.future_work_id,
-                   fw.future_work_description
-            FROM   Publications p,
-                   TABLE(p.publication_authors) auth_tab,
-                   Researchers r,
-                   TABLE(r.researcher_recommended_works) rw,
-                   FutureWorks fw
-            WHERE  r.researcher_id = DEREF(VALUE(auth_tab)).researcher_id
-              AND  fw.future_work_id = DEREF(VALUE(rw)).future_work_id
-              AND  p.publication_journal_quality = :quality
-        """
-        cursor.execute(query, {"quality": quality})
+        await cursor.execute(queries.OP5_QUERY, {"quality": quality})
 
         researchers_map = {}
+        seen_items = set()
 
-        for row in cursor:
+        async for row in cursor:
             researcher_id = row[0]
 
-            if researcher_id not in researchers_map:
-                researchers_map[researcher_id] = {
+            researcher = researchers_map.get(researcher_id)
+            if researcher is None:
+                researcher = researchers_map[researcher_id] = {
                     "researcher_id": researcher_id,
                     "researcher_name": row[1],
                     "researcher_surname": row[2],
@@ -235,25 +251,26 @@ async def get_top_researchers_suggestions(
                     "suggested_future_works": [],
                 }
 
-            # Add publication if not already added
-            pub_doi = row[5]
-            if not any(p["publication_doi"] == pub_doi for p in researchers_map[researcher_id]["top_publications"]):
-                researchers_map[researcher_id]["top_publications"].append(
+            # A researcher may author the same publication, or be recommended the same work, twice
+            item_key = (researcher_id, row[5], row[6] if row[5] == "P" else row[10])
+            if item_key in seen_items:
+                continue
+            seen_items.add(item_key)
+
+            if row[5] == "P":
+                researcher["top_publications"].append(
                     {
-                        "publication_doi": pub_doi,
-                        "publication_title": row[6],
-                        "publication_journal": row[7],
-                        "publication_journal_quality": row[8],
+                        "publication_doi": row[6],
+                        "publication_title": row[7],
+                        "publication_journal": row[8],
+                        "publication_journal_quality": row[9],
                     }
                 )
-
-            # Add future work if not already added
-            fw_id = row[9]
-            if not any(fw["future_work_id"] == fw_id for fw in researchers_map[researcher_id]["suggested_future_works"]):
-                researchers_map[researcher_id]["suggested_future_works"].append(
+            else:
+                researcher["suggested_future_works"].append(
                     {
-                        "future_work_id": fw_id,
-                        "future_work_description": read_clob(row[10]),
+                        "future_work_id": row[10],
+                        "future_work_description": await read_clob(row[11]),
                     }
                 )
 
@@ -266,3 +283,25 @@ async def get_top_researchers_suggestions(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
+
+
+@router.post("/top-researchers-suggestions/refresh")
+async def refresh_top_researchers_suggestions(
+    quality: Optional[str] = Query(None, regex="^(top|middle|low)$", description="Only rebuild this journal quality"),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Rebuild the Operation 5 summary after publications, researchers or future works changed"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        with autocommit(connection):
+            await cursor.execute(queries.OP5_REFRESH, {"quality": quality})
+        await result_cache.invalidate("ResearcherSuggestions")
+
+        return {"refreshed": quality or "all"}
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
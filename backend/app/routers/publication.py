@@ -0,0 +1,68 @@
+"""Publication ingest endpoints"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+import oracledb
+
+from app.models.publication import PublicationCreate
+from app.db_utils import get_object_type, autocommit
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert, reference_check
+from app import queries
+
+router = APIRouter(prefix="/api/publications", tags=["publications"])
+
+
+@router.post("/bulk", response_model=dict)
+async def create_publications_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many publications at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    Publications are keyed by their DOI, returned in `ids`. The authors and proposed
+    works of each batch are checked with one query per table and both collections are
+    built from their IDs by the INSERT itself. The OP5 summary of every journal quality
+    present in the request is rebuilt once all batches are in.
+    """
+    cursor: oracledb.AsyncCursor = connection.cursor()
+    qualities = set()
+
+    try:
+        id_list_type = await get_object_type(connection, "SYS.ODCINUMBERLIST")
+
+        def bind_params(publication: PublicationCreate, doi: str) -> dict:
+            qualities.add(publication.publication_journal_quality)
+            return {
+                "publication_doi": doi,
+                "publication_title": publication.publication_title,
+                "publication_journal": publication.publication_journal,
+                "publication_year": publication.publication_year,
+                "publication_journal_quality": publication.publication_journal_quality,
+                "author_ids": id_list_type.newobject(publication.author_ids),
+                "future_work_ids": id_list_type.newobject(publication.proposed_work_ids),
+            }
+
+        result = await bulk_insert(
+            connection,
+            request,
+            PublicationCreate,
+            None,
+            queries.PUBLICATION_BULK_INSERT,
+            bind_params,
+            input_sizes={"author_ids": id_list_type, "future_work_ids": id_list_type},
+            check_batch=reference_check(
+                connection, {"author_ids": "Researchers", "proposed_work_ids": "FutureWorks"}
+            ),
+            record_key=lambda publication: publication.publication_doi,
+        )
+
+        with autocommit(connection):
+            for quality in sorted(qualities):
+                await cursor.execute(queries.OP5_REFRESH, {"quality": quality})
+
+        return result
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+        # Earlier batches are already committed even if a later one failed
+        await result_cache.invalidate("Publications", "ResearcherSuggestions")
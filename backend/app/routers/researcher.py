@@ -0,0 +1,53 @@
+"""Researcher ingest endpoints"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+import oracledb
+
+from app.models.researcher import ResearcherCreate
+from app.db_utils import get_object_type
+from app.database import get_connection
+from app.cache import result_cache
+from app.bulk import bulk_insert, reference_check
+from app import queries
+
+router = APIRouter(prefix="/api/researchers", tags=["researchers"])
+
+
+@router.post("/bulk", response_model=dict)
+async def create_researchers_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many researchers at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    The recommended works of each batch are checked with one query and the collection
+    is built from their IDs by the INSERT itself. Records referencing unknown future
+    works are reported by index without failing the rest.
+    """
+    try:
+        id_list_type = await get_object_type(connection, "SYS.ODCINUMBERLIST")
+
+        def bind_params(researcher: ResearcherCreate, researcher_id: int) -> dict:
+            return {
+                "researcher_id": researcher_id,
+                "researcher_name": researcher.researcher_name,
+                "researcher_surname": researcher.researcher_surname,
+                "researcher_email": researcher.researcher_email,
+                "researcher_institution": researcher.researcher_institution,
+                "future_work_ids": id_list_type.newobject(researcher.recommended_work_ids),
+            }
+
+        # A new researcher has no publication yet, so the OP5 summary is unaffected
+        return await bulk_insert(
+            connection,
+            request,
+            ResearcherCreate,
+            "researcher_seq",
+            queries.RESEARCHER_BULK_INSERT,
+            bind_params,
+            input_sizes={"future_work_ids": id_list_type},
+            check_batch=reference_check(connection, {"recommended_work_ids": "FutureWorks"}),
+        )
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        await result_cache.invalidate("Researchers")
@@ -1,54 +1,101 @@
 """Tissue CRUD endpoints"""
-from fastapi import APIRouter, HTTPException, Request, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Body
+from typing import List, Optional
 import oracledb
 
 from app.models.tissue import TissueCreate, TissueResponse, TissueUpdate
-from app.db_utils import get_tissue_by_id, read_clob
+from app.db_utils import get_tissue_by_id, get_tissues_by_ids, read_clob, autocommit, returning_into, returned_row
+from app.database import get_connection
+from app.cache import result_cache, tissue_cache
+from app.bulk import bulk_insert
+from app.export import export_query
+from app import queries
+from app.projection import select_fields, select_list, select_ids, parse_ids, lookup_result, row_factory
+from app.responses import FastJSONResponse
+from app.pagination import build_page_clause, next_cursor, count_total, new_count_cache
+from app.density import tissue_density_index
 
 router = APIRouter(prefix="/api/tissues", tags=["tissues"])
 
+# Exact list totals, invalidated by every write below (as are cached operation results
+# and, on update and delete, the cached record even if it no longer exists)
+count_cache = new_count_cache()
+
 
 @router.post("", response_model=TissueResponse, status_code=201)
-async def create_tissue(tissue: TissueCreate, request: Request):
+async def create_tissue(tissue: TissueCreate, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Create a new tissue/organ (Operation 1: Recording an organ or tissue - 10 times a day)"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Get next tissue_id from sequence
-        cursor.execute("SELECT tissue_seq.NEXTVAL FROM DUAL")
-        tissue_id = cursor.fetchone()[0]
-
-        # Insert using object type constructor
-        insert_query = """
-            INSERT INTO Tissues VALUES (
-                TissueType(
-                    :tissue_id,
-                    :tissue_name,
-                    :tissue_description,
-                    :tissue_density,
-                    :tissue_is_vital
-                )
+        # Insert using object type constructor; the new tissue_id is drawn from the
+        # sequence and returned by the same statement, committed in the same round-trip
+        tissue_id = cursor.var(int)
+        with autocommit(connection):
+            await cursor.execute(
+                queries.TISSUE_INSERT,
+                {
+                    "tissue_id": tissue_id,
+                    "tissue_name": tissue.tissue_name,
+                    "tissue_description": tissue.tissue_description,
+                    "tissue_density": tissue.tissue_density,
+                    "tissue_is_vital": tissue.tissue_is_vital,
+                },
             )
-        """
-        cursor.execute(
-            insert_query,
-            {
-                "tissue_id": tissue_id,
-                "tissue_name": tissue.tissue_name,
-                "tissue_description": tissue.tissue_description,
-                "tissue_density": tissue.tissue_density,
-                "tissue_is_vital": tissue.tissue_is_vital,
-            },
+        count_cache.invalidate()
+        await result_cache.invalidate("Tissues")
+        created = TissueResponse(tissue_id=tissue_id.getvalue()[0], **tissue.model_dump())
+        tissue_density_index.add(created.model_dump())
+
+        return created
+
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        cursor.close()
+
+
+@router.post("/bulk", response_model=dict)
+async def create_tissues_bulk(request: Request, connection: oracledb.AsyncConnection = Depends(get_connection)):
+    """Create many tissues/organs at once from a JSON array or an NDJSON stream (application/x-ndjson)
+
+    Records are inserted in batches with one commit per batch; invalid or rejected
+    records are reported by index without failing the rest.
+    """
+    try:
+        return await bulk_insert(
+            connection,
+            request,
+            TissueCreate,
+            "tissue_seq",
+            queries.TISSUE_BULK_INSERT,
+            lambda tissue, tissue_id: {"tissue_id": tissue_id, **tissue.model_dump()},
         )
-        request.app.state.connection.commit()
 
-        # Fetch and return the created tissue
-        created_tissue = get_tissue_by_id(cursor, tissue_id)
-        return TissueResponse(**created_tissue)
+    except oracledb.DatabaseError as e:
+        await connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # Earlier batches are already committed even if a later one failed
+        count_cache.invalidate()
+        await result_cache.invalidate("Tissues")
+        tissue_density_index.invalidate()
+
+
+@router.post("/lookup", response_model=dict)
+async def lookup_tissues(
+    ids: List[int] = Body(..., embed=True),
+    connection: oracledb.AsyncConnection = Depends(get_connection),
+):
+    """Fetch many tissues by ID in one query (the body form of `GET /api/tissues?ids=`)"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+
+    try:
+        requested = select_ids(ids)
+        return FastJSONResponse(lookup_result(await get_tissues_by_ids(cursor, requested), requested, "tissues"))
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
@@ -56,62 +103,67 @@ async def create_tissue(tissue: TissueCreate, request: Request):
 
 @router.get("", response_model=dict)
 async def get_tissues(
-    request: Request,
+    connection: oracledb.AsyncConnection = Depends(get_connection),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    after: Optional[str] = Query(None, description="Page token from a previous response's `next` (overrides offset)"),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to compute `total`"),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$", description="ndjson/csv stream every matching row"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. to leave out descriptions)"),
+    ids: Optional[str] = Query(None, description="Comma-separated IDs to fetch in one query (returns the hits and `missing`)"),
     is_vital: Optional[str] = Query(None, regex="^[YN]$"),
     max_density: Optional[float] = None,
 ):
     """Get all tissues with optional filtering"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
+        if ids is not None:
+            # Multi-get: paging, counting and filters do not apply
+            requested = parse_ids(ids)
+            return FastJSONResponse(lookup_result(await get_tissues_by_ids(cursor, requested), requested, "tissues"))
+
         # Build query with optional filters
         where_clauses = []
         params = {}
 
         if is_vital:
-            where_clauses.append("t.tissue_is_vital = :is_vital")
+            where_clauses.append(queries.TISSUE_FILTERS["is_vital"])
             params["is_vital"] = is_vital
 
         if max_density is not None:
-            where_clauses.append("t.tissue_density < :max_density")
+            where_clauses.append(queries.TISSUE_FILTERS["max_density"])
             params["max_density"] = max_density
 
-        where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        selected = select_fields(fields, queries.TISSUE_FIELDS, "tissue_id")
+        columns = select_list(selected, queries.TISSUE_FIELDS)
+        select = queries.LIST_SELECT.format(columns=columns, table="Tissues", alias="t")
 
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM Tissues t {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()[0]
-
-        # Get tissues (use literal values for OFFSET/FETCH as Oracle doesn't support bind params there)
-        query = f"""
-            SELECT t.tissue_id,
-                   t.tissue_name,
-                   t.tissue_description,
-                   t.tissue_density,
-                   t.tissue_is_vital
-            FROM Tissues t
-            {where_clause}
-            ORDER BY t.tissue_id
-            OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY
-        """
-        cursor.execute(query, params)
-
-        tissues = []
-        for row in cursor:
-            tissues.append(
-                {
-                    "tissue_id": row[0],
-                    "tissue_name": row[1],
-                    "tissue_description": read_clob(row[2]),
-                    "tissue_density": row[3],
-                    "tissue_is_vital": row[4],
-                }
+        if export_format != "json":
+            # Export mode: no paging or total, every matching row is streamed
+            where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+            query = queries.LIST_EXPORT.format(
+                columns=columns, table="Tissues", alias="t", where=where_clause, id_column="t.tissue_id"
             )
+            return await export_query(connection, query, params, export_format, "tissues")
+
+        # Keyset page when an `after` token is given, OFFSET/FETCH otherwise
+        page_clause, page_params = build_page_clause(where_clauses, params, "t.tissue_id", limit, offset, after)
 
-        return {"total": total, "tissues": tissues}
+        # Get total count
+        total = await count_total(cursor, "Tissues", "t", where_clauses, params, count, count_cache)
+
+        # Get tissues
+        query = f"{select} {page_clause}"
+        # The whole page comes back with the execute; rows are built as dicts while fetched
+        cursor.arraysize = cursor.prefetchrows = limit + 1
+        await cursor.execute(query, page_params)
+        cursor.rowfactory = row_factory(selected)
+        tissues = await cursor.fetchall()
+
+        return FastJSONResponse(
+            {"total": total, "tissues": tissues, "next": next_cursor(tissues, "tissue_id", limit)}
+        )
 
     except oracledb.DatabaseError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -120,17 +172,18 @@ async def get_tissues(
 
 
 @router.get("/{tissue_id}", response_model=TissueResponse)
-async def get_tissue(tissue_id: int, request: Request):
+async def get_tissue(tissue_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Get a specific tissue by ID"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        tissue = get_tissue_by_id(cursor, tissue_id)
+        tissue = await get_tissue_by_id(cursor, tissue_id)
 
         if not tissue:
             raise HTTPException(status_code=404, detail=f"Tissue with ID {tissue_id} not found")
 
-        return TissueResponse(**tissue)
+        # Trusted database output: sent without re-validating it against TissueResponse
+        return FastJSONResponse(tissue)
 
     except oracledb.DatabaseError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -139,79 +192,98 @@ async def get_tissue(tissue_id: int, request: Request):
 
 
 @router.put("/{tissue_id}", response_model=TissueResponse)
-async def update_tissue(tissue_id: int, tissue: TissueUpdate, request: Request):
+async def update_tissue(tissue_id: int, tissue: TissueUpdate, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Update an existing tissue"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Check if tissue exists
-        existing = get_tissue_by_id(cursor, tissue_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail=f"Tissue with ID {tissue_id} not found")
-
         # Build update query for only provided fields
         update_fields = []
         params = {"tissue_id": tissue_id}
 
         if tissue.tissue_name is not None:
-            update_fields.append("t.tissue_name = :tissue_name")
+            update_fields.append(queries.TISSUE_UPDATE_SET["tissue_name"])
             params["tissue_name"] = tissue.tissue_name
 
         if tissue.tissue_description is not None:
-            update_fields.append("t.tissue_description = :tissue_description")
+            update_fields.append(queries.TISSUE_UPDATE_SET["tissue_description"])
             params["tissue_description"] = tissue.tissue_description
 
         if tissue.tissue_density is not None:
-            update_fields.append("t.tissue_density = :tissue_density")
+            update_fields.append(queries.TISSUE_UPDATE_SET["tissue_density"])
             params["tissue_density"] = tissue.tissue_density
 
         if tissue.tissue_is_vital is not None:
-            update_fields.append("t.tissue_is_vital = :tissue_is_vital")
+            update_fields.append(queries.TISSUE_UPDATE_SET["tissue_is_vital"])
             params["tissue_is_vital"] = tissue.tissue_is_vital
 
         if not update_fields:
             # No fields to update, return existing tissue
+            existing = await get_tissue_by_id(cursor, tissue_id)
+            if not existing:
+                raise HTTPException(status_code=404, detail=f"Tissue with ID {tissue_id} not found")
             return TissueResponse(**existing)
 
-        update_query = f"""
-            UPDATE Tissues t
-            SET {', '.join(update_fields)}
-            WHERE t.tissue_id = :tissue_id
-        """
-        cursor.execute(update_query, params)
-        request.app.state.connection.commit()
+        # The updated row comes back with the UPDATE itself; no row means no such tissue
+        returned_columns = {
+            "tissue_id": int,
+            "tissue_name": str,
+            "tissue_density": float,
+            "tissue_is_vital": str,
+        }
+        if tissue.tissue_description is None:
+            # Only return the CLOB (and pay for reading it) when it was not just written
+            returned_columns["tissue_description"] = oracledb.DB_TYPE_CLOB
+        returning_clause, returned = returning_into(cursor, "t", returned_columns)
+
+        update_query = queries.UPDATE.format(
+            table="Tissues", alias="t", assignments=", ".join(update_fields), id_field="tissue_id", returning=returning_clause
+        )
+        with autocommit(connection):
+            await cursor.execute(update_query, {**params, **returned})
+        tissue_cache.invalidate(tissue_id)
+
+        updated_tissue = returned_row(returned)
+        if not updated_tissue:
+            raise HTTPException(status_code=404, detail=f"Tissue with ID {tissue_id} not found")
+        count_cache.invalidate()
+        await result_cache.invalidate("Tissues")
 
-        # Fetch and return updated tissue
-        updated_tissue = get_tissue_by_id(cursor, tissue_id)
-        return TissueResponse(**updated_tissue)
+        if tissue.tissue_description is None:
+            updated_tissue["tissue_description"] = await read_clob(updated_tissue["tissue_description"])
+        else:
+            updated_tissue["tissue_description"] = tissue.tissue_description
+        updated = TissueResponse(**updated_tissue)
+        tissue_density_index.add(updated.model_dump())
+        return updated
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
+        await connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
 
 
 @router.delete("/{tissue_id}", status_code=204)
-async def delete_tissue(tissue_id: int, request: Request):
+async def delete_tissue(tissue_id: int, connection: oracledb.AsyncConnection = Depends(get_connection)):
     """Delete a tissue"""
-    cursor: oracledb.Cursor = request.app.state.connection.cursor()
+    cursor: oracledb.AsyncCursor = connection.cursor()
 
     try:
-        # Check if tissue exists
-        existing = get_tissue_by_id(cursor, tissue_id)
-        if not existing:
+        # Delete tissue; the affected row count tells whether it existed
+        with autocommit(connection):
+            await cursor.execute(queries.TISSUE_DELETE, {"tissue_id": tissue_id})
+        tissue_cache.invalidate(tissue_id)
+        if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"Tissue with ID {tissue_id} not found")
-
-        # Delete tissue
-        delete_query = "DELETE FROM Tissues t WHERE t.tissue_id = :tissue_id"
-        cursor.execute(delete_query, {"tissue_id": tissue_id})
-        request.app.state.connection.commit()
+        count_cache.invalidate()
+        await result_cache.invalidate("Tissues")
+        tissue_density_index.remove(tissue_id)
 
         return None
 
     except oracledb.DatabaseError as e:
-        request.app.state.connection.rollback()
+        await connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     finally:
         cursor.close()
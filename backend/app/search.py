@@ -0,0 +1,233 @@
+"""Drug search: Oracle Text when its indexes exist, an in-process trigram index otherwise
+
+DRUG_SEARCH_MODE picks the implementation: "text" (the CONTEXT indexes of
+scripts/schema.sql), "trigram" (matching in process) or "auto" (default: "text" if
+both indexes are valid, checked once per worker). Oracle Text matches words and the
+prefix of the last one; the trigram index matches substrings. In trigram mode the
+index is filled from Drugs on first use and kept in sync by the drug write
+endpoints; bulk loads and changes seen through CQN have it reloaded. Changes made by
+other workers or outside the API are picked up by reloading it once it is older than
+ENTITY_CACHE_TTL (0 reloads it for every search).
+"""
+import asyncio
+import bisect
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import oracledb
+from fastapi import HTTPException
+
+from app import queries
+from app.cache import ENTITY_CACHE_TTL
+from app.db_utils import read_clob
+
+DRUG_SEARCH_MODE = os.environ.get("DRUG_SEARCH_MODE", "auto")
+
+# Words of a search beyond this are ignored
+MAX_TERMS = 8
+
+# Most matched IDs bound in one statement (the capacity of a SYS.ODCINUMBERLIST)
+MAX_BOUND_MATCHES = 32767
+
+# Oracle Text operators that must be braced to be searched as words
+_RESERVED = {
+    "ABOUT", "ACCUM", "AND", "BT", "BTG", "BTI", "BTP", "EQUIV", "FUZZY", "HASPATH", "INPATH", "MDATA", "MINUS",
+    "NEAR", "NOT", "NT", "NTG", "NTI", "NTP", "OR", "PT", "RT", "SQE", "SYN", "TR", "TRSYN", "TT", "WITHIN",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def search_terms(text: str) -> List[str]:
+    """Lower-cased words (letters and digits) of a search, 400 when there are none"""
+    terms = [term.lower() for term in re.findall(r"[^\W_]+", text)][:MAX_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search text must contain a letter or a digit")
+    return terms
+
+
+def text_query(terms: List[str]) -> str:
+    """CONTAINS expression matching every term, the last one as a prefix (still being typed)"""
+    words = [f"{{{term}}}" for term in terms[:-1]]
+    last = terms[-1]
+    words.append(f"{{{last}}}" if len(last) < 2 or last.upper() in _RESERVED else f"{last}%")
+    return " AND ".join(words)
+
+
+def like_prefix(text: str) -> str:
+    """Upper-cased LIKE pattern for names starting with `text` (wildcards escaped)"""
+    escaped = text.upper().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Substring index over drug names and descriptions
+
+    A term of three characters or more only checks the drugs holding all of its
+    trigrams; shorter terms check every drug. Names are also kept sorted for prefix
+    lookups.
+    """
+
+    def __init__(self):
+        self._texts: Dict[int, Tuple[str, str, str]] = {}  # ID -> (name, lower name, lower description)
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._names: List[Tuple[str, int]] = []  # (upper name, ID), sorted
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, drug_id: int, name: str, description: Optional[str]) -> None:
+        """Index a drug, replacing what was indexed for its ID"""
+        self.remove(drug_id)
+        name_key, description_key = name.lower(), (description or "").lower()
+        self._texts[drug_id] = (name, name_key, description_key)
+        for trigram in _trigrams(name_key) | _trigrams(description_key):
+            self._postings[trigram].add(drug_id)
+        bisect.insort(self._names, (name.upper(), drug_id))
+
+    def remove(self, drug_id: int) -> None:
+        texts = self._texts.pop(drug_id, None)
+        if texts is None:
+            return
+        name, name_key, description_key = texts
+        for trigram in _trigrams(name_key) | _trigrams(description_key):
+            postings = self._postings[trigram]
+            postings.discard(drug_id)
+            if not postings:
+                del self._postings[trigram]
+        position = bisect.bisect_left(self._names, (name.upper(), drug_id))
+        del self._names[position]
+
+    def search(self, terms: List[str], limit: int) -> List[Tuple[int, str, int]]:
+        """Drugs containing every term, best first, as (ID, name, score 0-100)
+
+        A term scores 3 at the start of the name, 2 elsewhere in the name and 1 in the
+        description only.
+        """
+        matches = []
+        for drug_id in self._candidates(terms):
+            name, name_key, description_key = self._texts[drug_id]
+            points = 0
+            for term in terms:
+                if name_key.startswith(term):
+                    points += 3
+                elif term in name_key:
+                    points += 2
+                elif term in description_key:
+                    points += 1
+                else:
+                    break
+            else:
+                matches.append((drug_id, name, round(100 * points / (3 * len(terms)))))
+        matches.sort(key=lambda match: (-match[2], match[0]))
+        return matches[:limit]
+
+    def name_matches(self, terms: List[str]) -> List[int]:
+        """IDs of the drugs whose name contains every term, in ID order"""
+        return sorted(
+            drug_id
+            for drug_id in self._candidates(terms)
+            if all(term in self._texts[drug_id][1] for term in terms)
+        )
+
+    def prefix(self, text: str, limit: int) -> List[Tuple[int, str]]:
+        """Drugs whose name starts with `text` (case-insensitive), in name order"""
+        key = text.upper()
+        position = bisect.bisect_left(self._names, (key, 0))
+        found = []
+        for name_key, drug_id in self._names[position:position + limit]:
+            if not name_key.startswith(key):
+                break
+            found.append((drug_id, self._texts[drug_id][0]))
+        return found
+
+    def _candidates(self, terms: List[str]) -> Set[int]:
+        candidates: Optional[Set[int]] = None
+        for term in terms:
+            for trigram in _trigrams(term):
+                postings = self._postings.get(trigram, set())
+                candidates = set(postings) if candidates is None else candidates & postings
+                if not candidates:
+                    return set()
+        return set(self._texts) if candidates is None else candidates
+
+
+class DrugSearch:
+    """Search mode of this worker and, in trigram mode, its index"""
+
+    def __init__(self, mode: str = "auto"):
+        self.mode: Optional[str] = None if mode == "auto" else mode
+        self.index = TrigramIndex()
+        self._stale = True
+        self._loading = False
+        self._changed = False  # a write arrived while loading
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def _expired(self) -> bool:
+        return self._stale or time.monotonic() - self._loaded_at >= ENTITY_CACHE_TTL
+
+    async def prepare(self, cursor: oracledb.AsyncCursor) -> str:
+        """Resolve the mode on first use and (re)load the trigram index if needed"""
+        if self.mode is None:
+            await cursor.execute(queries.DRUG_TEXT_INDEXES)
+            self.mode = "text" if (await cursor.fetchone())[0] == 2 else "trigram"
+            logger.info("Drug search mode: %s", self.mode)
+        if self.mode == "trigram" and self._expired:
+            async with self._lock:
+                if self._expired:
+                    await self._load(cursor)
+        return self.mode
+
+    async def _load(self, cursor: oracledb.AsyncCursor) -> None:
+        started = time.monotonic()
+        self._loading, self._changed = True, False
+        index = TrigramIndex()
+        try:
+            cursor.arraysize = cursor.prefetchrows = 1000
+            await cursor.execute(queries.DRUG_SEARCH_ALL)
+            async for drug_id, name, description in cursor:
+                index.add(drug_id, name, await read_clob(description))
+        finally:
+            self._loading = False
+        # Published once complete (callers wait on the lock until then); writes made while
+        # loading may be missing from what was read, so they have it reloaded next time
+        self.index, self._stale, self._loaded_at = index, self._changed, started
+
+    def add(self, drug_id: int, name: str, description: Optional[str]) -> None:
+        """Index a created or updated drug (no-op in text mode, where the database syncs)"""
+        if self._loading:
+            self._changed = True
+        elif self.mode == "trigram" and not self._stale:
+            self.index.add(drug_id, name, description)
+
+    def remove(self, drug_id: int) -> None:
+        if self._loading:
+            self._changed = True
+        elif self.mode == "trigram" and not self._stale:
+            self.index.remove(drug_id)
+
+    def invalidate(self) -> None:
+        """Reload the index on next use (after bulk loads or changes made elsewhere)"""
+        self._stale = self._changed = True
+
+
+drug_search = DrugSearch(DRUG_SEARCH_MODE)
+
+
+async def warm_drug_search(connection: oracledb.AsyncConnection) -> None:
+    """Resolve the search mode (and fill the trigram index) before the first request"""
+    cursor: oracledb.AsyncCursor = connection.cursor()
+    try:
+        await drug_search.prepare(cursor)
+    finally:
+        cursor.close()
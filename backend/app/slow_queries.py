@@ -0,0 +1,109 @@
+"""Slow-query log: statements over SLOW_QUERY_MS with their execution plan
+
+Statements are timed by the connection wrapper of app.metrics (execute plus fetch
+time). A slow statement's plan is read with DBMS_XPLAN.DISPLAY_CURSOR on the same
+session before it runs anything else, so the session's previous statement is the
+slow one; its text is checked against V$SQL and the plan is left out when they
+differ. Entries go to the "app.slow_queries" logger as one JSON line and to a ring
+buffer served by GET /api/admin/slow-queries. Capturing plans requires SELECT access
+on V$SESSION, V$SQL and V$SQL_PLAN.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+import oracledb
+
+from app import queries
+
+# Statements taking at least this long (execute + fetch) are logged; 0 disables the log
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "1000"))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get("SLOW_QUERY_LOG_SIZE", "100"))
+
+logger = logging.getLogger(__name__)
+
+# Most recent slow queries, newest last
+slow_queries: Deque[Dict[str, Any]] = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+
+def is_slow(seconds: float) -> bool:
+    return SLOW_QUERY_MS > 0 and seconds * 1000 >= SLOW_QUERY_MS
+
+
+def new_entry(
+    name: str, statement: str, parameters: Any, execute_time: float, fetch_time: float, rows: int, route: str
+) -> Dict[str, Any]:
+    """Slow-query entry whose plan is still to be captured"""
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "route": route,
+        "query": name,
+        "sql_text": statement.strip(),
+        "binds": redact(parameters),
+        "duration_ms": round((execute_time + fetch_time) * 1000, 2),
+        "execute_ms": round(execute_time * 1000, 2),
+        "fetch_ms": round(fetch_time * 1000, 2),
+        "rows": rows,
+        "sql_id": None,
+        "child_number": None,
+        "plan": None,
+    }
+
+
+def redact(parameters: Any) -> Any:
+    """Bind values replaced by their type (and length), e.g. {"donor_name": "str(7)"}"""
+    if isinstance(parameters, dict):
+        return {name: _redact_value(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the binds of the first row stand for all of them
+            return {"rows": len(parameters), "first": redact(parameters[0])}
+        return [_redact_value(value) for value in parameters]
+    return None
+
+
+def _redact_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    if isinstance(value, oracledb.DbObject) and value.type.iscollection:
+        return f"{value.type.name}({len(value.aslist())})"
+    return type(value).__name__
+
+
+async def capture(connection: Any, entries: List[Dict[str, Any]]) -> None:
+    """Attach the plan of the session's previous statement to the entry it belongs to, then log all
+
+    Only the last entry can still be the session's previous statement.
+    """
+    if not entries:
+        return
+    entry = entries[-1]
+    cursor = connection.cursor()
+    try:
+        await cursor.execute(queries.PREVIOUS_STATEMENT)
+        row = await cursor.fetchone()
+        if row and _normalized(row[2]) == _normalized(entry["sql_text"]):
+            entry["sql_id"], entry["child_number"] = row[0], row[1]
+            await cursor.execute(queries.CURSOR_PLAN, {"sql_id": row[0], "child_number": row[1]})
+            entry["plan"] = [line for line, in await cursor.fetchall()]
+        else:
+            entry["plan_error"] = "The session ran another statement before the plan could be read"
+    except oracledb.Error as e:
+        entry["plan_error"] = str(e)
+    finally:
+        cursor.close()
+
+    for entry in entries:
+        slow_queries.append(entry)
+        logger.warning(json.dumps({"event": "slow_query", **entry}, default=str))
+    entries.clear()
+
+
+def _normalized(sql_text: str) -> str:
+    return re.sub(r"\s+", " ", sql_text or "").strip()
@@ -0,0 +1,194 @@
+"""Synthetic WHO dataset of configurable size
+
+Records are generated in the shape accepted by the bulk ingest endpoints, with
+references given as 1-based positions in the referenced list (i.e. the IDs a fresh
+schema assigns when the dataset is loaded in order). The same scale and seed always
+produce the same dataset.
+
+    python bench/dataset.py --scale 10000 --out bench/data
+"""
+import argparse
+import datetime
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+# Ingest order: every entity only references entities listed before it
+ENTITIES = (
+    "donors",
+    "tissues",
+    "drugs",
+    "cures",
+    "diseases",
+    "conditions",
+    "future_works",
+    "researchers",
+    "publications",
+)
+
+ALLERGIES = ("penicillin", "sulfa", "latex", "aspirin", "ibuprofen", "codeine", "iodine", "lactose", "gluten", "egg")
+QUALITIES = ("top", "middle", "low")
+QUALITY_WEIGHTS = (0.2, 0.5, 0.3)
+EFFECTS = ("improved", "worsened", "neutral")
+
+
+@dataclass
+class Dataset:
+    scale: int
+    seed: int
+    records: Dict[str, List[dict]] = field(default_factory=dict)
+
+    def __getitem__(self, entity: str) -> List[dict]:
+        return self.records[entity]
+
+    def counts(self) -> Dict[str, int]:
+        return {entity: len(self.records[entity]) for entity in ENTITIES}
+
+
+def generate(scale: int = 1000, seed: int = 42) -> Dataset:
+    """Generate a dataset with `scale` donors and proportionally sized other tables
+
+    Fan-out: 1-5 conditions per donor, 1-5 drugs per cure, 1-10 conditions per future
+    work, 1-5 recommended works per researcher, 3 publications per researcher with
+    1-6 authors and 0-3 proposed works.
+    """
+    rng = random.Random(seed)
+    text = _Text(rng)
+    data = Dataset(scale=scale, seed=seed)
+
+    data.records["donors"] = [
+        {
+            "donor_name": text.name(),
+            "donor_surname": text.name(),
+            "donor_date_of_birth": (datetime.date(1940, 1, 1) + datetime.timedelta(days=rng.randrange(30000))).isoformat(),
+            "donor_sex": rng.choice("MFX"),
+        }
+        for _ in range(scale)
+    ]
+    data.records["tissues"] = [
+        {
+            "tissue_name": f"Tissue {i}",
+            "tissue_description": text.sentence(20),
+            "tissue_density": round(rng.uniform(0.2, 2.0), 3),
+            "tissue_is_vital": "Y" if rng.random() < 0.4 else "N",
+        }
+        for i in range(1, min(500, max(20, scale // 50)) + 1)
+    ]
+    data.records["drugs"] = [
+        {
+            "drug_name": f"Drug {i}",
+            "drug_description": text.sentence(30),
+            "drug_allergies": rng.sample(ALLERGIES, rng.randint(0, 4)),
+        }
+        for i in range(1, max(20, scale // 20) + 1)
+    ]
+    drugs = len(data["drugs"])
+    data.records["cures"] = [
+        {"cure_description": text.sentence(25), "cure_drug_ids": _ids(rng, drugs, 1, 5)}
+        for _ in range(max(10, scale // 40))
+    ]
+    cures = len(data["cures"])
+    data.records["diseases"] = [
+        {
+            "disease_name": f"Disease {i}",
+            "disease_discovery": datetime.datetime(1900 + rng.randrange(120), rng.randint(1, 12), 1).isoformat(),
+            "disease_description": text.sentence(40),
+            "disease_treatable": "Y" if rng.random() < 0.7 else "N",
+            "disease_cure_id": rng.randint(1, cures) if rng.random() < 0.7 else None,
+        }
+        for i in range(1, max(10, scale // 100) + 1)
+    ]
+    diseases, tissues = len(data["diseases"]), len(data["tissues"])
+    conditions = []
+    for donor_id in range(1, scale + 1):
+        for _ in range(rng.randint(1, 5)):
+            diseased = rng.random() < 0.8
+            treated = diseased and rng.random() < 0.5
+            conditions.append(
+                {
+                    "condition_status": "disease" if diseased else "control",
+                    "condition_disease_id": rng.randint(1, diseases) if diseased else None,
+                    "donor_id": donor_id,
+                    "tissue_id": rng.randint(1, tissues),
+                    "treatment_id": rng.randint(1, cures) if treated else None,
+                    "treatment_effect": rng.choice(EFFECTS) if treated else None,
+                }
+            )
+    data.records["conditions"] = conditions
+    data.records["future_works"] = [
+        {"future_work_description": text.sentence(30), "suggested_by_condition_ids": _ids(rng, len(conditions), 1, 10)}
+        for _ in range(max(10, len(conditions) // 10))
+    ]
+    future_works = len(data["future_works"])
+    researchers = max(10, scale // 50)
+    data.records["researchers"] = [
+        {
+            "researcher_name": text.name(),
+            "researcher_surname": text.name(),
+            "researcher_email": f"researcher{i}@example.org",
+            "researcher_institution": f"Institute {rng.randint(1, 50)}",
+            "recommended_work_ids": _ids(rng, future_works, 1, 5),
+        }
+        for i in range(1, researchers + 1)
+    ]
+    data.records["publications"] = [
+        {
+            "publication_doi": f"10.5555/bench.{i}",
+            "publication_title": text.sentence(8),
+            "publication_journal": f"Journal {rng.randint(1, 40)}",
+            "publication_year": rng.randint(1990, 2025),
+            "publication_journal_quality": rng.choices(QUALITIES, QUALITY_WEIGHTS)[0],
+            "author_ids": _ids(rng, researchers, 1, 6),
+            "proposed_work_ids": _ids(rng, future_works, 0, 3),
+        }
+        for i in range(1, researchers * 3 + 1)
+    ]
+    return data
+
+
+def _ids(rng: random.Random, count: int, low: int, high: int) -> List[int]:
+    return sorted(rng.sample(range(1, count + 1), min(count, rng.randint(low, high))))
+
+
+class _Text:
+    """Pseudo-words, so descriptions have realistic lengths without a corpus"""
+
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+        self._syllables = ["ka", "lo", "mi", "ne", "ra", "to", "vu", "se", "di", "po", "an", "el", "or", "is"]
+
+    def word(self) -> str:
+        return "".join(self._rng.choices(self._syllables, k=self._rng.randint(1, 4)))
+
+    def name(self) -> str:
+        return self.word().capitalize()
+
+    def sentence(self, words: int) -> str:
+        return " ".join(self.word() for _ in range(words)).capitalize() + "."
+
+
+def write_ndjson(data: Dataset, directory: Path) -> None:
+    """Write one <entity>.ndjson file per entity, ready for the bulk endpoints"""
+    directory.mkdir(parents=True, exist_ok=True)
+    for entity in ENTITIES:
+        with open(directory / f"{entity}.ndjson", "w") as f:
+            for record in data[entity]:
+                f.write(json.dumps(record) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1000, help="Number of donors (other tables scale with it)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=Path("bench/data"))
+    args = parser.parse_args()
+
+    data = generate(args.scale, args.seed)
+    write_ndjson(data, args.out)
+    print(json.dumps(data.counts()))
+
+
+if __name__ == "__main__":
+    main()
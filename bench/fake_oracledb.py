@@ -0,0 +1,494 @@
+"""In-process stand-in for the python-oracledb pool/connection/cursor interface
+
+Serves a bench.dataset.Dataset from memory so the backend can be benchmarked on
+machines without Oracle. Statements are recognized by their name in
+app.queries.STATEMENTS (assembled list pages and counts by their shape), so the
+same code paths run as against the database. Every execute and every fetched
+batch of `arraysize` rows waits `latency` seconds to stand in for a round-trip.
+
+Timings measure the backend's own overhead (routing, validation, grouping,
+serialization) and round-trip counts, not query plans: use the Oracle XE
+container for those.
+"""
+import asyncio
+import datetime
+import itertools
+import re
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import oracledb
+
+from app import queries
+
+from dataset import Dataset
+
+_LIST_QUERY = re.compile(r"SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>\w+)\s+\w+\s", re.S)
+_COUNT_QUERY = re.compile(r"SELECT\s+(ROUND\()?COUNT\(\*\).*?FROM\s+(?P<table>\w+)", re.S)
+
+# List filters of queries.*_FILTERS, by bind name
+_FILTERS: Dict[str, Callable[[dict, Any], bool]] = {
+    "sex": lambda row, value: row["donor_sex"] == value,
+    "is_vital": lambda row, value: row["tissue_is_vital"] == value,
+    "max_density": lambda row, value: row["tissue_density"] < value,
+    "search": lambda row, value: all(
+        any(word.startswith(term) for word in re.findall(r"[^\W_]+", row["drug_name"].lower()))
+        for term in re.findall(r"[^\W_]+", value)
+    ),
+    "search_ids": lambda row, value: row["drug_id"] in value.aslist(),
+    "allergy": lambda row, value: value in {allergy.strip().lower() for allergy in row["drug_allergies"] or []},
+    # Bound to the IDs of the drugs with the allergy by FakeDatabase._assembled
+    "excluding_allergy": lambda row, drug_ids: drug_ids.isdisjoint(row["cure_drug_ids"]),
+}
+
+# Selected expression -> field, for list columns that are not plain alias.column
+_FIELD_EXPRESSIONS = {
+    expression: field
+    for fields in (queries.DONOR_FIELDS, queries.TISSUE_FIELDS, queries.DRUG_FIELDS, queries.CURE_FIELDS)
+    for field, expression in fields.items()
+}
+
+
+# Bind names of the *_BULK_INSERT statements that differ from the dataset fields
+_BULK_BINDS = {
+    "cure": {"drug_ids": "cure_drug_ids"},
+    "disease": {"cure_id": "disease_cure_id"},
+    "condition": {"disease_id": "condition_disease_id"},
+    "future_work": {"condition_ids": "suggested_by_condition_ids"},
+    "researcher": {"future_work_ids": "recommended_work_ids"},
+    "publication": {"future_work_ids": "proposed_work_ids"},
+}
+
+
+def _split_columns(select_list: str) -> List[str]:
+    """Split a select list on the commas outside parentheses"""
+    columns, depth, start = [], 0, 0
+    for position, char in enumerate(select_list):
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if char == "," and depth == 0:
+            columns.append(select_list[start:position])
+            start = position + 1
+    return columns + [select_list[start:]]
+
+
+class FakeCollection:
+    """Stands in for a DbObject collection (VARRAY, SYS.ODCI*LIST)"""
+
+    def __init__(self, values: Optional[List[Any]] = None):
+        self._values = list(values or [])
+
+    def aslist(self) -> List[Any]:
+        return list(self._values)
+
+
+class FakeObjectType:
+    def __init__(self, name: str):
+        self.name = name
+
+    def newobject(self, values: Optional[List[Any]] = None) -> FakeCollection:
+        return FakeCollection(values)
+
+
+class FakeVar:
+    def __init__(self, value: Any = None):
+        self.value = value
+
+    def getvalue(self) -> List[Any]:
+        return [self.value]
+
+
+class FakeDatabase:
+    """Tables of a dataset keyed by ID, plus the derived OP4/OP5 results"""
+
+    def __init__(self, data: Dataset, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, Dict[Any, dict]] = {}
+        for entity in ("donors", "tissues", "drugs", "cures", "diseases", "conditions", "future_works", "researchers"):
+            id_field = f"{entity[:-1]}_id"
+            self.tables[entity] = {i: {id_field: i, **record} for i, record in enumerate(data[entity], start=1)}
+        self.tables["publications"] = {record["publication_doi"]: record for record in data["publications"]}
+        self.sequences = {
+            sequence: itertools.count(len(self.tables[f"{sequence[:-4]}s"]) + 1) for sequence in queries.SEQUENCES
+        }
+        self._derived: Dict[tuple, List[tuple]] = {}
+        self.suggested_conditions = {
+            condition_id
+            for work in self.tables["future_works"].values()
+            for condition_id in work["suggested_by_condition_ids"]
+        }
+
+    # ---- statement handlers, by registry name ----
+
+    def rows(self, name: str, sql: str, params: Dict[str, Any]) -> List[tuple]:
+        if name == "health":
+            return [(datetime.datetime.now(datetime.timezone.utc),)]
+        if name.startswith("nextval_batch:"):
+            sequence = self.sequences[name.split(":")[1]]
+            return [(next(sequence),) for _ in range(params["batch_size"])]
+        if name.startswith("nextval:"):
+            return [(next(self.sequences[name.split(":")[1]]),)]
+        if name.startswith("refs_by_ids:"):
+            table = self._entity(name.split(":")[1])
+            return [(i, f"{table}:{i}") for i in params["ids"].aslist() if i in self.tables[table]]
+        if name.endswith("_by_id"):
+            entity = f"{name[:-6]}s"
+            row = self.tables[entity].get(params[f"{name[:-6]}_id"])
+            return [self._columns(entity, row)] if row else []
+        if name.endswith("s_by_ids"):
+            entity = name[:-7]
+            ids = params["ids"].aslist()
+            return [self._columns(entity, self.tables[entity][i]) for i in ids if i in self.tables[entity]]
+        if name.endswith("s_all"):
+            entity = name[:-4]
+            return [self._columns(entity, row) for row in self.tables[entity].values()]
+        if name.endswith("_insert"):
+            entity = f"{name[:-7]}s"
+            new_id = next(self.sequences[f"{name[:-7]}_seq"])
+            id_var = params.pop(f"{name[:-7]}_id")
+            id_var.value = new_id
+            self.tables[entity][new_id] = {f"{name[:-7]}_id": new_id, **params}
+            return []
+        if name == "donor_graph":
+            return self._donor_graph(params["donor_id"])
+        if name == "donor_graph_drugs":
+            return [
+                (cure_id, drug_id, self.tables["drugs"][drug_id]["drug_name"],
+                 FakeCollection(self.tables["drugs"][drug_id]["drug_allergies"]))
+                for cure_id in params["cure_ids"].aslist()
+                for drug_id in sorted(self.tables["cures"][cure_id]["cure_drug_ids"])
+            ]
+        if name == "drug_text_indexes":
+            # No Oracle Text here: the backend searches drugs in process
+            return [(0,)]
+        if name == "drug_search_all":
+            return [(d["drug_id"], d["drug_name"], d["drug_description"]) for d in self.tables["drugs"].values()]
+        if name == "drug_ids_by_allergy":
+            return [(drug_id,) for drug_id in self._drugs_with_allergy(params["allergy"])]
+        if name == "table_num_rows":
+            return [(len(self.tables[self._entity(params["table_name"])]),)]
+        if name == "op2":
+            tissues = sorted(
+                (t for t in self.tables["tissues"].values() if t["tissue_density"] < params["max_density"]),
+                key=lambda t: t["tissue_density"],
+            )
+            return [self._columns("tissues", t) for t in tissues]
+        if name == "op3":
+            cure = self.tables["cures"].get(params["cure_id"])
+            if cure is None:
+                return []
+            drugs = [self.tables["drugs"][i] for i in cure["cure_drug_ids"]]
+            return [(cure["cure_id"], *self._columns("drugs", d)) for d in drugs]
+        if name in ("op4", "op5"):
+            # Computed once per key, so the fake's own work does not count as query time
+            key = (name, *params.values())
+            if key not in self._derived:
+                self._derived[key] = self._op4(**params) if name == "op4" else self._op5(**params)
+            return self._derived[key]
+        if name == "op5_refresh":
+            return []
+        if name == "assembled":
+            return self._assembled(sql, params)
+        raise oracledb.DatabaseError(f"Fake database: unsupported statement {name}")
+
+    def insert(self, entity: str, rows: List[Dict[str, Any]]) -> None:
+        """Store bulk-inserted rows (bind names are mapped back to the dataset fields)"""
+        table = self.tables[self._entity(entity.replace("_", "") + "s")]
+        renames = _BULK_BINDS.get(entity, {})
+        for row in rows:
+            record = {
+                renames.get(name, name): value.aslist() if isinstance(value, FakeCollection) else value
+                for name, value in row.items()
+            }
+            table[record["publication_doi" if entity == "publication" else f"{entity}_id"]] = record
+            if entity == "future_work":
+                self.suggested_conditions.update(record["suggested_by_condition_ids"])
+        self._derived.clear()
+
+    def _donor_graph(self, donor_id: int) -> List[tuple]:
+        donor = self.tables["donors"].get(donor_id)
+        if donor is None:
+            return []
+        if ("conditions_by_donor",) not in self._derived:
+            by_donor: Dict[int, List[dict]] = {}
+            for condition in self.tables["conditions"].values():
+                by_donor.setdefault(condition["donor_id"], []).append(condition)
+            self._derived[("conditions_by_donor",)] = by_donor
+        conditions = self._derived[("conditions_by_donor",)].get(donor_id)
+        if not conditions:
+            return [(*self._columns("donors", donor), *([None] * 13))]
+        rows = []
+        for condition in sorted(conditions, key=lambda c: c["condition_id"]):
+            tissue = self.tables["tissues"][condition["tissue_id"]]
+            disease = self.tables["diseases"].get(condition["condition_disease_id"])
+            rows.append(
+                (
+                    *self._columns("donors", donor),
+                    condition["condition_id"], condition["condition_status"], condition["treatment_effect"],
+                    tissue["tissue_id"], tissue["tissue_name"], tissue["tissue_density"], tissue["tissue_is_vital"],
+                    disease and disease["disease_id"], disease and disease["disease_name"],
+                    disease and datetime.datetime.fromisoformat(disease["disease_discovery"]),
+                    disease and disease["disease_treatable"], disease and disease["disease_cure_id"],
+                    condition["treatment_id"],
+                )
+            )
+        return rows
+
+    def _op4(self, disease_id: int) -> List[tuple]:
+        disease = self.tables["diseases"].get(disease_id)
+        if disease is None:
+            return []
+        rows = []
+        for condition in self.tables["conditions"].values():
+            tissue = self.tables["tissues"][condition["tissue_id"]]
+            if (
+                condition["condition_disease_id"] == disease_id
+                and tissue["tissue_is_vital"] == "Y"
+                and condition["condition_id"] in self.suggested_conditions
+            ):
+                donor = self.tables["donors"][condition["donor_id"]]
+                rows.append(
+                    (
+                        *self._columns("donors", donor),
+                        tissue["tissue_id"],
+                        tissue["tissue_name"],
+                        tissue["tissue_is_vital"],
+                        disease["disease_name"],
+                        condition["condition_id"],
+                    )
+                )
+        return sorted(rows, key=lambda row: (row[0], row[5]))
+
+    def _op5(self, quality: str) -> List[tuple]:
+        # Same rows as ResearcherSuggestions (see refresh_researcher_suggestions)
+        rows = []
+        authors = {}
+        for publication in self.tables["publications"].values():
+            if publication["publication_journal_quality"] != quality:
+                continue
+            for researcher_id in publication["author_ids"]:
+                authors.setdefault(researcher_id, []).append(publication)
+        for researcher_id in sorted(authors):
+            researcher = self.tables["researchers"][researcher_id]
+            if not researcher["recommended_work_ids"]:
+                continue
+            person = (
+                researcher_id,
+                researcher["researcher_name"],
+                researcher["researcher_surname"],
+                researcher["researcher_email"],
+                researcher["researcher_institution"],
+            )
+            for publication in authors[researcher_id]:
+                rows.append(
+                    (
+                        *person, "P", publication["publication_doi"], publication["publication_title"],
+                        publication["publication_journal"], quality, None, None,
+                    )
+                )
+            for work_id in researcher["recommended_work_ids"]:
+                work = self.tables["future_works"][work_id]
+                rows.append((*person, "W", None, None, None, quality, work_id, work["future_work_description"]))
+        return rows
+
+    def _assembled(self, sql: str, params: Dict[str, Any]) -> List[tuple]:
+        count = _COUNT_QUERY.search(sql)
+        match = _LIST_QUERY.search(sql)
+        table = (count or match).group("table") if (count or match) else None
+        if table is None or sql.lstrip().startswith("UPDATE"):
+            raise oracledb.DatabaseError("Fake database: unsupported assembled statement")
+
+        entity = self._entity(table)
+        if "excluding_allergy" in params:
+            params = {**params, "excluding_allergy": self._drugs_with_allergy(params["excluding_allergy"])}
+        rows = [
+            row
+            for row in self.tables[entity].values()
+            if all(_FILTERS[name](row, value) for name, value in params.items() if name in _FILTERS)
+        ]
+        if count:
+            return [(len(rows),)]
+
+        id_field = f"{entity[:-1]}_id"
+        rows.sort(key=lambda row: row[id_field])
+        if "after_id" in params:
+            rows = [row for row in rows if row[id_field] > params["after_id"]]
+        start = params.get("page_offset", 0)
+        rows = rows[start:start + params["page_limit"]] if "page_limit" in params else rows
+        columns = [
+            _FIELD_EXPRESSIONS.get(column.strip(), column.strip().split(".")[-1])
+            for column in _split_columns(match.group("columns"))
+        ]
+        return [tuple(self._value(row, column) for column in columns) for row in rows]
+
+    def _drugs_with_allergy(self, allergy: str) -> set:
+        return {drug_id for drug_id, drug in self.tables["drugs"].items() if _FILTERS["allergy"](drug, allergy)}
+
+    # ---- helpers ----
+
+    def _entity(self, table: str) -> str:
+        names = {entity.replace("_", ""): entity for entity in self.tables}
+        return names[table.lower()]
+
+    def _columns(self, entity: str, row: dict) -> tuple:
+        fields = {"donors": queries.DONOR_FIELDS, "tissues": queries.TISSUE_FIELDS, "drugs": queries.DRUG_FIELDS}[entity]
+        return tuple(self._value(row, field) for field in fields)
+
+    @staticmethod
+    def _value(row: dict, field: str) -> Any:
+        value = row.get(field)
+        if field in ("drug_allergies", "cure_drug_ids"):
+            return FakeCollection(value)
+        if field == "donor_date_of_birth" and isinstance(value, str):
+            # Oracle DATE columns are fetched as datetimes, even when holding a day only
+            return datetime.datetime.fromisoformat(value)
+        return value
+
+
+class FakeCursor:
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.rowcount = 0
+        self.description = None
+        self.rowfactory = None
+        self._pending: List[tuple] = []  # result rows not fetched yet
+        self._prefetched = 0  # of which returned along with the execute
+        self._buffer: deque = deque()  # rows of the current batch (async iteration)
+
+    def var(self, *args, **kwargs) -> FakeVar:
+        return FakeVar()
+
+    def setinputsizes(self, *args, **kwargs) -> None:
+        pass
+
+    async def execute(self, statement: str, parameters: Optional[Dict] = None, **kwargs) -> None:
+        await self.connection.round_trip()
+        name = _STATEMENT_NAMES.get(statement, "assembled")
+        if name == "previous_statement":
+            self._pending = [("fake", 0, self.connection.previous_statement)]
+        elif name == "cursor_plan":
+            self._pending = [("No plans in the fake database",)]
+        else:
+            self._pending = self.connection.database.rows(name, statement, dict(parameters or {}))
+            self.connection.previous_statement = statement
+        self._prefetched = min(len(self._pending), self.prefetchrows)
+        self._buffer.clear()
+        self.rowcount = len(self._pending)
+        self.rowfactory = None
+
+    async def executemany(self, statement: str, parameters: List[Dict], **kwargs) -> None:
+        await self.connection.round_trip()
+        name = _STATEMENT_NAMES.get(statement, "assembled")
+        if not name.endswith("_bulk_insert"):
+            raise oracledb.DatabaseError(f"Fake database: unsupported statement {name}")
+        self.connection.database.insert(name[:-12], parameters)
+        self._pending = []
+        self._buffer.clear()
+        self.rowcount = len(parameters)
+
+    def getbatcherrors(self) -> List[Any]:
+        return []
+
+    async def fetchone(self) -> Optional[tuple]:
+        rows = await self.fetchmany(1)
+        return rows[0] if rows else None
+
+    async def fetchmany(self, size: Optional[int] = None) -> List[tuple]:
+        size = size or self.arraysize
+        rows = [self._buffer.popleft() for _ in range(min(size, len(self._buffer)))]
+        wanted = size - len(rows)
+        if wanted and self._pending:
+            # Rows beyond those prefetched by the execute cost one round-trip per call
+            if wanted > self._prefetched:
+                await self.connection.round_trip()
+            fetched = self._pending[:wanted]
+            self._pending = self._pending[wanted:]
+            self._prefetched = max(0, self._prefetched - wanted)
+            if self.rowfactory is not None:
+                fetched = [self.rowfactory(*row) for row in fetched]
+            rows.extend(fetched)
+        return rows
+
+    async def fetchall(self) -> List[tuple]:
+        rows = list(self._buffer)
+        self._buffer.clear()
+        while True:
+            batch = await self.fetchmany()
+            if not batch:
+                return rows
+            rows.extend(batch)
+
+    def __aiter__(self) -> "FakeCursor":
+        return self
+
+    async def __anext__(self) -> tuple:
+        if not self._buffer:
+            self._buffer.extend(await self.fetchmany())
+            if not self._buffer:
+                raise StopAsyncIteration
+        return self._buffer.popleft()
+
+    def close(self) -> None:
+        self._pending = []
+        self._buffer.clear()
+
+
+class FakeConnection:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.autocommit = False
+        self.round_trips = 0
+        self.previous_statement: Optional[str] = None
+
+    async def round_trip(self) -> None:
+        self.round_trips += 1
+        if self.database.latency:
+            await asyncio.sleep(self.database.latency)
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    async def commit(self) -> None:
+        await self.round_trip()
+
+    async def rollback(self) -> None:
+        await self.round_trip()
+
+    async def gettype(self, name: str) -> FakeObjectType:
+        await self.round_trip()
+        return FakeObjectType(name)
+
+
+class FakePool:
+    """Stands in for oracledb.AsyncConnectionPool (app.state.pool)"""
+
+    def __init__(self, database: FakeDatabase, max: int = 10):
+        self.database = database
+        self.max = max
+        self.busy = 0
+        self.opened = 0
+        self._free: List[FakeConnection] = []
+        self._available = asyncio.Semaphore(max)
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._available:
+            if not self._free:
+                self._free.append(FakeConnection(self.database))
+                self.opened += 1
+            connection = self._free.pop()
+            self.busy += 1
+            try:
+                yield connection
+            finally:
+                self.busy -= 1
+                connection.autocommit = False
+                self._free.append(connection)
+
+    async def close(self, force: bool = False) -> None:
+        self._free.clear()
+
+
+_STATEMENT_NAMES = {text: name for name, text in queries.STATEMENTS.items()}
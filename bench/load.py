@@ -0,0 +1,89 @@
+"""Load a bench dataset into a running backend through the bulk ingest endpoints"""
+import json
+import time
+from typing import Dict, List
+
+import httpx
+
+from dataset import ENTITIES, Dataset
+
+# Bulk endpoint of each entity
+ENDPOINTS = {
+    "donors": "/api/donors/bulk",
+    "tissues": "/api/tissues/bulk",
+    "drugs": "/api/drugs/bulk",
+    "cures": "/api/cures/bulk",
+    "diseases": "/api/diseases/bulk",
+    "conditions": "/api/conditions/bulk",
+    "future_works": "/api/future-works/bulk",
+    "researchers": "/api/researchers/bulk",
+    "publications": "/api/publications/bulk",
+}
+
+# Reference fields of each entity -> referenced entity
+REFERENCES = {
+    "cures": {"cure_drug_ids": "drugs"},
+    "diseases": {"disease_cure_id": "cures"},
+    "conditions": {
+        "condition_disease_id": "diseases",
+        "donor_id": "donors",
+        "tissue_id": "tissues",
+        "treatment_id": "cures",
+    },
+    "future_works": {"suggested_by_condition_ids": "conditions"},
+    "researchers": {"recommended_work_ids": "future_works"},
+    "publications": {"author_ids": "researchers", "proposed_work_ids": "future_works"},
+}
+
+# Records per request (the backend commits every BULK_BATCH_SIZE records)
+CHUNK_SIZE = 5000
+
+
+async def load(client: httpx.AsyncClient, data: Dataset) -> Dict[str, Dict[int, int]]:
+    """Ingest every entity in dependency order, rewriting references to the assigned IDs
+
+    Returns:
+        Assigned ID of each dataset position (1-based), per entity
+    """
+    assigned: Dict[str, Dict[int, int]] = {}
+    for entity in ENTITIES:
+        records = [_remap(record, REFERENCES.get(entity, {}), assigned) for record in data[entity]]
+        ids: Dict[int, int] = {}
+        started = time.perf_counter()
+        for start in range(0, len(records), CHUNK_SIZE):
+            chunk = records[start:start + CHUNK_SIZE]
+            response = await client.post(
+                ENDPOINTS[entity],
+                content="".join(json.dumps(record) + "\n" for record in chunk),
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=None,
+            )
+            response.raise_for_status()
+            result = response.json()
+            failed = {error["index"] for error in result["errors"]}
+            if failed:
+                print(f"{entity}: {len(failed)} records rejected, e.g. {result['errors'][0]}")
+            new_ids = iter(result["ids"])
+            for offset in range(len(chunk)):
+                if offset not in failed:
+                    ids[start + offset + 1] = next(new_ids)
+        assigned[entity] = ids
+        elapsed = time.perf_counter() - started
+        print(f"{entity}: {len(ids)} loaded in {elapsed:.1f}s ({len(ids) / elapsed:.0f} records/s)")
+    return assigned
+
+
+def _remap(record: dict, references: Dict[str, str], assigned: Dict[str, Dict[int, int]]) -> dict:
+    record = dict(record)
+    for field, entity in references.items():
+        value = record[field]
+        if isinstance(value, list):
+            record[field] = [assigned[entity][i] for i in value if i in assigned[entity]]
+        elif value is not None:
+            record[field] = assigned[entity].get(value)
+    return record
+
+
+def positions(assigned: Dict[str, Dict[int, int]]) -> Dict[str, List[int]]:
+    """IDs to draw requests from, per entity"""
+    return {entity: list(ids.values()) for entity, ids in assigned.items()}
@@ -0,0 +1,181 @@
+"""Drive the backend endpoints with concurrent load and report throughput and latency
+
+Against the in-process fake database (no Oracle needed):
+
+    cd backend && uv run python ../bench/run.py --fake --scale 10000
+
+Against a running backend (e.g. on the Oracle XE container of docker-compose.yml),
+optionally loading the generated dataset through the bulk endpoints first:
+
+    cd backend && uv run python ../bench/run.py --url http://127.0.0.1:8000 --scale 10000 --load
+
+Without --load the dataset is assumed to be loaded already into a fresh schema (IDs
+1..n). Results can be written as JSON with --output to compare runs.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "backend"))
+sys.path.insert(0, str(BENCH_DIR))
+
+import httpx  # noqa: E402
+
+from dataset import ALLERGIES, Dataset, QUALITIES, generate  # noqa: E402
+from load import load, positions  # noqa: E402
+
+Request = Tuple[str, str, Optional[dict]]
+
+# Scenario name -> request builder (random generator, IDs per entity)
+SCENARIOS: Dict[str, Callable[[random.Random, Dict[str, List]], Request]] = {
+    "health": lambda rng, ids: ("GET", "/", None),
+    "op1_create_tissue": lambda rng, ids: (
+        "POST",
+        "/api/tissues",
+        {
+            "tissue_name": f"Bench tissue {rng.randrange(10**9)}",
+            "tissue_description": "Created by the benchmark",
+            "tissue_density": round(rng.uniform(0.2, 2.0), 3),
+            "tissue_is_vital": rng.choice("YN"),
+        },
+    ),
+    "op2_tissues_by_density": lambda rng, ids: (
+        "GET", f"/api/operations/tissues-by-density?max_density={rng.choice((0.5, 0.8, 1.0, 1.2, 1.5))}", None
+    ),
+    "op3_cure_details": lambda rng, ids: ("GET", f"/api/operations/cure-details/{rng.choice(ids['cures'])}", None),
+    "op4_donors_vital_disease": lambda rng, ids: (
+        "GET", f"/api/operations/donors-vital-disease?disease_id={rng.choice(ids['diseases'])}", None
+    ),
+    "op5_top_researchers": lambda rng, ids: (
+        "GET", f"/api/operations/top-researchers-suggestions?quality={rng.choice(QUALITIES)}", None
+    ),
+    "donor_by_id": lambda rng, ids: ("GET", f"/api/donors/{rng.choice(ids['donors'])}", None),
+    "donor_graph": lambda rng, ids: ("GET", f"/api/donors/{rng.choice(ids['donors'])}/graph?depth=3", None),
+    "tissue_by_id": lambda rng, ids: ("GET", f"/api/tissues/{rng.choice(ids['tissues'])}", None),
+    "drug_by_id": lambda rng, ids: ("GET", f"/api/drugs/{rng.choice(ids['drugs'])}", None),
+    "donors_page": lambda rng, ids: ("GET", f"/api/donors?limit=100&offset={rng.randrange(0, len(ids['donors']), 100)}", None),
+    "drugs_page": lambda rng, ids: ("GET", "/api/drugs?limit=100&count=none", None),
+    "donors_lookup": lambda rng, ids: ("POST", "/api/donors/lookup", {"ids": rng.sample(ids["donors"], 50)}),
+    "drug_search": lambda rng, ids: ("GET", f"/api/drugs/search?q=drug {rng.choice(ids['drugs'])}", None),
+    "drug_typeahead": lambda rng, ids: ("GET", f"/api/drugs/typeahead?prefix=Drug {rng.randint(1, 9)}", None),
+    "drugs_by_allergy": lambda rng, ids: ("GET", f"/api/drugs?allergy={rng.choice(ALLERGIES)}&fields=drug_name", None),
+    "cures_excluding_allergy": lambda rng, ids: (
+        "GET", f"/api/cures?excluding_allergy={rng.choice(ALLERGIES)}&fields=cure_drug_ids", None
+    ),
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    build: Callable[[random.Random, Dict[str, List]], Request],
+    ids: Dict[str, List],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> Dict:
+    """Send `requests` requests from `concurrency` workers; latencies in milliseconds"""
+    rng = random.Random(seed)
+    planned = [build(rng, ids) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while planned:
+            method, path, body = planned.pop()
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    # Nearest-rank percentile of sorted values
+    return values[max(0, -(-len(values) * percent // 100) - 1)] if values else 0.0
+
+
+async def fake_client(stack: AsyncExitStack, data: Dataset, latency: float) -> httpx.AsyncClient:
+    """Start the app in-process on the fake database"""
+    from fake_oracledb import FakeDatabase, FakePool
+    import app.main as main
+
+    database = FakeDatabase(data, latency)
+    main.create_pool = lambda: FakePool(database)
+    await stack.enter_async_context(main.app.router.lifespan_context(main.app))
+    transport = httpx.ASGITransport(app=main.app)
+    return await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url="http://bench"))
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    data = generate(args.scale, args.seed)
+    ids = {entity: list(range(1, count + 1)) for entity, count in data.counts().items()}
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+
+    async with AsyncExitStack() as stack:
+        if args.fake:
+            client = await fake_client(stack, data, args.latency_ms / 1000)
+        else:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(base_url=args.url, limits=limits, timeout=httpx.Timeout(60.0))
+            )
+            if args.load:
+                ids = positions(await load(client, data))
+
+        results = {}
+        for name in names:
+            results[name] = await run_scenario(client, SCENARIOS[name], ids, args.requests, args.concurrency, args.seed)
+            print(f"{name:28} " + "  ".join(f"{key}={value}" for key, value in results[name].items()))
+
+    return {
+        "target": "fake" if args.fake else args.url,
+        "scale": args.scale,
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "counts": data.counts(),
+        "results": results,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--fake", action="store_true", help="Run the app in-process on the fake database")
+    target.add_argument("--url", help="Base URL of a running backend")
+    parser.add_argument("--load", action="store_true", help="Load the dataset through the bulk endpoints first (--url)")
+    parser.add_argument("--scale", type=int, default=1000, help="Number of donors (other tables scale with it)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Simulated round-trip time (--fake)")
+    parser.add_argument("--scenarios", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = asyncio.run(main(arguments))
+    if arguments.output:
+        arguments.output.write_text(json.dumps(report, indent=2))
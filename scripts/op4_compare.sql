@@ -0,0 +1,68 @@
+-- OP4 (donors-vital-disease): execution plan and timing of the original DEREF query
+-- against the REF join used by the backend.
+--
+-- Needs the PLUSTRACE role (or SELECT on the V$ views) for AUTOTRACE:
+--   sqlplus ${DATABASE_USER}/${DATABASE_PASSWORD}@localhost:1521/XEPDB1 @scripts/op4_compare.sql
+-- Compare "Elapsed", "consistent gets" and the plan operations of both runs; run the
+-- script twice and keep the second run so both versions are measured with a warm cache.
+SET DEFINE OFF;
+SET TIMING ON;
+SET AUTOTRACE TRACEONLY EXPLAIN STATISTICS;
+SET LINESIZE 200;
+SET PAGESIZE 1000;
+
+VARIABLE disease_id NUMBER;
+EXEC :disease_id := 2;
+
+EXEC DBMS_STATS.GATHER_SCHEMA_STATS(USER);
+
+PROMPT ======== Before: DEREF over every suggested condition + DISTINCT ========
+SELECT DISTINCT
+    DEREF(A.condition.donor_ref).donor_id AS donor_id,
+    DEREF(A.condition.donor_ref).donor_name AS donor_name,
+    DEREF(A.condition.donor_ref).donor_surname AS donor_surname,
+    DEREF(A.condition.donor_ref).donor_date_of_birth AS donor_date_of_birth,
+    DEREF(A.condition.donor_ref).donor_sex AS donor_sex,
+    DEREF(A.condition.tissue_ref).tissue_id AS tissue_id,
+    DEREF(A.condition.tissue_ref).tissue_name AS tissue_name,
+    DEREF(A.condition.tissue_ref).tissue_is_vital AS tissue_is_vital,
+    DEREF(A.condition.condition_disease).disease_name AS disease_name
+FROM (
+  SELECT DEREF(VALUE(f)) AS condition
+  FROM FutureWorks fw,
+       TABLE(fw.future_work_suggested_by) f
+) A
+WHERE
+DEREF(A.condition.tissue_ref).tissue_is_vital = 'Y'
+AND DEREF(A.condition.condition_disease).disease_id = :disease_id;
+
+PROMPT ======== After: scoped REF join + semi-join on the nested table ========
+SELECT d.donor_id,
+       d.donor_name,
+       d.donor_surname,
+       d.donor_date_of_birth,
+       d.donor_sex,
+       t.tissue_id,
+       t.tissue_name,
+       t.tissue_is_vital,
+       di.disease_name,
+       c.condition_id
+FROM   Diseases di,
+       Conditions c,
+       Tissues t,
+       Donors d
+WHERE  di.disease_id = :disease_id
+  AND  c.condition_disease = REF(di)
+  AND  c.tissue_ref = REF(t)
+  AND  c.donor_ref = REF(d)
+  AND  t.tissue_is_vital = 'Y'
+  AND  EXISTS (
+           SELECT 1
+           FROM   FutureWorks fw,
+                  TABLE(fw.future_work_suggested_by) s
+           WHERE  s.COLUMN_VALUE = REF(c)
+       )
+ORDER BY d.donor_id, t.tissue_id;
+
+SET AUTOTRACE OFF;
+SET TIMING OFF;
@@ -194,6 +194,41 @@ BEGIN
     EXECUTE IMMEDIATE 'DROP SEQUENCE drug_seq';
     EXECUTE IMMEDIATE 'CREATE SEQUENCE drug_seq START WITH ' || (v_max_id + 1) || ' INCREMENT BY 1';
 
+    -- Reset cure_seq to start after existing data
+    SELECT NVL(MAX(cure_id), 0) INTO v_max_id FROM Cures;
+    EXECUTE IMMEDIATE 'DROP SEQUENCE cure_seq';
+    EXECUTE IMMEDIATE 'CREATE SEQUENCE cure_seq START WITH ' || (v_max_id + 1) || ' INCREMENT BY 1';
+
+    -- Reset disease_seq to start after existing data
+    SELECT NVL(MAX(disease_id), 0) INTO v_max_id FROM Diseases;
+    EXECUTE IMMEDIATE 'DROP SEQUENCE disease_seq';
+    EXECUTE IMMEDIATE 'CREATE SEQUENCE disease_seq START WITH ' || (v_max_id + 1) || ' INCREMENT BY 1';
+
+    -- Reset condition_seq to start after existing data
+    SELECT NVL(MAX(condition_id), 0) INTO v_max_id FROM Conditions;
+    EXECUTE IMMEDIATE 'DROP SEQUENCE condition_seq';
+    EXECUTE IMMEDIATE 'CREATE SEQUENCE condition_seq START WITH ' || (v_max_id + 1) || ' INCREMENT BY 1';
+
+    -- Reset future_work_seq to start after existing data
+    SELECT NVL(MAX(future_work_id), 0) INTO v_max_id FROM FutureWorks;
+    EXECUTE IMMEDIATE 'DROP SEQUENCE future_work_seq';
+    EXECUTE IMMEDIATE 'CREATE SEQUENCE future_work_seq START WITH ' || (v_max_id + 1) || ' INCREMENT BY 1';
+
+    -- Reset researcher_seq to start after existing data
+    SELECT NVL(MAX(researcher_id), 0) INTO v_max_id FROM Researchers;
+    EXECUTE IMMEDIATE 'DROP SEQUENCE researcher_seq';
+    EXECUTE IMMEDIATE 'CREATE SEQUENCE researcher_seq START WITH ' || (v_max_id + 1) || ' INCREMENT BY 1';
+
     DBMS_OUTPUT.PUT_LINE('All sequences reset successfully');
 END;
 /
+
+-- ========================
+-- Build the OP5 summary
+-- ========================
+BEGIN
+    refresh_researcher_suggestions;
+END;
+/
+
+COMMIT;
@@ -189,8 +189,158 @@ NESTED TABLE publication_proposed_works STORE AS publication_proposed_works_nt;
 ALTER TABLE publication_authors_nt ADD (SCOPE FOR (COLUMN_VALUE) IS Researchers);
 ALTER TABLE publication_proposed_works_nt ADD (SCOPE FOR (COLUMN_VALUE) IS FutureWorks);
 
+-- ========================
+-- Indexes
+-- ========================
+
+-- OP4: conditions of a disease on a given tissue, joined through the scoped REFs
+CREATE INDEX idx_conditions_disease_tissue ON Conditions (condition_disease, tissue_ref);
+
+-- Donor graph: the conditions of a donor
+CREATE INDEX idx_conditions_donor ON Conditions (donor_ref);
+
+-- OP4: is a condition suggested by any future work
+CREATE INDEX idx_future_work_suggested_by ON future_work_suggested_by_nt (COLUMN_VALUE);
+
+-- OP2 and the tissue list's max_density: density range scans in density order (no sort)
+CREATE INDEX idx_tissues_density ON Tissues (tissue_density);
+
+-- Drug search: Oracle Text indexes on the name and the description, synced on commit,
+-- with a prefix index so that the 'term%' of the last typed word is not expanded by a scan
+BEGIN
+  CTX_DDL.CREATE_PREFERENCE('drug_search_wordlist', 'BASIC_WORDLIST');
+  CTX_DDL.SET_ATTRIBUTE('drug_search_wordlist', 'PREFIX_INDEX', 'TRUE');
+  CTX_DDL.SET_ATTRIBUTE('drug_search_wordlist', 'PREFIX_MIN_LENGTH', '2');
+  CTX_DDL.SET_ATTRIBUTE('drug_search_wordlist', 'PREFIX_MAX_LENGTH', '8');
+END;
+/
+
+CREATE INDEX idx_drugs_name_text ON Drugs (drug_name) INDEXTYPE IS CTXSYS.CONTEXT
+  PARAMETERS ('WORDLIST drug_search_wordlist SYNC (ON COMMIT)');
+CREATE INDEX idx_drugs_description_text ON Drugs (drug_description) INDEXTYPE IS CTXSYS.CONTEXT
+  PARAMETERS ('WORDLIST drug_search_wordlist SYNC (ON COMMIT)');
+
+-- Drug typeahead: case-insensitive name prefixes
+CREATE INDEX idx_drugs_name_upper ON Drugs (UPPER(drug_name));
+
+-- Cures containing given drugs (allergy screening): REF -> parent cure without a scan
+CREATE INDEX idx_cure_composition_drug ON cure_composition_nt (COLUMN_VALUE, NESTED_TABLE_ID);
+
+-- ========================
+-- Allergy lookup
+-- ========================
+
+-- Inverted drug_allergies: one row per (allergy, drug), the allergy lower-cased and
+-- trimmed. Maintained by trg_drug_allergies in the statement that writes the drug.
+CREATE TABLE DrugAllergies (
+  allergy  VARCHAR2(200) NOT NULL,
+  drug_id  NUMBER        NOT NULL,
+  CONSTRAINT pk_drug_allergies PRIMARY KEY (allergy, drug_id)
+) ORGANIZATION INDEX;
+
+CREATE INDEX idx_drug_allergies_drug ON DrugAllergies (drug_id);
+
+CREATE OR REPLACE TRIGGER trg_drug_allergies
+AFTER INSERT OR DELETE OR UPDATE OF drug_allergies ON Drugs
+FOR EACH ROW
+BEGIN
+  IF UPDATING OR DELETING THEN
+    DELETE FROM DrugAllergies WHERE drug_id = :old.drug_id;
+  END IF;
+  IF INSERTING OR UPDATING THEN
+    INSERT INTO DrugAllergies (allergy, drug_id)
+    SELECT DISTINCT LOWER(TRIM(a.COLUMN_VALUE)), :new.drug_id
+    FROM   TABLE(:new.drug_allergies) a
+    WHERE  TRIM(a.COLUMN_VALUE) IS NOT NULL;
+  END IF;
+END;
+/
+
+-- ========================
+-- OP5 summary
+-- ========================
+
+-- Flattened OP5 projection keyed by journal quality: one 'P' row per (quality, author,
+-- publication) and one 'W' row per (quality, author, recommended future work), so the
+-- publications x recommended works fan-out of the original join is never stored.
+-- Rebuilt by refresh_researcher_suggestions.
+CREATE TABLE ResearcherSuggestions (
+  journal_quality         VARCHAR2(10)  NOT NULL,
+  researcher_id           NUMBER        NOT NULL,
+  researcher_name         VARCHAR2(100),
+  researcher_surname      VARCHAR2(100),
+  researcher_email        VARCHAR2(320),
+  researcher_institution  VARCHAR2(200),
+  item_kind               CHAR(1)       NOT NULL,  -- 'P' publication, 'W' future work
+  publication_doi         VARCHAR2(100),
+  publication_title       VARCHAR2(400),
+  publication_journal     VARCHAR2(200),
+  future_work_id          NUMBER,
+  CONSTRAINT check_suggestion_kind CHECK (item_kind IN ('P', 'W'))
+);
+
+CREATE INDEX idx_researcher_suggestions ON ResearcherSuggestions (journal_quality, researcher_id);
+
+-- Rebuild the rows of one journal quality (all of them when p_quality is NULL).
+-- Only researchers with both a publication of that quality and a recommended work
+-- are kept, as in the original OP5 join. The caller commits.
+CREATE OR REPLACE PROCEDURE refresh_researcher_suggestions (p_quality IN VARCHAR2 DEFAULT NULL) AS
+BEGIN
+  DELETE FROM ResearcherSuggestions
+  WHERE p_quality IS NULL OR journal_quality = p_quality;
+
+  INSERT INTO ResearcherSuggestions (
+    journal_quality, researcher_id, researcher_name, researcher_surname, researcher_email,
+    researcher_institution, item_kind, publication_doi, publication_title, publication_journal
+  )
+  SELECT p.publication_journal_quality,
+         r.researcher_id,
+         r.researcher_name,
+         r.researcher_surname,
+         r.researcher_email,
+         r.researcher_institution,
+         'P',
+         p.publication_doi,
+         p.publication_title,
+         p.publication_journal
+  FROM   Publications p,
+         TABLE(p.publication_authors) a,
+         Researchers r
+  WHERE  VALUE(a) = REF(r)
+    AND  (p_quality IS NULL OR p.publication_journal_quality = p_quality)
+    AND  EXISTS (SELECT 1 FROM TABLE(r.researcher_recommended_works));
+
+  INSERT INTO ResearcherSuggestions (
+    journal_quality, researcher_id, researcher_name, researcher_surname, researcher_email,
+    researcher_institution, item_kind, future_work_id
+  )
+  SELECT q.journal_quality,
+         r.researcher_id,
+         r.researcher_name,
+         r.researcher_surname,
+         r.researcher_email,
+         r.researcher_institution,
+         'W',
+         DEREF(VALUE(w)).future_work_id
+  FROM   (
+           SELECT DISTINCT s.journal_quality, s.researcher_id
+           FROM   ResearcherSuggestions s
+           WHERE  s.item_kind = 'P'
+             AND  (p_quality IS NULL OR s.journal_quality = p_quality)
+         ) q,
+         Researchers r,
+         TABLE(r.researcher_recommended_works) w
+  WHERE  r.researcher_id = q.researcher_id;
+END;
+/
+
 
 
 CREATE SEQUENCE donor_seq START WITH 1 INCREMENT BY 1;
 CREATE SEQUENCE tissue_seq START WITH 1 INCREMENT BY 1;
-CREATE SEQUENCE drug_seq START WITH 1 INCREMENT BY 1;
\ No newline at end of file
+CREATE SEQUENCE drug_seq START WITH 1 INCREMENT BY 1;
+CREATE SEQUENCE cure_seq START WITH 1 INCREMENT BY 1;
+CREATE SEQUENCE disease_seq START WITH 1 INCREMENT BY 1;
+CREATE SEQUENCE condition_seq START WITH 1 INCREMENT BY 1;
+CREATE SEQUENCE future_work_seq START WITH 1 INCREMENT BY 1;
+CREATE SEQUENCE researcher_seq START WITH 1 INCREMENT BY 1;
\ No newline at end of file